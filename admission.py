@@ -0,0 +1,140 @@
+import asyncio
+import math
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Optional
+
+
+class BudgetExceeded(Exception):
+    """A request that cannot be admitted; status is 413 when it can never fit, 429 when it may later."""
+
+    def __init__(self, status: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class CapacityPool:
+    """A capacity handed out in FIFO order, so a large waiter is not starved by small ones.
+
+    A capacity of 0 or less means unlimited.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_use = 0
+        self._waiters: deque = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _fits(self, amount: int) -> bool:
+        return self.capacity <= 0 or self.in_use + amount <= self.capacity
+
+    async def acquire(self, amount: int, timeout: Optional[float]) -> bool:
+        """Take amount, waiting at most timeout seconds (forever when None); False if it timed out."""
+        if not self._waiters and self._fits(amount):
+            self.in_use += amount
+            return True
+        if timeout is not None and timeout <= 0:
+            return False
+
+        granted = asyncio.get_running_loop().create_future()
+        waiter = (amount, granted)
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), timeout)
+            return True
+        except asyncio.TimeoutError:
+            if granted.done():
+                return True
+            self._drop(waiter)
+            return False
+        except BaseException:
+            # Cancelled while waiting: give back what was granted in the meantime
+            if granted.done():
+                self.release(amount)
+            else:
+                self._drop(waiter)
+            raise
+
+    def release(self, amount: int):
+        self.in_use -= amount
+        self._wake()
+
+    def _drop(self, waiter):
+        self._waiters.remove(waiter)
+        waiter[1].cancel()
+        self._wake()
+
+    def _wake(self):
+        # Amounts are taken here, before the waiter resumes, so one release is never claimed twice
+        while self._waiters and self._fits(self._waiters[0][0]):
+            amount, granted = self._waiters.popleft()
+            self.in_use += amount
+            granted.set_result(None)
+
+
+class Reservation:
+    """Bytes admitted for one request; release() is safe to call more than once."""
+
+    def __init__(self, budget: 'AdmissionBudget', size: int):
+        self.budget = budget
+        self.size = size
+
+    def release(self):
+        if self.size:
+            self.budget.memory.release(self.size)
+            self.size = 0
+
+
+class AdmissionBudget:
+    """Bytes in flight and concurrent parses shared by every analysis request.
+
+    A request reserves the bytes its files will occupy once decoded before
+    any of them is decoded. When the budget is taken it waits up to
+    max_wait seconds in line, then is turned away with 429 and a
+    Retry-After; a request larger than the whole budget gets 413. Admitted
+    files are then parsed at most max_parses at a time across requests, so
+    decoded copies only pile up as far as the parsers can work through them.
+    Runs on the event loop; none of it is thread-safe.
+    """
+
+    def __init__(self, max_bytes: int, max_parses: int, max_wait: float):
+        self.max_wait = max_wait
+        self.memory = CapacityPool(max_bytes)
+        self.parses = CapacityPool(max_parses)
+        self.rejected = 0
+
+    async def reserve(self, size: int) -> Reservation:
+        """Admit size bytes or raise BudgetExceeded."""
+        if 0 < self.memory.capacity < size:
+            self.rejected += 1
+            raise BudgetExceeded(413, f'Request needs {size} bytes, more than the {self.memory.capacity} byte memory budget')
+        if not await self.memory.acquire(size, self.max_wait):
+            self.rejected += 1
+            raise BudgetExceeded(429, 'Server is at its memory budget, retry later',
+                                 retry_after=max(1, math.ceil(self.max_wait)))
+        return Reservation(self, size)
+
+    @asynccontextmanager
+    async def parse_slot(self) -> AsyncIterator[None]:
+        """Hold one of the concurrent parse slots, queueing until one is free."""
+        await self.parses.acquire(1, None)
+        try:
+            yield
+        finally:
+            self.parses.release(1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'max_bytes': self.memory.capacity,
+            'bytes_in_use': self.memory.in_use,
+            'requests_waiting': self.memory.waiting,
+            'max_parses': self.parses.capacity,
+            'parses_active': self.parses.in_use,
+            'parses_waiting': self.parses.waiting,
+            'rejected': self.rejected,
+        }
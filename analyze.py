@@ -1,14 +1,12 @@
 import json
 import io
+import os
 import base64
-from typing import List, Dict, Any
-import pandas as pd
-from PyPDF2 import PdfReader
-from openpyxl import load_workbook
-from docx import Document
-import re
+from typing import List, Dict, Any, Callable, Optional
+from keyword_matcher import SentenceMatch, get_matcher
 
-# Keywords list
+# Keywords list; the handler has no keyword sets, and its space-padded terms
+# (' tg ', ' trans ', ...) only match as whole words, unlike the API's bare ones
 KEYWORDS = [
     'gender', 'transgender', 'transmen', 'transwomen', 'lgbtq', 'lgbt', ' dei ',
     'diversity', 'equity', 'inclusion', ' gbv ', 'trans-gender', 'trans-women',
@@ -18,35 +16,29 @@ KEYWORDS = [
     'key populations', ' mat ', 'hormone', ' dreams ', 'abortion', ' fsw',
     'female sex worker', 'food'
 ]
+# Import every parsing library at load time instead of when its file type first
+# appears; only worth it when the instance is initialized before it takes traffic
+PRELOAD_PARSERS = os.environ.get("PRELOAD_PARSERS", "").lower() in ("1", "true", "yes")
 
 def extract_sentences_from_text(text: str, keywords: List[str]) -> List[Dict[str, Any]]:
     """Extract sentences containing keywords from text."""
-    sentences = re.split(r'[.!?]+', text)
-    matches = []
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-            
-        for keyword in keywords:
-            if keyword.lower() in sentence.lower():
-                matches.append({
-                    'keyword': keyword,
-                    'sentence': sentence,
-                    'exact_sentence': sentence
-                })
-                break  # Only match first keyword found
-    
-    return matches
+    return get_matcher(keywords).extract_sentences(text)
+
+def sentence_matches(text: str, keywords: List[str]) -> List[SentenceMatch]:
+    """Keyword matches in text as offsets into it."""
+    return list(get_matcher(keywords).iter_matches(text))
 
 def process_pdf(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
     """Process PDF file and extract keyword matches."""
     try:
+        from PyPDF2 import PdfReader
+        
         pdf_reader = PdfReader(io.BytesIO(file_content))
         results = []
         
         for page_num, page in enumerate(pdf_reader.pages, 1):
             text = page.extract_text()
-            matches = extract_sentences_from_text(text, KEYWORDS)
+            matches = sentence_matches(text, KEYWORDS)
             
             for match in matches:
                 results.append({
@@ -54,9 +46,13 @@ def process_pdf(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
                     'source_type': 'page',
                     'source_name': f'Page {page_num}',
                     'location': f'Page {page_num}',
-                    'keyword': match['keyword'],
-                    'exact_sentence': match['sentence'],
-                    'partner': filename.split('.')[0]
+                    'keyword': match.keyword,
+                    'exact_sentence': text[match.start:match.end],
+                    'partner': filename.split('.')[0],
+                    'sentence_start': match.start,
+                    'sentence_end': match.end,
+                    'keyword_start': match.keyword_start,
+                    'keyword_end': match.keyword_end
                 })
         
         return results
@@ -66,6 +62,8 @@ def process_pdf(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
 def process_excel(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
     """Process Excel file and extract keyword matches."""
     try:
+        from openpyxl import load_workbook
+        
         workbook = load_workbook(io.BytesIO(file_content))
         results = []
         
@@ -75,7 +73,7 @@ def process_excel(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
             for row_num, row in enumerate(sheet.iter_rows(values_only=True), 1):
                 for col_num, cell_value in enumerate(row, 1):
                     if cell_value and isinstance(cell_value, str):
-                        matches = extract_sentences_from_text(cell_value, KEYWORDS)
+                        matches = sentence_matches(cell_value, KEYWORDS)
                         
                         for match in matches:
                             results.append({
@@ -83,9 +81,13 @@ def process_excel(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
                                 'source_type': 'worksheet',
                                 'source_name': sheet_name,
                                 'location': f'Row {row_num}, Column {col_num}',
-                                'keyword': match['keyword'],
-                                'exact_sentence': match['sentence'],
-                                'partner': filename.split('.')[0]
+                                'keyword': match.keyword,
+                                'exact_sentence': cell_value[match.start:match.end],
+                                'partner': filename.split('.')[0],
+                                'sentence_start': match.start,
+                                'sentence_end': match.end,
+                                'keyword_start': match.keyword_start,
+                                'keyword_end': match.keyword_end
                             })
         
         return results
@@ -95,12 +97,14 @@ def process_excel(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
 def process_word(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
     """Process Word document and extract keyword matches."""
     try:
+        from docx import Document
+        
         doc = Document(io.BytesIO(file_content))
         results = []
         
         for para_num, paragraph in enumerate(doc.paragraphs, 1):
             if paragraph.text.strip():
-                matches = extract_sentences_from_text(paragraph.text, KEYWORDS)
+                matches = sentence_matches(paragraph.text, KEYWORDS)
                 
                 for match in matches:
                     results.append({
@@ -108,15 +112,48 @@ def process_word(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
                         'source_type': 'paragraph',
                         'source_name': f'Paragraph {para_num}',
                         'location': f'Paragraph {para_num}',
-                        'keyword': match['keyword'],
-                        'exact_sentence': match['sentence'],
-                        'partner': filename.split('.')[0]
+                        'keyword': match.keyword,
+                        'exact_sentence': paragraph.text[match.start:match.end],
+                        'partner': filename.split('.')[0],
+                        'sentence_start': match.start,
+                        'sentence_end': match.end,
+                        'keyword_start': match.keyword_start,
+                        'keyword_end': match.keyword_end
                     })
         
         return results
     except Exception as e:
         return [{'error': f'Error processing Word {filename}: {str(e)}'}]
 
+# Extension -> processor. Each processor imports its parsing library on first
+# use, so a cold start only pays for the formats its requests contain.
+PARSERS: Dict[str, Callable[[bytes, str], List[Dict[str, Any]]]] = {
+    '.pdf': process_pdf,
+    '.xlsx': process_excel,
+    '.docx': process_word,
+}
+
+# The library each processor imports, for preload_parsers()
+PARSER_MODULES = {
+    '.pdf': 'PyPDF2',
+    '.xlsx': 'openpyxl',
+    '.docx': 'docx',
+}
+
+def get_parser(filename: str) -> Optional[Callable[[bytes, str], List[Dict[str, Any]]]]:
+    """Return the processor for a file name, or None if its type is unsupported."""
+    return PARSERS.get(os.path.splitext(filename.lower())[1])
+
+def preload_parsers():
+    """Import every parsing library now rather than on first use."""
+    import importlib
+    
+    for module in PARSER_MODULES.values():
+        importlib.import_module(module)
+
+if PRELOAD_PARSERS:
+    preload_parsers()
+
 def handler(request):
     """Main handler function for Vercel."""
     if request.method != 'POST':
@@ -143,20 +180,14 @@ def handler(request):
             file_content = base64.b64decode(file_data['content'])
             
             # Process based on file extension
-            if filename.lower().endswith('.pdf'):
-                results = process_pdf(file_content, filename)
-            elif filename.lower().endswith('.xlsx'):
-                results = process_excel(file_content, filename)
-            elif filename.lower().endswith('.docx'):
-                results = process_word(file_content, filename)
+            parser = get_parser(filename)
+            if parser is not None:
+                results = parser(file_content, filename)
             else:
                 results = [{'error': f'Unsupported file type: {filename}'}]
             
             all_results.extend(results)
         
-        # Generate summary
-        summary_df = pd.DataFrame(all_results)
-        
         # Create summary statistics
         summary_stats = {
             'total_matches': len(all_results),
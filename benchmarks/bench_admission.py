@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark /analyze under a burst of concurrent large requests, with and without admission control.
+
+Fires --requests concurrent /analyze calls, each carrying one generated
+workbook, at the app in-process with parsing on the thread pool, so every
+byte lands in one process. Each setting runs in a fresh interpreter and
+reports how far its RSS grew during the burst, the wall time and status codes: "off" turns the byte
+budget and the parse limit off, a number sets the byte budget in MB with
+the default MAX_CONCURRENT_PARSES.
+
+Usage: python benchmarks/bench_admission.py [--requests N] [--rows N] [--budget-mb N ...] [--wait S]
+"""
+
+import argparse
+import asyncio
+import base64
+import collections
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+
+async def burst(payloads):
+    import httpx
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        responses = await asyncio.gather(*[client.post('/analyze', json=payload) for payload in payloads])
+    return collections.Counter(str(response.status_code) for response in responses)
+
+
+def run_setting(requests: int, rows: int):
+    """Child process: build the payloads, fire the burst and print the outcome as JSON."""
+    from benchmarks.corpus import generate_xlsx
+
+    payloads = [
+        {'files': [{'filename': f'partner_{number}.xlsx', 'content': base64.b64encode(generate_xlsx(rows, seed=number)).decode()}]}
+        for number in range(requests)
+    ]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    statuses = asyncio.run(burst(payloads))
+    print(json.dumps({
+        'seconds': time.perf_counter() - start,
+        'baseline_kb': baseline,
+        'peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'statuses': dict(sorted(statuses.items())),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=20000, help="rows in each request's workbook")
+    parser.add_argument('--budget-mb', nargs='+', default=['off', '2', '1'])
+    parser.add_argument('--wait', type=float, default=60, help='seconds a request may wait for room')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_setting(args.requests, args.rows)
+        return
+
+    print(f"{'budget (MB)':>12} {'RSS growth (MB)':>16} {'seconds':>9}  status codes")
+    for budget in args.budget_mb:
+        env = dict(
+            os.environ, PARSE_WORKERS='0', RESULT_CACHE_MB='0', UNIT_STORE_MB='0',
+            ADMISSION_WAIT_SECONDS=str(args.wait),
+            ADMISSION_MB='0' if budget == 'off' else budget,
+        )
+        if budget == 'off':
+            env['MAX_CONCURRENT_PARSES'] = '0'
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', '--requests', str(args.requests), '--rows', str(args.rows)],
+            cwd=ROOT, env=env, check=True, capture_output=True, text=True
+        ).stdout
+        report = json.loads(output.strip().splitlines()[-1])
+        print(f"{budget:>12} {(report['peak_kb'] - report['baseline_kb']) / 1024:>16.1f} "
+              f"{report['seconds']:>9.2f}  {report['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
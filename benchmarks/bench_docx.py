@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming Word engine against the original python-docx process_word.
+
+Generates a narrative document (default 50,000 paragraphs) and scans it once
+with each engine in its own subprocess so peak RSS can be compared. Only
+body paragraphs are compared; the streaming engine additionally reads
+tables, headers, footers and notes, which the generated document has none of.
+
+Usage: python benchmarks/bench_docx.py [--paragraphs N] [--keep PATH]
+"""
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def legacy_process_word(file_content: bytes, filename: str):
+    """The python-docx process_word used before the streaming engine."""
+    from docx import Document
+    from main import KEYWORDS, extract_sentences_from_text
+
+    doc = Document(io.BytesIO(file_content))
+    results = []
+    for para_num, paragraph in enumerate(doc.paragraphs, 1):
+        if paragraph.text.strip():
+            for match in extract_sentences_from_text(paragraph.text, KEYWORDS):
+                results.append({
+                    'file_path': filename,
+                    'source_type': 'paragraph',
+                    'source_name': f'Paragraph {para_num}',
+                    'location': f'Paragraph {para_num}',
+                    'keyword': match['keyword'],
+                    'exact_sentence': match['sentence'],
+                    'partner': filename.split('.')[0]
+                })
+    return results
+
+
+def run_engine(engine: str, path: str):
+    """Scan the document with one engine and print timing and peak RSS as JSON."""
+    with open(path, 'rb') as handle:
+        file_content = handle.read()
+
+    if engine == 'legacy':
+        process = legacy_process_word
+    else:
+        from main import process_word as process
+
+    start = time.perf_counter()
+    results = process(file_content, 'benchmark.docx')
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'engine': engine, 'seconds': elapsed, 'peak_rss_mb': peak_mb, 'matches': len(results)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--paragraphs', type=int, default=50000)
+    parser.add_argument('--keep', help='write the generated document here instead of a temp file')
+    parser.add_argument('--run', nargs=2, metavar=('ENGINE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_engine(*args.run)
+        return
+
+    from benchmarks.corpus import generate_docx
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.keep or os.path.join(directory, 'benchmark.docx')
+        print(f'Generating {args.paragraphs} paragraphs...')
+        with open(path, 'wb') as handle:
+            handle.write(generate_docx(args.paragraphs))
+        print(f'Document size: {os.path.getsize(path) / 1024 / 1024:.1f} MB')
+
+        print(f"{'engine':>10} {'seconds':>9} {'peak RSS (MB)':>14} {'matches':>9}")
+        reports = []
+        for engine in ('legacy', 'streaming'):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run', engine, path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            report = json.loads(output.strip().splitlines()[-1])
+            reports.append(report)
+            print(f"{engine:>10} {report['seconds']:>9.2f} {report['peak_rss_mb']:>14.1f} {report['matches']:>9}")
+
+        legacy, streaming = reports
+        assert legacy['matches'] == streaming['matches']
+        print(f"Speedup {legacy['seconds'] / streaming['seconds']:.1f}x, "
+              f"peak RSS {legacy['peak_rss_mb'] / streaming['peak_rss_mb']:.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark the read-only Excel engine against the original full-load process_excel.
+
+Generates a budget-style workbook (default 500,000 rows) whose label and
+narrative columns repeat, then scans it once with each engine in its own
+subprocess so peak RSS can be compared.
+
+Usage: python benchmarks/bench_excel.py [--rows N] [--keep PATH]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = [
+    'Personnel', 'Travel', 'Equipment', 'Supplies', 'Food and nutrition', 'Training',
+    'Key populations outreach', 'Gender programming', 'Monitoring', 'Indirect costs',
+]
+
+NARRATIVES = [
+    'Quarterly supervision visits to district facilities',
+    'Procurement of laboratory reagents and consumables',
+    'Community dialogues on gender norms and GBV prevention',
+    'Food baskets for households enrolled in the programme',
+    'Refresher training for clinical staff on equity in service delivery',
+    'Vehicle maintenance and fuel for outreach teams',
+    'Peer navigators supporting key populations at drop-in centres',
+    'Printing of data collection tools and registers',
+]
+
+
+def generate_workbook(path: str, rows: int, seed: int = 0):
+    """Write a workbook with repeating label and narrative strings."""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Budget')
+    sheet.append(['Line', 'Category', 'Narrative', 'Amount', 'Partner note'])
+    for line in range(1, rows + 1):
+        sheet.append([
+            line,
+            rng.choice(CATEGORIES),
+            rng.choice(NARRATIVES),
+            round(rng.uniform(100, 50000), 2),
+            f'Line {line} reviewed by finance' if line % 50 == 0 else None,
+        ])
+    workbook.save(path)
+
+
+def legacy_process_excel(file_content: bytes, filename: str):
+    """The full-load process_excel used before the read-only engine."""
+    from openpyxl import load_workbook
+    from main import KEYWORDS, extract_sentences_from_text
+
+    workbook = load_workbook(io.BytesIO(file_content))
+    results = []
+    for sheet_name in workbook.sheetnames:
+        sheet = workbook[sheet_name]
+        for row_num, row in enumerate(sheet.iter_rows(values_only=True), 1):
+            for col_num, cell_value in enumerate(row, 1):
+                if cell_value and isinstance(cell_value, str):
+                    for match in extract_sentences_from_text(cell_value, KEYWORDS):
+                        results.append({
+                            'file_path': filename,
+                            'source_type': 'worksheet',
+                            'source_name': sheet_name,
+                            'location': f'Row {row_num}, Column {col_num}',
+                            'keyword': match['keyword'],
+                            'exact_sentence': match['sentence'],
+                            'partner': filename.split('.')[0]
+                        })
+    return results
+
+
+def run_engine(engine: str, path: str):
+    """Scan the workbook with one engine and print timing and peak RSS as JSON."""
+    with open(path, 'rb') as handle:
+        file_content = handle.read()
+
+    if engine == 'legacy':
+        process = legacy_process_excel
+    else:
+        from main import process_excel as process
+
+    start = time.perf_counter()
+    results = process(file_content, 'benchmark.xlsx')
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'engine': engine, 'seconds': elapsed, 'peak_rss_mb': peak_mb, 'matches': len(results)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--keep', help='write the generated workbook here instead of a temp file')
+    parser.add_argument('--run', nargs=2, metavar=('ENGINE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_engine(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.keep or os.path.join(directory, 'benchmark.xlsx')
+        print(f'Generating {args.rows} rows...')
+        generate_workbook(path, args.rows)
+        print(f'Workbook size: {os.path.getsize(path) / 1024 / 1024:.1f} MB')
+
+        print(f"{'engine':>10} {'seconds':>9} {'peak RSS (MB)':>14} {'matches':>9}")
+        reports = []
+        for engine in ('legacy', 'streaming'):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run', engine, path],
+                check=True, capture_output=True, text=True
+            ).stdout
+            report = json.loads(output.strip().splitlines()[-1])
+            reports.append(report)
+            print(f"{engine:>10} {report['seconds']:>9.2f} {report['peak_rss_mb']:>14.1f} {report['matches']:>9}")
+
+        legacy, streaming = reports
+        assert legacy['matches'] == streaming['matches']
+        print(f"Speedup {legacy['seconds'] / streaming['seconds']:.1f}x, "
+              f"peak RSS {legacy['peak_rss_mb'] / streaming['peak_rss_mb']:.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
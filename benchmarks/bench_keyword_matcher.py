@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled keyword matcher against the original nested keyword loop.
+
+Also reports the peak traced memory of matching one large page: the legacy
+loop and extract_sentences copy every sentence out of the page, iter_matches
+yields offsets into it.
+
+Usage: python benchmarks/bench_keyword_matcher.py [--pages N] [--sentences N] [--repeat N] [--large-sentences N]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import KEYWORDS
+from keyword_matcher import get_matcher
+
+FILLER = (
+    'the', 'programme', 'budget', 'partner', 'district', 'clinic', 'quarterly',
+    'report', 'training', 'staff', 'outreach', 'community', 'services', 'target',
+    'indicator', 'health', 'facility', 'support', 'annual', 'review'
+)
+
+
+def legacy_extract(text, keywords):
+    """The nested loop extract_sentences_from_text used before the compiled matcher."""
+    sentences = re.split(r'[.!?]+', text)
+    matches = []
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if len(sentence) < 10:
+            continue
+        for keyword in keywords:
+            if keyword.lower() in sentence.lower():
+                matches.append({'keyword': keyword, 'sentence': sentence, 'exact_sentence': sentence})
+                break
+    return matches
+
+
+def make_text(sentences: int, keyword_rate: float, seed: int = 0) -> str:
+    """Build deterministic page-like text where keyword_rate of sentences hit a keyword."""
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(sentences):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(8, 20))]
+        if rng.random() < keyword_rate:
+            words.insert(rng.randrange(len(words)), rng.choice(KEYWORDS).strip())
+        parts.append(' '.join(words).capitalize() + '.')
+    return ' '.join(parts)
+
+
+def timeit(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(func) -> int:
+    """Peak bytes traced while func runs, including what it returns."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--sentences', type=int, default=40, help='sentences per page')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--large-sentences', type=int, default=50000, help='sentences on the large page')
+    args = parser.parse_args()
+
+    matcher = get_matcher(KEYWORDS)
+
+    print(f"{'keyword rate':>12} {'legacy (s)':>11} {'compiled (s)':>13} {'speedup':>8}")
+    for rate in (0.01, 0.1, 0.5):
+        pages = [make_text(args.sentences, rate, seed) for seed in range(args.pages)]
+        for text in pages:
+            assert legacy_extract(text, KEYWORDS) == matcher.extract_sentences(text, min_length=10)
+
+        legacy = timeit(lambda: [legacy_extract(text, KEYWORDS) for text in pages], args.repeat)
+        compiled = timeit(lambda: [matcher.extract_sentences(text, min_length=10) for text in pages], args.repeat)
+        print(f"{rate:>12.2f} {legacy:>11.4f} {compiled:>13.4f} {legacy / compiled:>7.1f}x")
+
+    text = make_text(args.large_sentences, 0.5, seed=1)
+    variants = [
+        ('legacy loop', lambda: legacy_extract(text, KEYWORDS)),
+        ('extract_sentences', lambda: matcher.extract_sentences(text, min_length=10)),
+        ('iter_matches (list)', lambda: list(matcher.iter_matches(text, min_length=10))),
+        ('iter_matches (stream)', lambda: sum(1 for _ in matcher.iter_matches(text, min_length=10))),
+    ]
+    print(f"\nLarge page: {len(text) / 1e6:.1f}M characters, {args.large_sentences} sentences")
+    print(f"{'variant':>22} {'peak (MB)':>10} {'seconds':>9}")
+    for name, func in variants:
+        peak = peak_memory(func)
+        seconds = timeit(func, args.repeat)
+        print(f"{name:>22} {peak / 1e6:>10.2f} {seconds:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
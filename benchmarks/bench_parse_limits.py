@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark request latency when one pathological file shares the parse pool, with and without parse limits.
+
+Fires --requests concurrent /analyze calls of one small generated file
+each, plus one call carrying a compression bomb: a workbook of about
+100 KB that expands to --bomb-rows rows of text and keeps a worker
+busy for a long time. Runs once with the time limit off and once at
+--timeout seconds on a pool of --workers workers, and reports latency
+percentiles of the ordinary requests, the bomb request's latency and
+the error entry it got.
+
+Usage: python benchmarks/bench_parse_limits.py [--requests N] [--workers N] [--bomb-rows N] [--timeout S]
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import os
+import sys
+import time
+import zipfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from benchmarks.corpus import generate_docx
+from worker_pool import IsolatedPool
+
+BOMB_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Narrative" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+BOMB_ROW = '<row><c t="inlineStr"><is><t>Quarterly outreach report for the district clinic</t></is></c></row>'
+
+
+def make_bomb(rows: int) -> bytes:
+    """A workbook whose one sheet repeats the same row, so it compresses several hundred times over."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in BOMB_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            chunk = BOMB_ROW.encode() * 1000
+            for _ in range(rows // 1000):
+                sheet.write(chunk)
+            sheet.write(b'</sheetData></worksheet>')
+    return buffer.getvalue()
+
+
+async def fire(payloads):
+    """Post every payload at once; return (latency, response body) per payload."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        async def timed_post(payload):
+            start = time.perf_counter()
+            response = await client.post('/analyze', json=payload)
+            return time.perf_counter() - start, response.json()
+        return await asyncio.gather(*[timed_post(payload) for payload in payloads])
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def encode(filename, content):
+    return {'files': [{'filename': filename, 'content': base64.b64encode(content).decode()}]}
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--bomb-rows', type=int, default=300000)
+    parser.add_argument('--timeout', type=float, default=2)
+    args = parser.parse_args()
+
+    main.UNIT_STORE_MB = 0
+    main.result_cache = main.ResultCache(0)
+    bomb = make_bomb(args.bomb_rows)
+    print(f'Bomb: {len(bomb) / 1e3:.0f} KB compressed, {args.bomb_rows} rows')
+    payloads = [encode('bomb.xlsx', bomb)] + [
+        encode(f'partner_{number}.docx', generate_docx(200, seed=number)) for number in range(args.requests)
+    ]
+
+    print(f"{'time limit':>10} {'p50 (s)':>8} {'p99 (s)':>8} {'bomb (s)':>9}  bomb result")
+    for timeout in (0, args.timeout):
+        main._executor = IsolatedPool(args.workers, timeout, 0)
+        try:
+            responses = asyncio.run(fire(payloads))
+        finally:
+            main._executor.shutdown()
+        (bomb_seconds, bomb_body), ordinary = responses[0], [seconds for seconds, _ in responses[1:]]
+        bomb_result = next((result['error'] for result in bomb_body['results'] if 'error' in result),
+                           f"{bomb_body['total_matches']} matches")
+        label = f'{timeout:g} s' if timeout else 'off'
+        print(f'{label:>10} {percentile(ordinary, 0.5):>8.2f} {percentile(ordinary, 0.99):>8.2f} '
+              f'{bomb_seconds:>9.2f}  {bomb_result}')
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Compare the PDF text-extraction backends on speed and on parity with PyPDF2.
+
+Extracts every page of every PDF in --corpus (or of generated reports when
+no corpus is given) with each installed backend. Reports pages per second,
+the similarity of the page text to PyPDF2's (difflib ratio, whitespace
+normalized), and how many of PyPDF2's keyword matches the backend also
+finds (same page and keyword) along with the matches only it finds.
+Pages a backend fails on are counted as errors instead of aborting the run.
+
+Usage: python benchmarks/bench_pdf_backends.py [--corpus DIR] [--pages N] [--files N] [--repeat N]
+"""
+
+import argparse
+import difflib
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from benchmarks.corpus import generate_pdf
+from pdf_backends import BACKENDS, available_backends
+
+BASELINE = 'pypdf2'
+
+
+def load_corpus(directory: str):
+    corpus = {}
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith('.pdf'):
+            with open(os.path.join(directory, name), 'rb') as handle:
+                corpus[name] = handle.read()
+    return corpus
+
+
+def extract(name: str, content: bytes):
+    """Text of every page, or None for pages the backend failed on; None for the file if it cannot open it."""
+    try:
+        backend = BACKENDS[name](content)
+    except Exception:
+        return None
+    pages = []
+    try:
+        for index in range(len(backend)):
+            try:
+                pages.append(backend.page_text(index))
+            except Exception:
+                pages.append(None)
+    finally:
+        backend.close()
+    return pages
+
+
+def best_of(func, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def normalize(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def page_matches(extracted):
+    """(file, page, keyword) of every match, counted, the way the PDF processor finds them."""
+    found = Counter()
+    for filename, pages in extracted.items():
+        for page_num, text in enumerate(pages or [], 1):
+            for match in main.sentence_matches(text or '', main.KEYWORDS):
+                found[(filename, page_num, match.keyword)] += 1
+    return found
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help='directory of PDFs; generated reports are used when omitted')
+    parser.add_argument('--pages', type=int, default=50, help='pages per generated report')
+    parser.add_argument('--files', type=int, default=4, help='generated reports')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = {f'report_{seed}.pdf': generate_pdf(args.pages, seed=seed) for seed in range(args.files)}
+    print(f'{len(corpus)} PDFs, {sum(map(len, corpus.values())) / 1e6:.1f} MB; '
+          f'backends installed: {", ".join(available_backends())}')
+
+    extracted = {}
+    print(f"{'backend':>10} {'pages':>7} {'errors':>7} {'seconds':>8} {'pages/s':>9}")
+    for name in available_backends():
+        seconds, extracted[name] = best_of(
+            lambda: {filename: extract(name, content) for filename, content in corpus.items()}, args.repeat
+        )
+        pages = sum(len(file_pages) for file_pages in extracted[name].values() if file_pages is not None)
+        errors = sum(
+            file_pages is None or sum(text is None for text in file_pages)
+            for file_pages in extracted[name].values()
+        )
+        print(f'{name:>10} {pages:>7} {errors:>7} {seconds:>8.3f} {pages / seconds:>9.1f}')
+
+    if BASELINE not in extracted:
+        return
+    baseline = extracted[BASELINE]
+    baseline_matches = page_matches(baseline)
+    print(f"\nParity with {BASELINE} ({sum(baseline_matches.values())} keyword matches)")
+    print(f"{'backend':>10} {'text similarity':>16} {'matches found':>14} {'extra matches':>14}")
+    for name, files in extracted.items():
+        if name == BASELINE:
+            continue
+        ratios = []
+        for filename, expected_pages in baseline.items():
+            pages = files.get(filename) or []
+            for index, expected in enumerate(expected_pages or []):
+                expected = normalize(expected or '')
+                text = normalize(pages[index] or '') if index < len(pages) else ''
+                ratios.append(1.0 if text == expected else difflib.SequenceMatcher(None, expected, text).ratio())
+        matches = page_matches(files)
+        found = sum((baseline_matches & matches).values())
+        extra = sum((matches - baseline_matches).values())
+        similarity = sum(ratios) / len(ratios) if ratios else 0.0
+        print(f'{name:>10} {similarity:>16.3f} {found:>7}/{sum(baseline_matches.values()):<6} {extra:>14}')
+
+
+if __name__ == "__main__":
+    run()
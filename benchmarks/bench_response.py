@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark the columnar /analyze response format against the list-of-dicts format.
+
+Builds a synthetic result list shaped like a broad-keyword batch (default
+200,000 matches over PDFs, workbooks and Word documents) and reports the
+serialized size and the best-of-N time to build the body, the way
+json_response does for ?format=records and ?format=columnar.
+
+Usage: python benchmarks/bench_response.py [--matches N] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import columnar
+from columnar import decode_results, encode_results
+from main import KEYWORDS
+
+
+def make_results(count: int, seed: int = 0):
+    """Matches spread over 30 files, with page, cell and paragraph locations."""
+    rng = random.Random(seed)
+    results = []
+    files = [f'partner_{number:02d}.{rng.choice(["pdf", "xlsx", "docx"])}' for number in range(30)]
+    while len(results) < count:
+        filename = rng.choice(files)
+        keyword = rng.choice(KEYWORDS)
+        if filename.endswith('.pdf'):
+            page = rng.randint(1, 500)
+            source_type, source_name, location = 'page', f'Page {page}', f'Page {page}'
+        elif filename.endswith('.xlsx'):
+            source_type, source_name = 'worksheet', rng.choice(['Budget', 'Targets', 'Sheet1'])
+            location = f'Row {rng.randint(1, 50000)}, Column {rng.randint(1, 20)}'
+        else:
+            source_type = 'paragraph'
+            source_name = location = f'Paragraph {rng.randint(1, 5000)}'
+        sentence_start = rng.randint(0, 2000)
+        sentence = f'The district {keyword} programme reached {rng.randint(10, 999)} clients this quarter'
+        results.append({
+            'file_path': filename,
+            'source_type': source_type,
+            'source_name': source_name,
+            'location': location,
+            'keyword': keyword,
+            'exact_sentence': sentence,
+            'partner': filename.split('.')[0],
+            'sentence_start': sentence_start,
+            'sentence_end': sentence_start + len(sentence),
+            'keyword_start': sentence_start + 13,
+            'keyword_end': sentence_start + 13 + len(keyword)
+        })
+    return results
+
+
+def records_body(content):
+    """The list-of-dicts body, serialized like json_response."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode('utf-8')
+
+
+def columnar_body(content, dumps):
+    return dumps(dict(content, format='columnar', results=encode_results(content['results'])))
+
+
+def best_of(func, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func()
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+
+def json_dumps(content):
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--matches', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = make_results(args.matches)
+    content = {'total_matches': len(results), 'files_processed': 30, 'keywords_found': len(KEYWORDS), 'results': results}
+
+    variants = [('records (json)', lambda: records_body(content))]
+    variants.append(('columnar (json)', lambda: columnar_body(content, json_dumps)))
+    if columnar.orjson is not None:
+        variants.append(('columnar (orjson)', lambda: columnar_body(content, columnar.dumps)))
+
+    print(f"{'format':>18} {'size (MB)':>10} {'seconds':>9}")
+    reports = []
+    for name, func in variants:
+        seconds, body = best_of(func, args.repeat)
+        reports.append((seconds, len(body)))
+        print(f'{name:>18} {len(body) / 1e6:>10.2f} {seconds:>9.3f}')
+
+    assert decode_results(json.loads(body)['results']) == results
+    (records_seconds, records_size), (seconds, size) = reports[0], reports[-1]
+    print(f'Payload {records_size / size:.1f}x smaller, serialization {records_seconds / seconds:.1f}x faster')
+
+
+if __name__ == "__main__":
+    main()
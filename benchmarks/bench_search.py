@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark searching the sentence index against re-parsing the documents.
+
+Generates a PDF/XLSX/DOCX corpus, ingests it into a temporary sentence
+index the way POST /index does, then runs keyword lists through
+SentenceIndex.search and through process_file on every document, and
+checks that both return the same matches. Reports ingestion time, index
+size and best-of-N search and re-parse times per keyword list.
+
+Usage: python benchmarks/bench_search.py [--copies N] [--density F] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from benchmarks.corpus import generate_corpus
+from sentence_index import SentenceIndex
+
+KEYWORD_LISTS = {
+    'default': main.KEYWORDS,
+    'one new term': ['workplan'],
+    'rare terms': ['abortion', 'hormone'],
+    'short term': ['tg'],
+}
+
+
+def best_of(func, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--copies', type=int, default=5, help='copies of the small corpus to ingest')
+    parser.add_argument('--density', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = {}
+    for copy in range(args.copies):
+        generated = generate_corpus(20, 5000, 500, args.density, seed=copy)
+        corpus.update({f'{copy:03d}_{name}': content for name, content in generated.items()})
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = SentenceIndex(directory)
+        start = time.perf_counter()
+        sentences = sum(
+            main.index_file(index, content, filename, main.hash_content(content)) for filename, content in corpus.items()
+        )
+        ingest = time.perf_counter() - start
+        print(f'Ingested {len(corpus)} documents, {sentences} sentences in {ingest:.2f}s '
+              f'({index.stats()["bytes"] / 1e6:.1f} MB index)')
+
+        print(f"{'keywords':>14} {'matches':>8} {'search (ms)':>12} {'re-parse (ms)':>14} {'speedup':>8}")
+        for name, keywords in KEYWORD_LISTS.items():
+            search, (found, _) = best_of(lambda: index.search(keywords), args.repeat)
+            parse, parsed = best_of(
+                lambda: [result for filename, content in corpus.items() for result in main.process_file(content, filename, keywords)],
+                1
+            )
+            assert found == parsed, name
+            print(f'{name:>14} {len(found):>8} {search * 1000:>12.1f} {parse * 1000:>14.1f} {parse / search:>7.0f}x')
+
+
+if __name__ == "__main__":
+    run()
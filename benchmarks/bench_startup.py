@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold-start cost: import time per module and first-request latency of the serverless handler.
+
+Each measurement runs in a fresh interpreter. Import times come from
+`python -X importtime` (cumulative microseconds, median of --repeat runs)
+for the entry points and every parsing library. Cold starts time a new
+process that imports analyze and handles one PDF-only request, with lazy
+parser loading, with PRELOAD_PARSERS=1, and with the parsers plus pandas
+preloaded the way analyze.py used to at module load. Results can be saved
+as a baseline JSON and later runs compared against it.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat N] [--save baseline.json] [--compare baseline.json]
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+MODULES = ['analyze', 'main', 'PyPDF2', 'openpyxl', 'docx', 'pandas', 'fastapi']
+
+COLD_START = '''
+import base64, json, sys, types
+{preload}
+import analyze
+request = types.SimpleNamespace(method='POST', body=sys.stdin.read())
+response = analyze.handler(request)
+assert response['statusCode'] == 200, response
+print(json.dumps(sorted(name for name in ('PyPDF2', 'openpyxl', 'docx', 'pandas') if name in sys.modules)))
+'''
+
+SCENARIOS = {
+    'lazy': ('', {}),
+    'preload': ('', {'PRELOAD_PARSERS': '1'}),
+    'preload+pandas': ('import pandas', {'PRELOAD_PARSERS': '1'}),
+}
+
+
+def import_time(module: str) -> int:
+    """Cumulative import time of a module in microseconds, in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    ).stderr
+    for line in output.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f'{module} not found in -X importtime output')
+
+
+def cold_start(preload: str, env: dict, body: str):
+    """Wall time of a fresh process that handles one request, and the parsing libraries it loaded."""
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', COLD_START.format(preload=preload)],
+        cwd=ROOT, env=dict(os.environ, **env), input=body, check=True, capture_output=True, text=True
+    ).stdout
+    return time.perf_counter() - start, json.loads(output.strip().splitlines()[-1])
+
+
+def format_ms(value) -> str:
+    return f'{value * 1000:>9.1f}' if value is not None else f"{'-':>9}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help='write results as a baseline JSON file')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='exit non-zero when an import or cold start is this much slower than the baseline')
+    args = parser.parse_args()
+
+    from benchmarks.corpus import make_pdf
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)['seconds']
+
+    seconds = {}
+    print(f"{'import':>28} {'ms':>9} {'baseline':>9}")
+    for module in MODULES:
+        try:
+            seconds[f'import {module}'] = statistics.median(import_time(module) for _ in range(args.repeat)) / 1e6
+        except (subprocess.CalledProcessError, RuntimeError):
+            print(f'{module:>28} {"not installed":>9}')
+            continue
+        previous = baseline.get(f'import {module}') if baseline else None
+        print(f"{module:>28} {format_ms(seconds[f'import {module}'])} {format_ms(previous)}")
+
+    body = json.dumps({'files': [
+        {'filename': 'report.pdf', 'content': base64.b64encode(make_pdf(['Gender equity report'] * 3)).decode()}
+    ]})
+    print(f"\n{'cold start (PDF request)':>28} {'ms':>9} {'baseline':>9}  libraries loaded")
+    for name, (preload, env) in SCENARIOS.items():
+        try:
+            runs = [cold_start(preload, env, body) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError:
+            print(f'{name:>28} {"not installed":>9}')
+            continue
+        seconds[f'cold start {name}'] = statistics.median(elapsed for elapsed, _ in runs)
+        previous = baseline.get(f'cold start {name}') if baseline else None
+        print(f"{name:>28} {format_ms(seconds[f'cold start {name}'])} {format_ms(previous)}  {', '.join(runs[0][1])}")
+
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'seconds': seconds,
+            }, handle, indent=2)
+
+    if baseline:
+        regressions = [
+            name for name, value in seconds.items()
+            if name in baseline and value > baseline[name] * (1 + args.tolerance)
+        ]
+        if regressions:
+            print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
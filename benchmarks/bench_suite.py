@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite over a generated PDF/XLSX/DOCX corpus.
+
+Times extract_sentences_from_text, each process_* function and the /analyze
+endpoint (in-process through the FastAPI test client), reporting MB/s,
+pages/s for PDFs and peak traced memory per stage. For /analyze the memory
+figure covers the server process only, not the parsing workers. Results can
+be saved as a baseline JSON and later runs compared against it.
+
+Usage:
+    python benchmarks/bench_suite.py [--scale small|medium|large] [--density F]
+                                     [--save baseline.json] [--compare baseline.json]
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generate_corpus, write_corpus
+
+SCALES = {
+    'small': {'pdf_pages': 20, 'xlsx_rows': 5000, 'docx_paragraphs': 500},
+    'medium': {'pdf_pages': 200, 'xlsx_rows': 50000, 'docx_paragraphs': 5000},
+    'large': {'pdf_pages': 800, 'xlsx_rows': 500000, 'docx_paragraphs': 20000},
+}
+
+
+def measure(func, repeat: int):
+    """Best wall time over `repeat` runs, then one traced run for peak Python memory."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_suite(corpus, repeat: int):
+    import main
+    from fastapi.testclient import TestClient
+    from PyPDF2 import PdfReader
+
+    # Measure the parsers themselves, not the result cache
+    main.result_cache = main.ResultCache(0)
+    pdf_name = next(name for name in corpus if name.endswith('.pdf'))
+    pdf_pages = len(PdfReader(main.open_stream(corpus[pdf_name])).pages)
+    text = '\n'.join(page.extract_text() for page in PdfReader(main.open_stream(corpus[pdf_name])).pages)
+    text_bytes = len(text.encode('utf-8'))
+
+    stages = {}
+
+    def record(stage, func, size, pages=None):
+        seconds, peak = measure(func, repeat)
+        stages[stage] = {
+            'seconds': seconds,
+            'mb_per_s': size / seconds / 1e6,
+            'pages_per_s': pages / seconds if pages else None,
+            'peak_mb': peak / 1e6,
+        }
+
+    record('extract_sentences_from_text', lambda: main.extract_sentences_from_text(text, main.KEYWORDS), text_bytes)
+    for name, content in corpus.items():
+        processor = main.PROCESSORS[main.file_kind(name)]
+        stage = f'{processor.__name__} ({name})'
+        record(stage, lambda: processor(content, name), len(content), pdf_pages if name == pdf_name else None)
+
+    payload = {'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name, content in corpus.items()
+    ]}
+    total_bytes = sum(len(content) for content in corpus.values())
+    with TestClient(main.app) as client:
+        def analyze():
+            response = client.post('/analyze', json=payload)
+            response.raise_for_status()
+        record('/analyze end to end', analyze, total_bytes, pdf_pages)
+
+    return stages
+
+
+def print_report(stages, baseline=None):
+    header = f"{'stage':<42} {'seconds':>9} {'MB/s':>8} {'pages/s':>9} {'peak MB':>8}"
+    if baseline:
+        header += f" {'vs baseline':>12}"
+    print(header)
+
+    for stage, report in stages.items():
+        pages = f"{report['pages_per_s']:.1f}" if report['pages_per_s'] else '-'
+        line = f"{stage:<42} {report['seconds']:>9.3f} {report['mb_per_s']:>8.2f} {pages:>9} {report['peak_mb']:>8.1f}"
+        if baseline and stage in baseline:
+            change = report['seconds'] / baseline[stage]['seconds'] - 1
+            line += f" {change:>+11.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--density', type=float, default=0.1, help='fraction of sentences containing a keyword')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--corpus-dir', help='also write the generated corpus to this directory')
+    parser.add_argument('--save', help='write results as a baseline JSON file')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='exit non-zero when a stage is this much slower than the baseline')
+    args = parser.parse_args()
+
+    corpus = generate_corpus(keyword_density=args.density, seed=args.seed, **SCALES[args.scale])
+    if args.corpus_dir:
+        write_corpus(args.corpus_dir, corpus)
+
+    stages = run_suite(corpus, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)['stages']
+    print_report(stages, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump({
+                'scale': args.scale,
+                'density': args.density,
+                'seed': args.seed,
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'stages': stages,
+            }, handle, indent=2)
+
+    if baseline:
+        regressions = [
+            stage for stage, report in stages.items()
+            if stage in baseline and report['seconds'] > baseline[stage]['seconds'] * (1 + args.tolerance)
+        ]
+        if regressions:
+            print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
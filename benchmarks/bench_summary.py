@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark ?format=summary against the records response as the number of matches grows.
+
+Generates Word documents where every sentence holds a keyword and, for
+each size, builds the response body both ways the way a worker and
+/analyze do: process_file() plus summarize_results() for records, and
+summarize_file() plus summary_response() for the summary. Reports the
+peak traced memory of building each body, its size and the time taken;
+the summary's peak stays flat while the records peak grows with the
+matches.
+
+Usage: python benchmarks/bench_summary.py [--paragraphs N ...] [--top N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from benchmarks.corpus import generate_docx
+
+KEYWORD_SET = {'name': 'default', 'version': 0, 'keywords': main.KEYWORDS}
+
+
+def records_body(content, filename):
+    results = main.process_file(content, filename, main.KEYWORDS)
+    return json.dumps(main.summarize_results(results, 1, KEYWORD_SET)).encode('utf-8')
+
+
+def summary_body(content, filename, top_n):
+    summary = main.summarize_file(content, filename, main.KEYWORDS, top_n)
+    return json.dumps(main.summary_response([filename], [summary], KEYWORD_SET, top_n)).encode('utf-8')
+
+
+def measure(func):
+    """(peak traced bytes, seconds, body) of one call."""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        body = func()
+        seconds = time.perf_counter() - start
+        return tracemalloc.get_traced_memory()[1], seconds, body
+    finally:
+        tracemalloc.stop()
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--paragraphs', type=int, nargs='+', default=[1000, 4000, 16000])
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'matches':>8} {'format':>8} {'peak (MB)':>10} {'body (KB)':>10} {'seconds':>8}")
+    for paragraphs in args.paragraphs:
+        content = generate_docx(paragraphs, keyword_density=1.0, seed=paragraphs)
+        filename = f'partner_{paragraphs}.docx'
+        records = measure(lambda: records_body(content, filename))
+        summary = measure(lambda: summary_body(content, filename, args.top))
+        matches = json.loads(summary[2])['total_matches']
+        assert matches == json.loads(records[2])['total_matches']
+        for name, (peak, seconds, body) in (('records', records), ('summary', summary)):
+            print(f'{matches:>8} {name:>8} {peak / 1e6:>10.1f} {len(body) / 1e3:>10.1f} {seconds:>8.2f}')
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,126 @@
+"""
+Deterministic synthetic corpus of partner documents for benchmarks and tests.
+
+Every generator takes a seed, so the same arguments always produce the same
+bytes. keyword_density is the fraction of sentences (or cells) that contain
+one of the main.KEYWORDS terms.
+"""
+
+import io
+import os
+import random
+import textwrap
+from typing import Dict, List, Optional
+
+FILLER = (
+    'the', 'programme', 'budget', 'partner', 'district', 'clinic', 'quarterly',
+    'report', 'training', 'staff', 'outreach', 'community', 'services', 'target',
+    'indicator', 'health', 'facility', 'support', 'annual', 'review', 'supervision',
+    'procurement', 'laboratory', 'reporting', 'period', 'results', 'workplan'
+)
+
+# Terms from main.KEYWORDS, stripped of the padding some keyword lists use
+TERMS = (
+    'gender', 'transgender', 'lgbtq', 'diversity', 'equity', 'inclusion', 'gbv',
+    'disparity', 'pregnant people', 'identity', 'non-binary', 'pronouns', 'race',
+    'stereotype', 'key populations', 'hormone', 'dreams', 'abortion', 'fsw', 'food'
+)
+
+
+def make_sentence(rng: random.Random, keyword_density: float) -> str:
+    words = [rng.choice(FILLER) for _ in range(rng.randint(8, 18))]
+    if rng.random() < keyword_density:
+        words.insert(rng.randrange(len(words)), rng.choice(TERMS))
+    return ' '.join(words).capitalize() + '.'
+
+
+def make_paragraph(rng: random.Random, keyword_density: float, sentences: int) -> str:
+    return ' '.join(make_sentence(rng, keyword_density) for _ in range(sentences))
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """Build a minimal PDF with the given text on each page, wrapped to 90 columns."""
+    objects: List[Optional[bytes]] = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    page_refs = []
+    for text in pages:
+        lines = []
+        for line in textwrap.wrap(text, 90) or ['']:
+            escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            lines.append(f'({escaped}) Tj')
+        stream = ('BT /F1 10 Tf 14 TL 50 750 Td ' + ' T* '.join(lines) + ' ET').encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects))
+        page_refs.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(page_refs), len(page_refs))
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b'%010d 00000 n \n' % offset)
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def generate_pdf(pages: int, keyword_density: float = 0.1, seed: int = 0) -> bytes:
+    """A report of `pages` pages with about 30 sentences each."""
+    rng = random.Random(seed)
+    return make_pdf([make_paragraph(rng, keyword_density, 30) for _ in range(pages)])
+
+
+def generate_xlsx(rows: int, keyword_density: float = 0.1, seed: int = 0) -> bytes:
+    """A budget workbook with repeating category labels and free-text narrative cells."""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    categories = ['Personnel', 'Travel', 'Equipment', 'Supplies', 'Training', 'Monitoring', 'Indirect costs']
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Budget')
+    sheet.append(['Line', 'Category', 'Narrative', 'Amount'])
+    for line in range(1, rows + 1):
+        sheet.append([line, rng.choice(categories), make_sentence(rng, keyword_density), round(rng.uniform(100, 50000), 2)])
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_docx(paragraphs: int, keyword_density: float = 0.1, seed: int = 0) -> bytes:
+    """A narrative document of `paragraphs` paragraphs with about 5 sentences each."""
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    for _ in range(paragraphs):
+        doc.add_paragraph(make_paragraph(rng, keyword_density, 5))
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_corpus(pdf_pages: int, xlsx_rows: int, docx_paragraphs: int,
+                    keyword_density: float = 0.1, seed: int = 0) -> Dict[str, bytes]:
+    """One document of each format, keyed by file name."""
+    return {
+        'partner_report.pdf': generate_pdf(pdf_pages, keyword_density, seed),
+        'partner_budget.xlsx': generate_xlsx(xlsx_rows, keyword_density, seed),
+        'partner_narrative.docx': generate_docx(docx_paragraphs, keyword_density, seed),
+    }
+
+
+def write_corpus(directory: str, corpus: Dict[str, bytes]):
+    os.makedirs(directory, exist_ok=True)
+    for filename, content in corpus.items():
+        with open(os.path.join(directory, filename), 'wb') as handle:
+            handle.write(content)
@@ -0,0 +1,143 @@
+"""
+Columnar encoding of /analyze results (?format=columnar).
+
+A list of match dicts repeats file_path, partner, source_type and the rest
+on every row. The columnar form stores each field as one array per column:
+repeated strings are dictionary-encoded (a "values" list plus an integer
+"indices" array), and locations become a small set of templates such as
+"Row {}, Column {}" plus the integers that fill them in. Sentence and
+keyword offsets are plain integer arrays. decode_results() turns it back into the list of dicts.
+"""
+
+import json
+import re
+import string
+from operator import itemgetter
+from typing import List, Dict, Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Columns stored as dictionary indexes
+DICTIONARY_COLUMNS = ('file_path', 'partner', 'source_type', 'source_name', 'keyword')
+# Columns stored as template indexes plus the numbers in them
+TEMPLATE_COLUMNS = ('location',)
+# Columns stored as they are, one integer per match
+SPAN_COLUMNS = ('sentence_start', 'sentence_end', 'keyword_start', 'keyword_end')
+
+DIGITS = re.compile(r'\d+')
+DIGIT_RUNS = re.compile(r'(\d+)')
+FORMATTER = string.Formatter()
+
+
+def split_template(text: str):
+    """('Row {}, Column {}', [3, 7]) for 'Row 3, Column 7'.
+
+    Braces are escaped for str.format, and digit runs that would not
+    survive a round trip through int (leading zeros, runs too long to be
+    exact as a JSON number in every client) are kept as text.
+    """
+    parts = []
+    numbers = []
+    last = 0
+    for match in DIGITS.finditer(text):
+        digits = match.group()
+        if (digits[0] == '0' and len(digits) > 1) or len(digits) > 15:
+            continue
+        parts.append(text[last:match.start()].replace('{', '{{').replace('}', '}}'))
+        parts.append('{}')
+        numbers.append(int(digits))
+        last = match.end()
+    parts.append(text[last:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts), numbers
+
+
+def encode_dictionary(values: List[str]) -> Dict[str, Any]:
+    positions = {value: position for position, value in enumerate(dict.fromkeys(values))}
+    return {'values': list(positions), 'indices': list(map(positions.__getitem__, values))}
+
+
+def encode_templates(values: List[str]) -> Dict[str, Any]:
+    joined = '\n'.join(values)
+    if '{' not in joined and '}' not in joined and joined.count('\n') == len(values) - 1:
+        # The common case: one regex pass over the whole column instead of one per value
+        pieces = DIGIT_RUNS.split(joined)
+        digits = pieces[1::2]
+        numbers = list(map(int, digits))
+        runs = '\n' + '\n'.join(digits)
+        if '\n0' not in runs or '\n'.join(map(str, numbers)) == runs[1:]:
+            if not numbers or max(numbers) < 10 ** 15:
+                encoded = encode_dictionary('{}'.join(pieces[0::2]).split('\n') if values else [])
+                return {'templates': encoded['values'], 'indices': encoded['indices'], 'numbers': numbers}
+
+    # Values repeat (every match on 'Page 12' has the same location), so split each once
+    templates: Dict[str, int] = {}
+    split = {}
+    for value in dict.fromkeys(values):
+        template, numbers = split_template(value)
+        split[value] = (templates.setdefault(template, len(templates)), numbers)
+    return {
+        'templates': list(templates),
+        'indices': [split[value][0] for value in values],
+        'numbers': [number for value in values for number in split[value][1]]
+    }
+
+
+def encode_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Columnar form of a result list; error entries are listed separately under "errors"."""
+    matches = [result for result in results if 'error' not in result]
+    encoded: Dict[str, Any] = {'count': len(matches)}
+    for name in DICTIONARY_COLUMNS:
+        encoded[name] = encode_dictionary(list(map(itemgetter(name), matches)))
+    for name in TEMPLATE_COLUMNS:
+        encoded[name] = encode_templates(list(map(itemgetter(name), matches)))
+    encoded['exact_sentence'] = list(map(itemgetter('exact_sentence'), matches))
+    for name in SPAN_COLUMNS:
+        encoded[name] = list(map(itemgetter(name), matches))
+    encoded['errors'] = [result['error'] for result in results if 'error' in result]
+    return encoded
+
+
+def decode_results(encoded: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The list of match dicts (without error entries) that encode_results() was given."""
+    columns = {}
+    for name in DICTIONARY_COLUMNS:
+        values = encoded[name]['values']
+        columns[name] = [values[index] for index in encoded[name]['indices']]
+    for name in TEMPLATE_COLUMNS:
+        templates = encoded[name]['templates']
+        arity = [sum(field is not None for _, field, _, _ in FORMATTER.parse(template)) for template in templates]
+        numbers = iter(encoded[name]['numbers'])
+        columns[name] = [
+            templates[index].format(*[next(numbers) for _ in range(arity[index])])
+            for index in encoded[name]['indices']
+        ]
+    columns['exact_sentence'] = encoded['exact_sentence']
+    for name in SPAN_COLUMNS:
+        columns[name] = encoded[name]
+
+    return [
+        {
+            'file_path': columns['file_path'][row],
+            'source_type': columns['source_type'][row],
+            'source_name': columns['source_name'][row],
+            'location': columns['location'][row],
+            'keyword': columns['keyword'][row],
+            'exact_sentence': columns['exact_sentence'][row],
+            'partner': columns['partner'][row],
+            'sentence_start': columns['sentence_start'][row],
+            'sentence_end': columns['sentence_end'][row],
+            'keyword_start': columns['keyword_start'][row],
+            'keyword_end': columns['keyword_end'][row],
+        }
+        for row in range(encoded['count'])
+    ]
+
+
+def dumps(content: Dict[str, Any]) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
@@ -0,0 +1,211 @@
+"""
+Streaming text extraction for .docx files.
+
+Parts of the package (word/document.xml, headers, footers, footnotes and
+endnotes) are decompressed and fed to expat in fixed-size chunks, so no
+element tree is ever built and memory stays bounded by the chunk size and
+the longest single paragraph, whatever the document size.
+"""
+
+import re
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from xml.parsers import expat
+
+# Transitional and strict WordprocessingML namespaces
+W_NAMESPACES = {
+    'http://schemas.openxmlformats.org/wordprocessingml/2006/main',
+    'http://purl.oclc.org/ooxml/wordprocessingml/main',
+}
+MC_NAMESPACE = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+CHUNK_SIZE = 64 * 1024
+
+# Run content that stands for a character, as python-docx renders it
+RUN_CHARACTERS = {'tab': '\t', 'ptab': '\t', 'cr': '\n', 'noBreakHyphen': '-'}
+# Separator "notes" that hold no text of their own
+SKIPPED_NOTE_TYPES = {'separator', 'continuationSeparator', 'continuationNotice'}
+
+# (source_type, source_name, location, text)
+Block = Tuple[str, str, str, str]
+
+
+class _PartHandler:
+    """Expat callbacks that turn one part's XML into text blocks.
+
+    Paragraphs that are direct children of the body (or header, footer)
+    are numbered like python-docx's Document.paragraphs. Paragraphs of a
+    content control (w:sdt: cover pages, tables of contents) at that level
+    are numbered within it instead ('Content control 2, Paragraph 1'), as
+    python-docx leaves them out. Paragraphs inside a table are located by
+    the outermost table's row and cell, and paragraphs nested in text boxes
+    share the location of the paragraph that anchors them. mc:Fallback
+    content duplicates mc:Choice and is skipped.
+    """
+
+    def __init__(self, source_type: str, source_name: str, prefix: str = ''):
+        self.source_type = source_type
+        self.source_name = source_name
+        self.prefix = prefix
+        self.blocks: List[Block] = []
+
+        self._paragraph_num = 0
+        self._table_num = 0
+        self._control_num = 0
+        self._control_paragraph_num = 0
+        # Per open w:sdt, whether it is a block-level content control that numbers its own paragraphs
+        self._controls: List[bool] = []
+        self._table_depth = 0
+        self._row = 0
+        self._cell = 0
+        self._run_depth = 0
+        self._in_text = False
+        self._fallback_depth = 0
+        self._note: Optional[Tuple[str, str]] = None
+        self._open: List[Tuple[str, str, str, List[str]]] = []
+
+    def _paragraph_source(self) -> Tuple[str, str, str]:
+        """(source_type, source_name, location) of a paragraph starting now."""
+        if self._note is not None:
+            return self._note[0], self._note[1], self._note[1]
+        if self._table_depth:
+            table = f'{self.prefix}Table {self._table_num}'
+            source_type = 'table' if not self.prefix else self.source_type
+            source_name = table if not self.prefix else self.source_name
+            return source_type, source_name, f'{table}, Row {self._row}, Cell {self._cell}'
+        if any(self._controls):
+            self._control_paragraph_num += 1
+            control = f'{self.prefix}Content control {self._control_num}'
+            source_type = 'content_control' if not self.prefix else self.source_type
+            source_name = control if not self.prefix else self.source_name
+            return source_type, source_name, f'{control}, Paragraph {self._control_paragraph_num}'
+        self._paragraph_num += 1
+        paragraph = f'{self.prefix}Paragraph {self._paragraph_num}'
+        return self.source_type, self.source_name or paragraph, paragraph
+
+    def start(self, name: str, attrs: Dict[str, str]):
+        namespace, _, tag = name.rpartition(' ')
+        if namespace == MC_NAMESPACE and tag == 'Fallback':
+            self._fallback_depth += 1
+        if self._fallback_depth or namespace not in W_NAMESPACES:
+            return
+
+        if tag == 'p':
+            if self._open:
+                # A text box paragraph inside another paragraph
+                self._open.append(self._open[-1][:3] + ([],))
+            else:
+                self._open.append(self._paragraph_source() + ([],))
+        elif tag == 'r':
+            self._run_depth += 1
+        elif tag == 't':
+            self._in_text = True
+        elif tag in RUN_CHARACTERS or tag == 'br':
+            # w:tab also marks tab stops in paragraph properties, outside any run
+            if self._run_depth and self._open:
+                if tag != 'br':
+                    self._open[-1][3].append(RUN_CHARACTERS[tag])
+                elif attrs.get(f'{namespace} type', 'textWrapping') == 'textWrapping':
+                    self._open[-1][3].append('\n')
+        elif tag == 'sdt':
+            block_level = not self._open and not self._table_depth and self._note is None and not any(self._controls)
+            if block_level:
+                self._control_num += 1
+                self._control_paragraph_num = 0
+            self._controls.append(block_level)
+        elif tag == 'tbl':
+            self._table_depth += 1
+            if self._table_depth == 1:
+                self._table_num += 1
+                self._row = 0
+        elif tag == 'tr' and self._table_depth == 1:
+            self._row += 1
+            self._cell = 0
+        elif tag == 'tc' and self._table_depth == 1:
+            self._cell += 1
+        elif tag in ('footnote', 'endnote'):
+            if attrs.get(f'{namespace} type') in SKIPPED_NOTE_TYPES:
+                self._fallback_depth += 1
+            else:
+                label = f"{tag.capitalize()} {attrs.get(f'{namespace} id', '')}"
+                self._note = (tag, label)
+
+    def end(self, name: str):
+        namespace, _, tag = name.rpartition(' ')
+        if namespace == MC_NAMESPACE and tag == 'Fallback':
+            self._fallback_depth -= 1
+            return
+        if namespace not in W_NAMESPACES:
+            return
+        if tag in ('footnote', 'endnote'):
+            if self._note is None:
+                self._fallback_depth -= 1
+            self._note = None
+            return
+        if self._fallback_depth:
+            return
+
+        if tag == 'p':
+            source_type, source_name, location, text = self._open.pop()
+            text = ''.join(text)
+            if text.strip():
+                self.blocks.append((source_type, source_name, location, text))
+        elif tag == 'r':
+            self._run_depth -= 1
+        elif tag == 't':
+            self._in_text = False
+        elif tag == 'sdt':
+            self._controls.pop()
+        elif tag == 'tbl':
+            self._table_depth -= 1
+
+    def text(self, data: str):
+        if self._in_text and self._open and not self._fallback_depth:
+            self._open[-1][3].append(data)
+
+
+def iter_part(package: zipfile.ZipFile, part: str, handler: _PartHandler) -> Iterator[Block]:
+    """Parse one package part chunk by chunk, yielding its blocks as they complete."""
+    parser = expat.ParserCreate(namespace_separator=' ')
+    parser.buffer_text = True
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.text
+
+    with package.open(part) as stream:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            parser.Parse(chunk, not chunk)
+            if handler.blocks:
+                yield from handler.blocks
+                handler.blocks.clear()
+            if not chunk:
+                break
+
+
+def _part_number(part: str) -> int:
+    match = re.search(r'(\d+)\.xml$', part)
+    return int(match.group(1)) if match else 0
+
+
+def iter_docx(stream: BinaryIO) -> Iterator[Block]:
+    """Yield the non-blank paragraphs of the body, headers, footers, footnotes and endnotes.
+
+    Body blocks come first, in document order, with python-docx paragraph
+    numbering ('Paragraph 12'), table locations ('Table 3, Row 2, Cell 4') or
+    content control locations ('Content control 1, Paragraph 2').
+    Headers and footers follow ('Header 1, Paragraph 2'), then footnotes and
+    endnotes by id ('Footnote 3').
+    """
+    with zipfile.ZipFile(stream) as package:
+        names = set(package.namelist())
+        parts = [('word/document.xml', _PartHandler('paragraph', ''))]
+        for kind in ('header', 'footer'):
+            for part in sorted((name for name in names if re.fullmatch(rf'word/{kind}\d*\.xml', name)), key=_part_number):
+                label = f'{kind.capitalize()} {_part_number(part)}'
+                parts.append((part, _PartHandler(kind, label, f'{label}, ')))
+        for part in ('word/footnotes.xml', 'word/endnotes.xml'):
+            if part in names:
+                parts.append((part, _PartHandler('note', '')))
+
+        for part, handler in parts:
+            yield from iter_part(package, part, handler)
@@ -0,0 +1,186 @@
+import json
+import os
+import time
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+
+from sqlite_store import SQLiteStore
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created REAL NOT NULL,
+    finished REAL,
+    error TEXT,
+    keyword_set TEXT,
+    keyword_set_version INTEGER,
+    keywords TEXT
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL,
+    file_index INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL,
+    unit TEXT,
+    units_done INTEGER NOT NULL DEFAULT 0,
+    units_total INTEGER,
+    error TEXT,
+    PRIMARY KEY (job_id, file_index)
+);
+CREATE TABLE IF NOT EXISTS job_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    file_index INTEGER NOT NULL,
+    keyword TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_results_order ON job_results (job_id, file_index, id);
+'''
+
+class JobStore(SQLiteStore):
+    """SQLite-backed table of analysis jobs, their files, progress and results.
+
+    The database lives in `directory` next to one sub-directory per job that
+    holds the uploaded files until the job finishes. Worker processes open
+    their own JobStore on the same directory to record progress (see
+    SQLiteStore).
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory, 'jobs.sqlite3', SCHEMA)
+
+    def file_path(self, job_id: str, file_index: int) -> str:
+        return os.path.join(self.directory, job_id, str(file_index))
+
+    def create_job(self, filenames: List[str], keyword_set: Dict[str, Any]) -> str:
+        """Register a queued job and return its id; the caller writes each file to file_path().
+
+        The keyword set's keywords are stored with the job, so a job resumed
+        after a restart scans with the same definitions.
+        """
+        job_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.directory, job_id))
+        with self._connect() as db:
+            db.execute(
+                'INSERT INTO jobs (id, status, created, keyword_set, keyword_set_version, keywords) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, 'queued', time.time(), keyword_set['name'], keyword_set['version'],
+                 json.dumps(list(keyword_set['keywords'])))
+            )
+            db.executemany(
+                'INSERT INTO job_files (job_id, file_index, filename, status) VALUES (?, ?, ?, ?)',
+                [(job_id, index, filename, 'queued') for index, filename in enumerate(filenames)]
+            )
+        return job_id
+
+    def set_job_status(self, job_id: str, status: str, error: Optional[str] = None):
+        finished = time.time() if status in ('completed', 'failed') else None
+        with self._connect() as db:
+            db.execute('UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ?', (status, finished, error, job_id))
+
+    def start_file(self, job_id: str, file_index: int, unit: str, units_total: Optional[int] = None):
+        """Mark a file as running, discarding anything left from an interrupted attempt."""
+        with self._connect() as db:
+            db.execute('DELETE FROM job_results WHERE job_id = ? AND file_index = ?', (job_id, file_index))
+            db.execute(
+                'UPDATE job_files SET status = ?, unit = ?, units_done = 0, units_total = ?, error = NULL '
+                'WHERE job_id = ? AND file_index = ?',
+                ('running', unit, units_total, job_id, file_index)
+            )
+
+    def add_results(self, job_id: str, file_index: int, results: List[Dict[str, Any]], units_done: int = 1):
+        """Store a batch of results and advance the file's progress by units_done."""
+        with self._connect() as db:
+            db.executemany(
+                'INSERT INTO job_results (job_id, file_index, keyword, result) VALUES (?, ?, ?, ?)',
+                [(job_id, file_index, result.get('keyword'), json.dumps(result)) for result in results]
+            )
+            db.execute(
+                'UPDATE job_files SET units_done = units_done + ? WHERE job_id = ? AND file_index = ?',
+                (units_done, job_id, file_index)
+            )
+
+    def finish_file(self, job_id: str, file_index: int, error: Optional[str] = None):
+        """Mark a file done; a failed file keeps only its error entry, like /analyze."""
+        with self._connect() as db:
+            if error:
+                db.execute('DELETE FROM job_results WHERE job_id = ? AND file_index = ?', (job_id, file_index))
+                db.execute(
+                    'INSERT INTO job_results (job_id, file_index, keyword, result) VALUES (?, ?, NULL, ?)',
+                    (job_id, file_index, json.dumps({'error': error}))
+                )
+            db.execute(
+                'UPDATE job_files SET status = ?, error = ? WHERE job_id = ? AND file_index = ?',
+                ('failed' if error else 'completed', error, job_id, file_index)
+            )
+
+    def job_keywords(self, job_id: str) -> List[str]:
+        with self._connect() as db:
+            return json.loads(db.execute('SELECT keywords FROM jobs WHERE id = ?', (job_id,)).fetchone()[0])
+
+    def has_job(self, job_id: str) -> bool:
+        with self._connect() as db:
+            return db.execute('SELECT 1 FROM jobs WHERE id = ?', (job_id,)).fetchone() is not None
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status with per-file progress and the /analyze summary statistics so far."""
+        with self._connect() as db:
+            job = db.execute(
+                'SELECT status, created, finished, error, keyword_set, keyword_set_version FROM jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+
+            files = db.execute(
+                'SELECT filename, status, unit, units_done, units_total, error FROM job_files '
+                'WHERE job_id = ? ORDER BY file_index', (job_id,)
+            ).fetchall()
+            total_matches, keywords_found = db.execute(
+                'SELECT COUNT(keyword), COUNT(DISTINCT keyword) FROM job_results WHERE job_id = ?', (job_id,)
+            ).fetchone()
+
+        status, created, finished, error, keyword_set, keyword_set_version = job
+        return {
+            'job_id': job_id,
+            'status': status,
+            'keyword_set': {'name': keyword_set, 'version': keyword_set_version},
+            'created': created,
+            'finished': finished,
+            'error': error,
+            'files_processed': sum(1 for file in files if file[1] in ('completed', 'failed')),
+            'files_total': len(files),
+            'total_matches': total_matches,
+            'keywords_found': keywords_found,
+            'files': [{
+                'filename': filename,
+                'status': file_status,
+                'unit': unit,
+                'done': units_done,
+                'total': units_total,
+                'error': file_error,
+            } for filename, file_status, unit, units_done, units_total, file_error in files],
+        }
+
+    def get_results(self, job_id: str, offset: int, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (total result count, one page of results in file order)."""
+        with self._connect() as db:
+            total = db.execute('SELECT COUNT(*) FROM job_results WHERE job_id = ?', (job_id,)).fetchone()[0]
+            rows = db.execute(
+                'SELECT result FROM job_results WHERE job_id = ? ORDER BY file_index, id LIMIT ? OFFSET ?',
+                (job_id, limit, offset)
+            ).fetchall()
+        return total, [json.loads(row[0]) for row in rows]
+
+    def unfinished_jobs(self) -> List[str]:
+        with self._connect() as db:
+            rows = db.execute("SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created").fetchall()
+        return [row[0] for row in rows]
+
+    def pending_files(self, job_id: str) -> List[Tuple[int, str]]:
+        """(file_index, filename) of every file in a job that has not finished."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT file_index, filename FROM job_files WHERE job_id = ? AND status IN ('queued', 'running') "
+                'ORDER BY file_index', (job_id,)
+            ).fetchall()
+        return [(file_index, filename) for file_index, filename in rows]
@@ -0,0 +1,159 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+# Sentence boundaries used by extract_sentences_from_text
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+SENTENCE_MARKS = '.!?'
+
+
+class SentenceMatch(NamedTuple):
+    """A keyword hit: the sentence and the keyword occurrence as [start, end) offsets into the text."""
+    keyword: str
+    start: int
+    end: int
+    keyword_start: int
+    keyword_end: int
+
+
+def strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Offsets of text[start:end].strip() within text."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def iter_sentence_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield the stripped (start, end) of every piece re.split(SENTENCE_SPLIT, text) would return."""
+    start = 0
+    for boundary in SENTENCE_SPLIT.finditer(text):
+        yield strip_span(text, start, boundary.start())
+        start = boundary.end()
+    yield strip_span(text, start, len(text))
+
+
+class KeywordMatcher:
+    """Find the first listed keyword in every sentence of a text block.
+
+    Built once per keyword list. Any sentence that contains a keyword also
+    contains one of the "root" keywords, the ones with no other keyword inside
+    them ('trans' for 'transmen', 'tg' for 'tgw'). A text block is lowercased
+    once and only the roots are located, each with a single C-level substring
+    scan. Sentences around those hits are then resolved against the full list
+    in order, which keeps the original first-keyword-wins result while the
+    large majority of sentences is never looked at in Python.
+    """
+
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = tuple(keywords)
+        self._lowered = tuple(keyword.lower() for keyword in self.keywords)
+
+        # Sentences never contain a boundary character, so such keywords can never match
+        searchable = [folded for folded in dict.fromkeys(self._lowered) if not SENTENCE_SPLIT.search(folded)]
+        self._searchable = tuple(searchable)
+        self._roots = [
+            folded for folded in searchable
+            if not any(other != folded and other in folded for other in searchable)
+        ]
+        self._has_empty = '' in searchable
+
+    def first_keyword(self, sentence: str) -> Optional[str]:
+        """Return the first listed keyword contained in sentence, if any."""
+        lowered = sentence.lower()
+        for keyword, folded in zip(self.keywords, self._lowered):
+            if folded in lowered:
+                return keyword
+        return None
+
+    def count_keywords(self, sentence: str) -> int:
+        """Return how many distinct listed keywords sentence contains."""
+        lowered = sentence.lower()
+        return sum(folded in lowered for folded in self._searchable)
+
+    def match_sentence(self, sentence: str) -> Optional[SentenceMatch]:
+        """The match iter_matches would yield for an already split and stripped sentence, if any."""
+        lowered = sentence.lower()
+        if len(lowered) != len(sentence):
+            return next(self._iter_per_sentence(sentence, 0), None)
+        for keyword, folded in zip(self.keywords, self._lowered):
+            hit = lowered.find(folded)
+            if hit != -1:
+                return SentenceMatch(keyword, 0, len(sentence), hit, hit + len(folded))
+        return None
+
+    def iter_matches(self, text: str, min_length: int = 0) -> Iterator[SentenceMatch]:
+        """Yield a SentenceMatch, with offsets into text, for every sentence that contains a keyword.
+
+        Sentences are the stripped pieces between runs of '.', '!' and '?',
+        as re.split would produce them, but nothing is copied out of text.
+        """
+        lowered = text.lower()
+        # Lowercasing can change the length of some characters, and an empty
+        # keyword matches every sentence; both fall back to the sentence loop
+        if self._has_empty or len(lowered) != len(text):
+            yield from self._iter_per_sentence(text, min_length)
+            return
+
+        candidates: Dict[int, int] = {}
+        for root in self._roots:
+            previous_end = 0
+            hit = lowered.find(root)
+            while hit != -1:
+                # Walk out to the sentence boundaries on either side of the hit;
+                # the previous sentence's end bounds the backwards search
+                start = max(text.rfind(mark, previous_end, hit) for mark in SENTENCE_MARKS) + 1 or previous_end
+                after = SENTENCE_SPLIT.search(text, hit)
+                end = after.start() if after else len(text)
+
+                candidates[start] = end
+                previous_end = end
+                hit = lowered.find(root, end)
+
+        for start in sorted(candidates):
+            start, end = strip_span(text, start, candidates[start])
+            if end - start < min_length:
+                continue
+
+            for keyword, folded in zip(self.keywords, self._lowered):
+                hit = lowered.find(folded, start, end)
+                if hit != -1:
+                    yield SentenceMatch(keyword, start, end, hit, hit + len(folded))
+                    break
+
+    def _iter_per_sentence(self, text: str, min_length: int) -> Iterator[SentenceMatch]:
+        for start, end in iter_sentence_spans(text):
+            if end - start < min_length:
+                continue
+
+            sentence = text[start:end]
+            keyword = self.first_keyword(sentence)
+            if keyword is not None:
+                # Offsets in the lowercased sentence may not line up with the
+                # original when lowercasing changed its length
+                hit = re.search(re.escape(keyword), sentence, re.IGNORECASE)
+                keyword_start, keyword_end = (start + hit.start(), start + hit.end()) if hit else (start, end)
+                yield SentenceMatch(keyword, start, end, keyword_start, keyword_end)
+
+    def extract_sentences(self, text: str, min_length: int = 0) -> List[Dict[str, Any]]:
+        """Extract sentences containing keywords from text."""
+        matches = []
+        for match in self.iter_matches(text, min_length):
+            sentence = text[match.start:match.end]
+            matches.append({
+                'keyword': match.keyword,
+                'sentence': sentence,
+                'exact_sentence': sentence
+            })
+        return matches
+
+
+@lru_cache(maxsize=32)
+def _compile(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def get_matcher(keywords: Sequence[str]) -> KeywordMatcher:
+    """Return the compiled matcher for a keyword list, building it once."""
+    return _compile(tuple(keywords))
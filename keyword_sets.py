@@ -0,0 +1,149 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence
+
+from keyword_matcher import get_matcher
+from result_cache import keywords_fingerprint
+from sqlite_store import SQLiteStore
+
+# The built-in set, served as version 0 of 'default' until a new version is uploaded
+DEFAULT_SET = 'default'
+DEFAULT_KEYWORDS = [
+    'gender', 'transgender', 'transmen', 'transwomen', 'lgbtq', 'lgbt', 'dei',
+    'diversity', 'equity', 'inclusion', 'gbv', 'trans-gender', 'trans-women',
+    'trans-men', 'disparity', 'pregnant people', 'identity', 'inclusivity',
+    'binary', 'non-binary', 'prejudice', 'pronouns', 'race', 'stereotype',
+    'tgw', 'tg', 'transgender women', 'trans', 'protecting women', 'key pops',
+    'key populations', 'mat', 'hormone', 'dreams', 'abortion', 'fsw',
+    'female sex worker', 'food'
+]
+
+SET_NAME = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+MAX_KEYWORDS = 10000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS keyword_sets (
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    keywords TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (name, version)
+);
+'''
+
+
+def validate_keyword_set(name: str, keywords: Sequence[str]) -> Optional[str]:
+    """Return why a keyword set cannot be stored, or None if it is valid."""
+    if not SET_NAME.match(name):
+        return 'Keyword set names are 1-64 letters, digits, dots, dashes or underscores'
+    if not keywords:
+        return 'A keyword set needs at least one keyword'
+    if len(keywords) > MAX_KEYWORDS:
+        return f'A keyword set holds at most {MAX_KEYWORDS} keywords'
+    if any(not keyword.strip() for keyword in keywords):
+        return 'Keywords cannot be empty'
+    return None
+
+
+def make_keyword_set(name: str, version: int, keywords: Sequence[str], created: Optional[float] = None) -> Dict[str, Any]:
+    return {
+        'name': name,
+        'version': version,
+        'keywords': tuple(keywords),
+        'fingerprint': keywords_fingerprint(keywords),
+        'created': created,
+    }
+
+
+class KeywordSetStore(SQLiteStore):
+    """Named, versioned keyword lists in SQLite, with an LRU of resolved sets.
+
+    Uploading a list under an existing name adds a new version; older
+    versions stay selectable. The database is the one source of definitions
+    for every server process. Requests pass the resolved keywords to the
+    parsing workers, so a worker never sees a half-updated set, and each
+    process compiles a version's matcher once (get_matcher) while it is in
+    use. Sets are compiled when they enter the LRU, not per request.
+    """
+
+    def __init__(self, directory: str, cache_size: int = 32):
+        super().__init__(directory, 'keyword_sets.sqlite3', SCHEMA)
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[tuple, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, keyword_set: Dict[str, Any]) -> Dict[str, Any]:
+        get_matcher(keyword_set['keywords'])
+        with self._lock:
+            self._cache[(keyword_set['name'], keyword_set['version'])] = keyword_set
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return keyword_set
+
+    def create_version(self, name: str, keywords: Sequence[str]) -> Dict[str, Any]:
+        """Store keywords as the next version of a set and return it; check them with validate_keyword_set first."""
+        keyword_set = make_keyword_set(name, 0, keywords, time.time())
+        with self._connect() as db:
+            # BEGIN IMMEDIATE so concurrent uploads cannot claim the same version
+            db.execute('BEGIN IMMEDIATE')
+            latest = db.execute('SELECT MAX(version) FROM keyword_sets WHERE name = ?', (name,)).fetchone()[0]
+            keyword_set['version'] = (latest or 0) + 1
+            db.execute(
+                'INSERT INTO keyword_sets (name, version, keywords, fingerprint, created) VALUES (?, ?, ?, ?, ?)',
+                (name, keyword_set['version'], json.dumps(list(keywords)), keyword_set['fingerprint'], keyword_set['created'])
+            )
+        return self._remember(keyword_set)
+
+    def latest_version(self, name: str) -> Optional[int]:
+        with self._connect() as db:
+            latest = db.execute('SELECT MAX(version) FROM keyword_sets WHERE name = ?', (name,)).fetchone()[0]
+        if latest is None and name == DEFAULT_SET:
+            return 0
+        return latest
+
+    def resolve(self, name: Optional[str] = None, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Return a set version (the latest when version is None), or None if it does not exist."""
+        name = name or DEFAULT_SET
+        if version is None:
+            version = self.latest_version(name)
+            if version is None:
+                return None
+
+        with self._lock:
+            keyword_set = self._cache.get((name, version))
+            if keyword_set is not None:
+                self._cache.move_to_end((name, version))
+                return keyword_set
+
+        if name == DEFAULT_SET and version == 0:
+            return self._remember(make_keyword_set(DEFAULT_SET, 0, DEFAULT_KEYWORDS))
+        with self._connect() as db:
+            row = db.execute(
+                'SELECT keywords, created FROM keyword_sets WHERE name = ? AND version = ?', (name, version)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._remember(make_keyword_set(name, version, json.loads(row[0]), row[1]))
+
+    def versions(self, name: str) -> List[int]:
+        with self._connect() as db:
+            rows = db.execute('SELECT version FROM keyword_sets WHERE name = ? ORDER BY version', (name,)).fetchall()
+        versions = [row[0] for row in rows]
+        return [0] + versions if name == DEFAULT_SET else versions
+
+    def list_sets(self) -> List[Dict[str, Any]]:
+        """Name, latest version and version count of every set."""
+        with self._connect() as db:
+            rows = db.execute(
+                'SELECT name, MAX(version), COUNT(*) FROM keyword_sets GROUP BY name ORDER BY name'
+            ).fetchall()
+        sets = {name: {'name': name, 'latest_version': latest, 'versions': count} for name, latest, count in rows}
+        if DEFAULT_SET in sets:
+            sets[DEFAULT_SET]['versions'] += 1
+        else:
+            sets[DEFAULT_SET] = {'name': DEFAULT_SET, 'latest_version': 0, 'versions': 1}
+        return sorted(sets.values(), key=lambda keyword_set: keyword_set['name'])
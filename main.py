@@ -1,17 +1,148 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, File, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Iterator, Optional, Sequence, Tuple, Union
 import json
 import io
+import os
 import base64
-import pandas as pd
-from PyPDF2 import PdfReader
-from openpyxl import load_workbook
-from docx import Document
+import asyncio
+import hashlib
+import multiprocessing
+import queue
 import re
+import time
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from openpyxl import load_workbook
+from keyword_matcher import SentenceMatch, get_matcher, iter_sentence_spans
+from docx_stream import iter_docx
+from result_cache import ResultCache, cache_key, rewrite_results
+import columnar
+from jobs import JobStore
+from unit_store import UnitStore, document_key
+from admission import AdmissionBudget, BudgetExceeded, Reservation
+from pdf_backends import PdfDocument, available_backends, is_available, open_document
+from sentence_index import SentenceIndex
+from match_summary import MatchSummary
+from worker_pool import IsolatedPool, LimitExceeded
+from keyword_sets import DEFAULT_KEYWORDS, KeywordSetStore, validate_keyword_set
+from metrics import Counter, Gauge, Histogram, Registry, add_count, add_stage_time, stage, timed
+
+# Worker processes used to parse files; 0 parses on the event loop's thread pool instead
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", os.cpu_count() or 1))
+# PDFs larger than this many bytes are split into page ranges parsed across the pool
+PDF_SPLIT_BYTES = int(os.environ.get("PDF_SPLIT_BYTES", 5 * 1024 * 1024))
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", 50))
+# Result cache: an in-memory LRU plus an optional SQLite tier when RESULT_CACHE_DIR is set
+RESULT_CACHE_MB = int(os.environ.get("RESULT_CACHE_MB", 64))
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR")
+RESULT_CACHE_DISK_MB = int(os.environ.get("RESULT_CACHE_DISK_MB", 1024))
+# Rows (or paragraphs) scanned between flushes of a streamed result batch
+STREAM_BATCH_ROWS = int(os.environ.get("STREAM_BATCH_ROWS", 1000))
+# Longest a stream's reader thread blocks on the batch queue before it looks again
+STREAM_POLL_SECONDS = 1.0
+# Distinct cell strings whose matches are remembered while scanning one workbook
+EXCEL_MEMO_SIZE = int(os.environ.get("EXCEL_MEMO_SIZE", 100000))
+# Background jobs: files and the SQLite job table live in JOBS_DIR, parsed by their own pool
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(tempfile.gettempdir(), "compliance-jobs"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", PARSE_WORKERS))
+JOB_RESULTS_PAGE_MAX = 10000
+# ?format=summary returns at most this many top matches per keyword
+SUMMARY_TOP_MAX = 100
+# Named, versioned keyword sets; KEYWORD_SET_CACHE compiled versions are kept per process
+KEYWORD_SETS_DIR = os.environ.get("KEYWORD_SETS_DIR", os.path.join(tempfile.gettempdir(), "compliance-keyword-sets"))
+KEYWORD_SET_CACHE = int(os.environ.get("KEYWORD_SET_CACHE", 32))
+# Per-page and per-sheet matches of analyzed documents, so a revision only rescans changed units; 0 MB turns it off
+UNIT_STORE_DIR = os.environ.get("UNIT_STORE_DIR", os.path.join(tempfile.gettempdir(), "compliance-units"))
+UNIT_STORE_MB = int(os.environ.get("UNIT_STORE_MB", 512))
+# Admission control: decoded bytes of the files admitted across requests (0 MB turns the
+# budget off), files parsed at once, and how long a request may wait for room before a 429
+ADMISSION_MB = int(os.environ.get("ADMISSION_MB", 1024))
+MAX_CONCURRENT_PARSES = int(os.environ.get("MAX_CONCURRENT_PARSES", max(PARSE_WORKERS, 1) * 2))
+ADMISSION_WAIT_SECONDS = float(os.environ.get("ADMISSION_WAIT_SECONDS", 10))
+# Files larger than this are turned away before they are decoded; 0 means no limit
+MAX_FILE_MB = int(os.environ.get("MAX_FILE_MB", 200))
+# Each parse task (a file, or a page range of a split PDF) is killed when it runs longer than
+# PARSE_TIMEOUT_SECONDS or grows its worker's memory by more than PARSE_MEMORY_MB; 0 turns a limit off
+PARSE_TIMEOUT_SECONDS = float(os.environ.get("PARSE_TIMEOUT_SECONDS", 120))
+PARSE_MEMORY_MB = int(os.environ.get("PARSE_MEMORY_MB", 1024))
+# Sentences of documents ingested through POST /index, searched by GET /search
+INDEX_DIR = os.environ.get("INDEX_DIR", os.path.join(tempfile.gettempdir(), "compliance-index"))
+
+# PDF text extractors to try in order (pypdf2, pypdf, pdfminer, pypdfium2); a page
+# one of them fails on is extracted by the next. Requests can put another one first
+DEFAULT_PDF_BACKENDS = ('pypdf2',)
+
+def parse_pdf_backends(value: str) -> Tuple[str, ...]:
+    """The backend chain of a comma-separated PDF_BACKENDS value; raises ValueError unless every name is installed."""
+    names = tuple(name.strip() for name in value.split(',') if name.strip())
+    if not names:
+        raise ValueError('PDF_BACKENDS lists no PDF backend')
+    unknown = [name for name in names if not is_available(name)]
+    if unknown:
+        raise ValueError(f"Unknown PDF backend in PDF_BACKENDS: {', '.join(unknown)}, "
+                         f"available: {', '.join(available_backends())}")
+    return names
+
+PDF_BACKENDS = parse_pdf_backends(os.environ.get("PDF_BACKENDS", ','.join(DEFAULT_PDF_BACKENDS)))
+
+_executor = None
+_job_executor = None
+_job_store = None
+_keyword_store = None
+_unit_store = None
+_sentence_index = None
+_job_tasks = set()
+_manager = None
+result_cache = ResultCache(RESULT_CACHE_MB * 1024 * 1024, RESULT_CACHE_DIR, RESULT_CACHE_DISK_MB * 1024 * 1024)
+admission = AdmissionBudget(ADMISSION_MB * 1024 * 1024, MAX_CONCURRENT_PARSES, ADMISSION_WAIT_SECONDS)
+
+# Served on /metrics in the Prometheus text format
+metrics_registry = Registry()
+stage_seconds = metrics_registry.register(Histogram(
+    'compliance_stage_seconds', 'Time spent in each analysis stage, per file', ['stage', 'format']))
+request_seconds = metrics_registry.register(Histogram(
+    'compliance_request_seconds', 'Analysis request latency', ['endpoint']))
+requests_in_flight = metrics_registry.register(Gauge(
+    'compliance_requests_in_flight', 'Analysis requests currently being handled', ['endpoint']))
+files_processed = metrics_registry.register(Counter(
+    'compliance_files_processed_total', 'Files analyzed, by outcome (parsed, cached or error)', ['format', 'outcome']))
+bytes_processed = metrics_registry.register(Counter(
+    'compliance_bytes_processed_total', 'Bytes of uploaded files analyzed', ['format']))
+pages_processed = metrics_registry.register(Counter(
+    'compliance_pages_processed_total', 'PDF pages parsed', ['format']))
+admission_bytes = metrics_registry.register(Gauge(
+    'compliance_admission_bytes', 'Bytes of the admission budget in use and its size', ['state']))
+admission_parses = metrics_registry.register(Gauge(
+    'compliance_admission_parses', 'Files being parsed and files waiting for a parse slot', ['state']))
+admission_rejected = metrics_registry.register(Counter(
+    'compliance_admission_rejected_total', 'Requests turned away by admission control', ['endpoint', 'status']))
+parse_limits_exceeded = metrics_registry.register(Counter(
+    'compliance_parse_limits_exceeded_total', 'Parse tasks killed for going over a limit', ['limit']))
 
-app = FastAPI(title="EO Compliance Analysis API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _executor, _job_executor, _manager
+    # Pick up jobs interrupted by a restart
+    for job_id in await asyncio.to_thread(get_job_store().unfinished_jobs):
+        start_job(job_id)
+    yield
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+    if _job_executor is not None:
+        _job_executor.shutdown(cancel_futures=True)
+        _job_executor = None
+    if _manager is not None:
+        _manager.shutdown()
+        _manager = None
+
+app = FastAPI(title="EO Compliance Analysis API", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -22,16 +153,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Keywords list
-KEYWORDS = [
-    'gender', 'transgender', 'transmen', 'transwomen', 'lgbtq', 'lgbt', 'dei',
-    'diversity', 'equity', 'inclusion', 'gbv', 'trans-gender', 'trans-women',
-    'trans-men', 'disparity', 'pregnant people', 'identity', 'inclusivity',
-    'binary', 'non-binary', 'prejudice', 'pronouns', 'race', 'stereotype',
-    'tgw', 'tg', 'transgender women', 'trans', 'protecting women', 'key pops',
-    'key populations', 'mat', 'hormone', 'dreams', 'abortion', 'fsw',
-    'female sex worker', 'food'
-]
+# Built-in keyword list, version 0 of the 'default' keyword set
+KEYWORDS = DEFAULT_KEYWORDS
 
 class FileData(BaseModel):
     filename: str
@@ -39,156 +162,1521 @@ class FileData(BaseModel):
 
 class AnalyzeRequest(BaseModel):
     files: List[FileData]
+    keyword_set: Optional[str] = None
+    keyword_set_version: Optional[int] = None
+    pdf_backend: Optional[str] = None
+
+class KeywordSetRequest(BaseModel):
+    keywords: List[str]
+
+# Shorter sentences are skipped
+MIN_SENTENCE_LENGTH = 10
 
 def extract_sentences_from_text(text: str, keywords: List[str]) -> List[Dict[str, Any]]:
     """Extract sentences containing keywords from text."""
-    sentences = re.split(r'[.!?]+', text)
-    matches = []
+    return get_matcher(keywords).extract_sentences(text, min_length=MIN_SENTENCE_LENGTH)
+
+def sentence_matches(text: str, keywords: Sequence[str]) -> List[SentenceMatch]:
+    """Keyword matches in text as offsets into it, skipping very short sentences."""
+    return list(get_matcher(keywords).iter_matches(text, min_length=MIN_SENTENCE_LENGTH))
+
+def open_stream(file_content: Union[bytes, BinaryIO]) -> BinaryIO:
+    """Wrap raw bytes in a stream; file objects are read in place."""
+    if isinstance(file_content, (bytes, bytearray)):
+        return io.BytesIO(file_content)
+    return file_content
+
+def pdf_page_matches(pdf_document: PdfDocument, filename: str, page_num: int, keywords: Sequence[str]) -> List[Dict[str, Any]]:
+    """Extract keyword matches from one PDF page (1-based)."""
+    with stage('extract'):
+        text = pdf_document.page_text(page_num - 1)
+    # Sentence splitting and keyword matching are a single pass
+    with stage('match'):
+        matches = sentence_matches(text, keywords)
+    add_count('pages')
     
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if len(sentence) < 10:  # Skip very short sentences
-            continue
-            
-        for keyword in keywords:
-            if keyword.lower() in sentence.lower():
-                matches.append({
-                    'keyword': keyword,
-                    'sentence': sentence,
-                    'exact_sentence': sentence
-                })
-                break  # Only match first keyword found
-    
-    return matches
-
-def process_pdf(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
+    return [{
+        'file_path': filename,
+        'source_type': 'page',
+        'source_name': f'Page {page_num}',
+        'location': f'Page {page_num}',
+        'keyword': match.keyword,
+        'exact_sentence': text[match.start:match.end],
+        'partner': filename.split('.')[0],
+        'sentence_start': match.start,
+        'sentence_end': match.end,
+        'keyword_start': match.keyword_start,
+        'keyword_end': match.keyword_end
+    } for match in matches]
+
+def extract_pdf_pages(pdf_document: PdfDocument, filename: str, first_page: int, last_page: int,
+                      keywords: Sequence[str]) -> List[Dict[str, Any]]:
+    """Extract keyword matches from pages first_page..last_page (1-based, inclusive)."""
+    results = []
+    for page_num in range(first_page, last_page + 1):
+        results.extend(pdf_page_matches(pdf_document, filename, page_num, keywords))
+    return results
+
+def iter_pdf(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str] = KEYWORDS,
+             pdf_backends: Sequence[str] = PDF_BACKENDS) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the keyword matches of a PDF one page at a time."""
+    with stage('parse'):
+        pdf_document = open_document(open_stream(file_content), pdf_backends)
+    try:
+        for page_num in range(1, len(pdf_document) + 1):
+            yield pdf_page_matches(pdf_document, filename, page_num, keywords)
+    finally:
+        pdf_document.close()
+
+def process_pdf(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str] = KEYWORDS,
+                pdf_backends: Sequence[str] = PDF_BACKENDS) -> List[Dict[str, Any]]:
     """Process PDF file and extract keyword matches."""
     try:
-        pdf_reader = PdfReader(io.BytesIO(file_content))
-        results = []
-        
-        for page_num, page in enumerate(pdf_reader.pages, 1):
-            text = page.extract_text()
-            matches = extract_sentences_from_text(text, KEYWORDS)
-            
-            for match in matches:
-                results.append({
-                    'file_path': filename,
-                    'source_type': 'page',
-                    'source_name': f'Page {page_num}',
-                    'location': f'Page {page_num}',
-                    'keyword': match['keyword'],
-                    'exact_sentence': match['sentence'],
-                    'partner': filename.split('.')[0]
-                })
-        
-        return results
+        return [result for batch in iter_pdf(file_content, filename, keywords, pdf_backends) for result in batch]
     except Exception as e:
         return [{'error': f'Error processing PDF {filename}: {str(e)}'}]
 
-def process_excel(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
+def count_pdf_pages(path: str, pdf_backends: Sequence[str] = PDF_BACKENDS) -> int:
+    """Return the page count of a PDF on disk; runs inside a worker process."""
+    pdf_document = open_document(path, pdf_backends)
+    pdf_document.close()
+    return len(pdf_document)
+
+def inspect_pdf(path: str, pdf_backends: Sequence[str] = PDF_BACKENDS) -> Tuple[int, bool]:
+    """Return the page count of a PDF on disk and whether PyPDF2, which fingerprints its pages, can open it."""
+    pdf_document = open_document(path, pdf_backends)
+    try:
+        return len(pdf_document), pdf_document.can_open('pypdf2')
+    finally:
+        pdf_document.close()
+
+def process_pdf_pages(path: str, filename: str, first_page: int, last_page: int,
+                      keywords: Sequence[str] = KEYWORDS, pdf_backends: Sequence[str] = PDF_BACKENDS) -> List[Dict[str, Any]]:
+    """Process one page range of a PDF on disk; runs inside a worker process."""
+    with stage('parse'):
+        pdf_document = open_document(path, pdf_backends)
+    try:
+        return extract_pdf_pages(pdf_document, filename, first_page, last_page, keywords)
+    finally:
+        pdf_document.close()
+
+def scan_sheet(sheet, filename: str, keywords: Sequence[str],
+               memo: Dict[str, List[SentenceMatch]]) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the keyword matches of one read-only worksheet, flushing every STREAM_BATCH_ROWS rows.
+
+    Rows are read while the sheet is scanned, so the 'extract' stage is the
+    scan time less the time spent matching memo misses.
+    """
+    def record_scan(started: float, match_seconds: float):
+        add_stage_time('match', match_seconds)
+        add_stage_time('extract', time.perf_counter() - started - match_seconds)
+    
+    # Declared dimensions can be wrong; read every row that is actually there
+    sheet.reset_dimensions()
+    batch = []
+    row_num = 0
+    started, match_seconds = time.perf_counter(), 0.0
+    
+    for row_num, row in enumerate(sheet.iter_rows(values_only=True), 1):
+        for col_num, cell_value in enumerate(row, 1):
+            if cell_value and isinstance(cell_value, str):
+                matches = memo.get(cell_value)
+                if matches is None:
+                    match_started = time.perf_counter()
+                    matches = sentence_matches(cell_value, keywords)
+                    match_seconds += time.perf_counter() - match_started
+                    if len(memo) < EXCEL_MEMO_SIZE:
+                        memo[cell_value] = matches
+                
+                for match in matches:
+                    batch.append({
+                        'file_path': filename,
+                        'source_type': 'worksheet',
+                        'source_name': sheet.title,
+                        'location': f'Row {row_num}, Column {col_num}',
+                        'keyword': match.keyword,
+                        'exact_sentence': cell_value[match.start:match.end],
+                        'partner': filename.split('.')[0],
+                        'sentence_start': match.start,
+                        'sentence_end': match.end,
+                        'keyword_start': match.keyword_start,
+                        'keyword_end': match.keyword_end
+                    })
+        
+        if row_num % STREAM_BATCH_ROWS == 0 and batch:
+            record_scan(started, match_seconds)
+            yield batch
+            batch = []
+            started, match_seconds = time.perf_counter(), 0.0
+    
+    record_scan(started, match_seconds)
+    add_count('rows', row_num)
+    yield batch
+
+def iter_excel(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str] = KEYWORDS) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the keyword matches of a workbook per sheet, flushing every STREAM_BATCH_ROWS rows.
+
+    The workbook is opened read-only, so rows are streamed from the sheet XML
+    instead of building every cell object up front. Label-like strings repeat
+    across thousands of rows, so matches are memoized per cell string for the
+    whole workbook, up to EXCEL_MEMO_SIZE distinct strings.
+    """
+    with stage('parse'):
+        workbook = load_workbook(open_stream(file_content), read_only=True)
+    memo: Dict[str, List[SentenceMatch]] = {}
+    try:
+        for sheet_name in workbook.sheetnames:
+            yield from scan_sheet(workbook[sheet_name], filename, keywords, memo)
+    finally:
+        workbook.close()
+
+def process_excel(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str] = KEYWORDS) -> List[Dict[str, Any]]:
     """Process Excel file and extract keyword matches."""
     try:
-        workbook = load_workbook(io.BytesIO(file_content))
-        results = []
+        return [result for batch in iter_excel(file_content, filename, keywords) for result in batch]
+    except Exception as e:
+        return [{'error': f'Error processing Excel {filename}: {str(e)}'}]
+
+def iter_word(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str] = KEYWORDS) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the keyword matches of a Word document, STREAM_BATCH_ROWS paragraphs at a time.
+
+    The document is streamed by docx_stream, which also covers table cells,
+    headers, footers, footnotes and endnotes. Paragraph text is read while
+    the XML is parsed, so 'extract' covers both.
+    """
+    blocks = iter_docx(open_stream(file_content))
+    batch = []
+    block_num = 0
+    
+    while True:
+        with stage('extract'):
+            block = next(blocks, None)
+        if block is None:
+            break
+        block_num += 1
+        source_type, source_name, location, text = block
+        
+        with stage('match'):
+            matches = sentence_matches(text, keywords)
+        for match in matches:
+            batch.append({
+                'file_path': filename,
+                'source_type': source_type,
+                'source_name': source_name,
+                'location': location,
+                'keyword': match.keyword,
+                'exact_sentence': text[match.start:match.end],
+                'partner': filename.split('.')[0],
+                'sentence_start': match.start,
+                'sentence_end': match.end,
+                'keyword_start': match.keyword_start,
+                'keyword_end': match.keyword_end
+            })
         
+        if block_num % STREAM_BATCH_ROWS == 0 and batch:
+            yield batch
+            batch = []
+    
+    add_count('paragraphs', block_num)
+    yield batch
+
+def process_word(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str] = KEYWORDS) -> List[Dict[str, Any]]:
+    """Process Word document and extract keyword matches."""
+    try:
+        return [result for batch in iter_word(file_content, filename, keywords) for result in batch]
+    except Exception as e:
+        return [{'error': f'Error processing Word {filename}: {str(e)}'}]
+
+def file_kind(filename: str) -> Optional[str]:
+    """Return the parser used for a file name, or None if it is unsupported."""
+    if filename.lower().endswith('.pdf'):
+        return 'pdf'
+    elif filename.lower().endswith('.xlsx') or filename.lower().endswith('.xls'):
+        return 'excel'
+    elif filename.lower().endswith('.docx'):
+        return 'word'
+    return None
+
+PROCESSORS = {
+    'pdf': process_pdf,
+    'excel': process_excel,
+    'word': process_word,
+}
+
+# Batch generators behind each processor, used to stream results
+ITERATORS = {
+    'pdf': iter_pdf,
+    'excel': iter_excel,
+    'word': iter_word,
+}
+
+# Bumped when a parser's output changes, so cached results from the old parser are not served
+PARSER_VERSIONS = {
+    'pdf': 2,
+    'excel': 2,
+    'word': 4,
+}
+
+def parser_id(kind: str, pdf_backends: Sequence[str] = PDF_BACKENDS) -> str:
+    """Parser name and version in cache, unit store and index keys.
+
+    Backends extract different text from the same PDF, so a chain other than
+    the default one is part of the key.
+    """
+    if kind == 'pdf' and tuple(pdf_backends) != DEFAULT_PDF_BACKENDS:
+        return f"pdf.v{PARSER_VERSIONS['pdf']}.{'+'.join(pdf_backends)}"
+    return f'{kind}.v{PARSER_VERSIONS[kind]}'
+
+FILE_TYPE_LABELS = {
+    'pdf': 'PDF',
+    'excel': 'Excel',
+    'word': 'Word',
+}
+
+def process_file(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str] = KEYWORDS,
+                 pdf_backends: Sequence[str] = PDF_BACKENDS) -> List[Dict[str, Any]]:
+    """Process a file based on its extension."""
+    kind = file_kind(filename)
+    if kind is None:
+        return [{'error': f'Unsupported file type: {filename}'}]
+    if kind == 'pdf':
+        return process_pdf(file_content, filename, keywords, pdf_backends)
+    return PROCESSORS[kind](file_content, filename, keywords)
+
+def iter_file(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str] = KEYWORDS,
+              pdf_backends: Sequence[str] = PDF_BACKENDS) -> Iterator[List[Dict[str, Any]]]:
+    """The batch generator of a supported file; errors are raised, not returned as entries."""
+    kind = file_kind(filename)
+    if kind == 'pdf':
+        return iter_pdf(file_content, filename, keywords, pdf_backends)
+    return ITERATORS[kind](file_content, filename, keywords)
+
+def summarize_file(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str], top_n: int,
+                   pdf_backends: Sequence[str] = PDF_BACKENDS) -> MatchSummary:
+    """Fold a file's matches into a MatchSummary batch by batch, never holding its result list; runs inside a worker.
+
+    Like process_file, a file that fails part way only counts its error.
+    """
+    summary = MatchSummary(keywords, top_n)
+    try:
+        for batch in iter_file(file_content, filename, keywords, pdf_backends):
+            summary.add_results(batch)
+    except Exception as e:
+        summary = MatchSummary(keywords, top_n)
+        summary.add_results([{'error': f'Error processing {FILE_TYPE_LABELS[file_kind(filename)]} {filename}: {str(e)}'}])
+    return summary
+
+def pdf_text_blocks(file_content: Union[bytes, BinaryIO]) -> Iterator[Tuple[str, str, str, str]]:
+    pdf_document = open_document(open_stream(file_content), PDF_BACKENDS)
+    try:
+        for page_num in range(1, len(pdf_document) + 1):
+            yield 'page', f'Page {page_num}', f'Page {page_num}', pdf_document.page_text(page_num - 1)
+    finally:
+        pdf_document.close()
+
+def excel_text_blocks(file_content: Union[bytes, BinaryIO]) -> Iterator[Tuple[str, str, str, str]]:
+    workbook = load_workbook(open_stream(file_content), read_only=True)
+    try:
         for sheet_name in workbook.sheetnames:
             sheet = workbook[sheet_name]
-            
+            sheet.reset_dimensions()
             for row_num, row in enumerate(sheet.iter_rows(values_only=True), 1):
                 for col_num, cell_value in enumerate(row, 1):
                     if cell_value and isinstance(cell_value, str):
-                        matches = extract_sentences_from_text(cell_value, KEYWORDS)
-                        
-                        for match in matches:
-                            results.append({
-                                'file_path': filename,
-                                'source_type': 'worksheet',
-                                'source_name': sheet_name,
-                                'location': f'Row {row_num}, Column {col_num}',
-                                'keyword': match['keyword'],
-                                'exact_sentence': match['sentence'],
-                                'partner': filename.split('.')[0]
-                            })
+                        yield 'worksheet', sheet.title, f'Row {row_num}, Column {col_num}', cell_value
+    finally:
+        workbook.close()
+
+def word_text_blocks(file_content: Union[bytes, BinaryIO]) -> Iterator[Tuple[str, str, str, str]]:
+    return iter_docx(open_stream(file_content))
+
+# (source_type, source_name, location, text) of every page, text cell or paragraph, in the processors' order
+TEXT_BLOCKS = {
+    'pdf': pdf_text_blocks,
+    'excel': excel_text_blocks,
+    'word': word_text_blocks,
+}
+
+def index_file(index: SentenceIndex, file_content: Union[bytes, BinaryIO], filename: str, digest: str) -> int:
+    """Split a file into sentences and store them in the sentence index; runs inside a worker.
+
+    Returns the number of sentences stored. Sentences are kept with their
+    offset in the page, cell or paragraph text, so searches return the same
+    spans as /analyze.
+    """
+    kind = file_kind(filename)
+    rows = []
+    for source_type, source_name, location, text in TEXT_BLOCKS[kind](file_content):
+        for start, end in iter_sentence_spans(text):
+            if end - start >= MIN_SENTENCE_LENGTH:
+                rows.append((source_type, source_name, location, start, text[start:end]))
+    index.add_document(filename, digest, parser_id(kind), rows)
+    return len(rows)
+
+def pdf_object_bytes(value, depth: int = 0) -> bytes:
+    """A PyPDF2 object written out with its indirect references resolved.
+
+    repr() of an indirect reference includes the id() of its reader, so it
+    differs between two uploads of the same file; nested references are
+    followed and their values written instead.
+    """
+    value = value.get_object() if hasattr(value, 'get_object') else value
+    if depth > 8:
+        return b'...'
+    if isinstance(value, dict):
+        parts = [str(key).encode() + b' ' + pdf_object_bytes(item, depth + 1) for key, item in sorted(dict.items(value))]
+        data = value.get_data() if hasattr(value, 'get_data') else b''
+        return b'<<' + b' '.join(parts) + b'>>' + data
+    if isinstance(value, list):
+        return b'[' + b' '.join(pdf_object_bytes(item, depth + 1) for item in list.__iter__(value)) + b']'
+    return repr(value).encode()
+
+def hash_pdf_resources(digest, resources, depth: int = 0):
+    """Feed the fonts and form XObjects a page's text depends on into digest."""
+    if resources is None or depth > 3:
+        return
+    resources = resources.get_object()
+    fonts = resources.get('/Font')
+    fonts = fonts.get_object() if fonts is not None else {}
+    for name in sorted(fonts):
+        font = fonts[name]
+        digest.update(f'{name}{font.get("/BaseFont")}{font.get("/Subtype")}'.encode())
+        encoding = font.get('/Encoding')
+        if encoding is not None:
+            digest.update(pdf_object_bytes(encoding))
+        to_unicode = font.get('/ToUnicode')
+        if to_unicode is not None:
+            digest.update(to_unicode.get_object().get_data())
+    xobjects = resources.get('/XObject')
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    for name in sorted(xobjects):
+        xobject = xobjects[name]
+        # Images hold no text
+        if xobject.get('/Subtype') == '/Form':
+            digest.update(name.encode())
+            digest.update(xobject.get_data())
+            hash_pdf_resources(digest, xobject.get('/Resources'), depth + 1)
+
+def pdf_page_fingerprint(page) -> str:
+    """Hash of what a page's text is extracted from: its content stream, rotation, fonts and forms.
+
+    Much cheaper than extract_text(), so unchanged pages of a revision are
+    never extracted.
+    """
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    digest.update(pdf_object_bytes(page.get('/Rotate')))
+    hash_pdf_resources(digest, page.get('/Resources'))
+    return digest.hexdigest()
+
+def pdf_page_revision(pdf_document: PdfDocument, filename: str, first_page: int, last_page: int,
+                      keywords: Sequence[str], units: UnitStore, document: str):
+    """Matches of pages first_page..last_page, reusing stored pages whose fingerprint is unchanged.
+
+    Pages are fingerprinted from their PyPDF2 objects, whichever backend
+    extracts their text. Returns (results, reused page numbers); rescanned
+    pages are stored for the next revision.
+    """
+    with stage('parse'):
+        pdf_reader = pdf_document.opened('pypdf2').reader
+    with stage('fingerprint'):
+        fingerprints = {
+            f'Page {page_num}': pdf_page_fingerprint(pdf_reader.pages[page_num - 1])
+            for page_num in range(first_page, last_page + 1)
+        }
+        stored = units.get_many(document, fingerprints)
+    
+    results, reused, fresh = [], [], []
+    for page_num in range(first_page, last_page + 1):
+        unit = f'Page {page_num}'
+        page_results = stored.get(unit)
+        if page_results is None:
+            page_results = pdf_page_matches(pdf_document, filename, page_num, keywords)
+            fresh.append((unit, fingerprints[unit], page_results))
+        else:
+            reused.append(page_num)
+        results.extend(page_results)
+    
+    with stage('store'):
+        units.put(document, fresh)
+    add_count('pages_reused', len(reused))
+    return results, reused
+
+def process_pdf_page_revision(path: str, filename: str, first_page: int, last_page: int,
+                              keywords: Sequence[str], units: UnitStore, document: str,
+                              pdf_backends: Sequence[str] = PDF_BACKENDS):
+    """pdf_page_revision() for one page range of a PDF on disk; runs inside a worker process."""
+    with stage('parse'):
+        pdf_document = open_document(path, pdf_backends)
+    try:
+        return pdf_page_revision(pdf_document, filename, first_page, last_page, keywords, units, document)
+    finally:
+        pdf_document.close()
+
+# A shared-string cell's value index, <c ... t="s"><v>12</v>
+SHARED_STRING_CELL = re.compile(rb'(<(?:\w+:)?c\b[^>]*?\bt=["\']s["\'][^>]*>\s*<(?:\w+:)?v>)(\d+)')
+SHARED_STRING_TYPE = re.compile(rb'\bt=["\']s["\']')
+
+def excel_sheet_fingerprint(sheet) -> str:
+    """Hash of a read-only worksheet's XML with shared-string indexes replaced by their strings.
+
+    Editing one sheet renumbers the workbook's shared strings, so the raw
+    XML of untouched sheets changes too; hashing the strings themselves
+    keeps their fingerprints stable. The XML is hashed in chunks cut after a
+    closing cell tag, so no cell is split between two chunks.
+    """
+    strings = sheet._shared_strings
+    digest = hashlib.sha256()
+    unresolved = False
+    
+    def resolve(match) -> bytes:
+        return match.group(1) + str(strings[int(match.group(2))]).encode('utf-8')
+    
+    def hash_chunk(chunk: bytes):
+        nonlocal unresolved
+        replaced, count = SHARED_STRING_CELL.subn(resolve, chunk)
+        unresolved = unresolved or count != len(SHARED_STRING_TYPE.findall(chunk))
+        digest.update(replaced)
+    
+    with sheet._get_source() as source:
+        pending = b''
+        while True:
+            chunk = source.read(1024 * 1024)
+            if not chunk:
+                break
+            pending += chunk
+            cut = pending.rfind(b'</c>')
+            if cut >= 0:
+                hash_chunk(pending[:cut + 4])
+                pending = pending[cut + 4:]
+        hash_chunk(pending)
+    
+    if unresolved:
+        # Cells the pattern did not recognise still point into the string table
+        digest.update(repr(list(map(str, strings))).encode('utf-8'))
+    return digest.hexdigest()
+
+def process_excel_revision(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str],
+                           units: UnitStore, document: str):
+    """Matches of a workbook, reusing stored sheets whose fingerprint is unchanged.
+
+    Returns (results, reused sheet names, sheet names).
+    """
+    with stage('parse'):
+        workbook = load_workbook(open_stream(file_content), read_only=True)
+    memo: Dict[str, List[SentenceMatch]] = {}
+    try:
+        sheet_names = workbook.sheetnames
+        with stage('fingerprint'):
+            fingerprints = {f'Sheet {name}': excel_sheet_fingerprint(workbook[name]) for name in sheet_names}
+            stored = units.get_many(document, fingerprints)
         
+        results, reused, fresh = [], [], []
+        for sheet_name in sheet_names:
+            unit = f'Sheet {sheet_name}'
+            sheet_results = stored.get(unit)
+            if sheet_results is None:
+                sheet_results = [
+                    result for batch in scan_sheet(workbook[sheet_name], filename, keywords, memo) for result in batch
+                ]
+                fresh.append((unit, fingerprints[unit], sheet_results))
+            else:
+                reused.append(sheet_name)
+            results.extend(sheet_results)
+    finally:
+        workbook.close()
+    
+    with stage('store'):
+        units.put(document, fresh)
+    add_count('sheets_reused', len(reused))
+    return results, reused, sheet_names
+
+def unit_report(filename: str, unit: str, labels: List[Any], reused: List[Any]) -> Dict[str, Any]:
+    """The per-file entry of the /analyze "incremental" list."""
+    reused_labels = set(reused)
+    return {
+        'file_path': filename,
+        'unit': unit,
+        'units': len(labels),
+        'reused': reused,
+        'rescanned': [label for label in labels if label not in reused_labels]
+    }
+
+def process_revision(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str],
+                     units: UnitStore, document: str, pdf_backends: Sequence[str] = PDF_BACKENDS):
+    """Analyze a PDF or workbook page by page (sheet by sheet), rescanning only units that changed.
+
+    Returns (results, unit report). Units of the document that no longer
+    exist are dropped from the store; on an error nothing is stored and the
+    report is None. A PDF that PyPDF2 cannot open has no page fingerprints
+    and is scanned whole by the other backends, without a report.
+    """
+    kind = file_kind(filename)
+    try:
+        if kind == 'pdf':
+            with stage('parse'):
+                pdf_document = open_document(open_stream(file_content), pdf_backends)
+            try:
+                page_count = len(pdf_document)
+                if not pdf_document.can_open('pypdf2'):
+                    return extract_pdf_pages(pdf_document, filename, 1, page_count, keywords), None
+                results, reused = pdf_page_revision(pdf_document, filename, 1, page_count, keywords, units, document)
+            finally:
+                pdf_document.close()
+            labels = list(range(1, page_count + 1))
+            units.prune(document, [f'Page {page_num}' for page_num in labels])
+            return results, unit_report(filename, 'page', labels, reused)
+        
+        results, reused, labels = process_excel_revision(file_content, filename, keywords, units, document)
+        units.prune(document, [f'Sheet {name}' for name in labels])
+        return results, unit_report(filename, 'sheet', labels, reused)
+    except Exception as e:
+        return [{'error': f'Error processing {FILE_TYPE_LABELS[kind]} {filename}: {str(e)}'}], None
+
+def get_executor() -> Optional[IsolatedPool]:
+    """Return the shared parsing pool, creating it on first use."""
+    global _executor
+    if PARSE_WORKERS > 0 and _executor is None:
+        _executor = IsolatedPool(PARSE_WORKERS, PARSE_TIMEOUT_SECONDS, PARSE_MEMORY_MB * 1024 * 1024)
+    return _executor
+
+async def run_in_pool(func, *args):
+    """Run a blocking parse function off the event loop.
+
+    In the worker pool the call is killed when it goes over the parse limits
+    and raises LimitExceeded; without workers it runs on a thread, unlimited.
+    """
+    pool = get_executor()
+    if pool is None:
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    try:
+        return await pool.run(func, *args)
+    except LimitExceeded as e:
+        parse_limits_exceeded.inc((e.limit,))
+        raise
+
+def should_split_pdf(filename: str, size: int) -> bool:
+    """Splitting only pays off for large PDFs when there are several workers to share them."""
+    return filename.lower().endswith('.pdf') and PARSE_WORKERS > 1 and size > PDF_SPLIT_BYTES
+
+def spool_to_disk(file_content: Union[bytes, BinaryIO]) -> str:
+    """Write a file to a named temporary file that worker processes can open."""
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as handle:
+        if isinstance(file_content, (bytes, bytearray)):
+            handle.write(file_content)
+        else:
+            shutil.copyfileobj(file_content, handle)
+    return handle.name
+
+def merge_stages(*timings: Dict[str, float]) -> Dict[str, float]:
+    """Sum stage seconds (or counts) recorded by several timed() calls."""
+    merged: Dict[str, float] = {}
+    for timing in timings:
+        for name, value in timing.items():
+            merged[name] = merged.get(name, 0) + value
+    return merged
+
+async def gather_or_cancel(*calls) -> List[Any]:
+    """asyncio.gather(), except that the first failure cancels the other calls and waits for them to stop."""
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+async def process_pdf_split(file_content: Union[bytes, BinaryIO], filename: str, keywords: Sequence[str],
+                            units: Optional[UnitStore] = None, document: Optional[str] = None,
+                            pdf_backends: Sequence[str] = PDF_BACKENDS):
+    """Process a large PDF as page ranges spread across the worker pool.
+
+    The PDF is written to disk once so every worker opens it by path instead
+    of receiving its own pickled copy. Ranges are gathered in page order, so
+    the results match what process_pdf returns for the whole file. Returns
+    (results, stage seconds, counts, unit report) where the first three are
+    like timed(); stage times are summed across workers. A range that fails
+    cancels the others before the spooled file is removed. With a unit store,
+    each range reuses its unchanged pages (see process_revision); otherwise,
+    or when PyPDF2 cannot open the file to fingerprint its pages, the
+    report is None.
+    """
+    path = await asyncio.to_thread(spool_to_disk, file_content)
+    try:
+        (page_count, fingerprinted), seconds, counts = await run_in_pool(timed, inspect_pdf, path, pdf_backends)
+        seconds = {'parse': sum(seconds.values())}
+        ranges = [
+            (first_page, min(first_page + PDF_PAGES_PER_TASK - 1, page_count))
+            for first_page in range(1, page_count + 1, PDF_PAGES_PER_TASK)
+        ]
+        if units is None or not fingerprinted:
+            page_results = await gather_or_cancel(*[
+                run_in_pool(timed, process_pdf_pages, path, filename, first_page, last_page, keywords, pdf_backends)
+                for first_page, last_page in ranges
+            ])
+            report = None
+        else:
+            page_results = await gather_or_cancel(*[
+                run_in_pool(timed, process_pdf_page_revision, path, filename, first_page, last_page,
+                            keywords, units, document, pdf_backends)
+                for first_page, last_page in ranges
+            ])
+            reused = [page_num for (_, range_reused), _, _ in page_results for page_num in range_reused]
+            page_results = [(range_results, range_seconds, range_counts)
+                            for (range_results, _), range_seconds, range_counts in page_results]
+            await asyncio.to_thread(units.prune, document, [f'Page {page_num}' for page_num in range(1, page_count + 1)])
+            report = unit_report(filename, 'page', list(range(1, page_count + 1)), reused)
+        results = [result for results, _, _ in page_results for result in results]
+        seconds = merge_stages(seconds, *[range_seconds for _, range_seconds, _ in page_results])
+        counts = merge_stages(counts, *[range_counts for _, _, range_counts in page_results])
+        return results, seconds, counts, report
+    except Exception as e:
+        return [{'error': f'Error processing PDF {filename}: {str(e)}'}], {}, {}, None
+    finally:
+        os.unlink(path)
+
+def hash_content(file_content: Union[bytes, BinaryIO]) -> str:
+    """SHA-256 of a file's bytes; streams are rewound afterwards."""
+    if isinstance(file_content, (bytes, bytearray)):
+        return hashlib.sha256(file_content).hexdigest()
+    digest = hashlib.file_digest(file_content, 'sha256').hexdigest()
+    file_content.seek(0)
+    return digest
+
+async def lookup_cached(file_content: Union[bytes, BinaryIO], filename: str, kind: str, keyword_set: Dict[str, Any],
+                        pdf_backends: Sequence[str] = PDF_BACKENDS):
+    """Return (cache key, cached results or None) for a file scanned with a keyword set."""
+    parser = parser_id(kind, pdf_backends)
+    key = cache_key(await asyncio.to_thread(hash_content, file_content), parser, keyword_set['fingerprint'])
+    cached = await asyncio.to_thread(result_cache.get, key)
+    if cached is not None:
+        cached = rewrite_results(cached, filename)
+    return key, cached
+
+def new_file_timing(filename: str) -> Dict[str, Any]:
+    """Per-file entry of the /analyze timings block, filled in by analyze_document."""
+    return {
+        'filename': filename,
+        'format': file_kind(filename) or 'unsupported',
+        'bytes': 0,
+        'cached': False,
+        'stages_ms': {},
+        'counts': {}
+    }
+
+def record_stage(timing: Dict[str, Any], name: str, seconds: float):
+    """Add a stage to a file's timing entry and to the stage histogram."""
+    timing['stages_ms'][name] = round(timing['stages_ms'].get(name, 0) + seconds * 1000, 3)
+    stage_seconds.observe(seconds, (name, timing['format']))
+
+def record_file(timing: Dict[str, Any], results: List[Dict[str, Any]]):
+    """Count one analyzed file in the byte, page and file metrics."""
+    kind = timing['format']
+    if any('error' in result for result in results):
+        outcome = 'error'
+    else:
+        outcome = 'cached' if timing['cached'] else 'parsed'
+    files_processed.inc((kind, outcome))
+    bytes_processed.inc((kind,), timing['bytes'])
+    if timing['counts'].get('pages'):
+        pages_processed.inc((kind,), timing['counts']['pages'])
+
+async def analyze_document(file_content: Union[bytes, BinaryIO], filename: str, size: int,
+                           timing: Dict[str, Any], keyword_set: Dict[str, Any],
+                           pdf_backends: Sequence[str] = PDF_BACKENDS) -> List[Dict[str, Any]]:
+    """Return the matches for one file, from the result cache when possible.
+
+    Stage times and unit counts are recorded in `timing` (see new_file_timing)
+    and in the /metrics histograms. PDF text is extracted by the pdf_backends
+    chain.
+    """
+    timing['bytes'] = size
+    kind = file_kind(filename)
+    if kind is None:
+        results = [{'error': f'Unsupported file type: {filename}'}]
+        record_file(timing, results)
         return results
+    
+    started = time.perf_counter()
+    key, cached = await lookup_cached(file_content, filename, kind, keyword_set, pdf_backends)
+    record_stage(timing, 'cache_lookup', time.perf_counter() - started)
+    if cached is not None:
+        timing['cached'] = True
+        record_file(timing, cached)
+        return cached
+    
+    keywords = keyword_set['keywords']
+    # PDFs and workbooks are scanned page by page (sheet by sheet) against the
+    # unit store, so a revision of a document only rescans what changed
+    units = get_unit_store() if kind in ('pdf', 'excel') else None
+    document = document_key(filename, parser_id(kind, pdf_backends), keyword_set['fingerprint'])
+    report = None
+    
+    if should_split_pdf(filename, size):
+        results, seconds, counts, report = await process_pdf_split(file_content, filename, keywords, units, document,
+                                                                   pdf_backends)
+    else:
+        # The thread pool reads straight from a spooled upload
+        if get_executor() is not None and not isinstance(file_content, (bytes, bytearray)):
+            started = time.perf_counter()
+            file_content = await asyncio.to_thread(file_content.read)
+            record_stage(timing, 'read', time.perf_counter() - started)
+        try:
+            if units is None:
+                results, seconds, counts = await run_in_pool(
+                    timed, process_file, file_content, filename, keywords, pdf_backends)
+            else:
+                (results, report), seconds, counts = await run_in_pool(
+                    timed, process_revision, file_content, filename, keywords, units, document, pdf_backends)
+        except LimitExceeded as e:
+            # The worker was killed; the rest of the batch is unaffected
+            results, seconds, counts = [{'error': f'Error processing {FILE_TYPE_LABELS[kind]} {filename}: {e}'}], {}, {}
+    
+    if report is not None:
+        timing['incremental'] = report
+    for name, stage_time in seconds.items():
+        record_stage(timing, name, stage_time)
+    timing['counts'] = counts
+    record_file(timing, results)
+    
+    # Errors may be transient, so only clean results are cached
+    if not any('error' in result for result in results):
+        await asyncio.to_thread(result_cache.put, key, results)
+    return results
+
+async def summarize_document(file_content: Union[bytes, BinaryIO], filename: str, size: int,
+                             timing: Dict[str, Any], keyword_set: Dict[str, Any], top_n: int,
+                             pdf_backends: Sequence[str] = PDF_BACKENDS) -> MatchSummary:
+    """Return the MatchSummary of one file, for ?format=summary.
+
+    Cached results are folded in directly. Otherwise the worker scans the file
+    with summarize_file(), so its result list is never built; that result is
+    not cached, and the unit store and PDF splitting are not used.
+    """
+    timing['bytes'] = size
+    keywords = keyword_set['keywords']
+    summary = MatchSummary(keywords, top_n)
+    kind = file_kind(filename)
+    if kind is None:
+        summary.add_results([{'error': f'Unsupported file type: {filename}'}])
+        record_file(timing, summary.errors)
+        return summary
+    
+    started = time.perf_counter()
+    _, cached = await lookup_cached(file_content, filename, kind, keyword_set, pdf_backends)
+    record_stage(timing, 'cache_lookup', time.perf_counter() - started)
+    if cached is not None:
+        timing['cached'] = True
+        summary.add_results(cached)
+    else:
+        if get_executor() is not None and not isinstance(file_content, (bytes, bytearray)):
+            started = time.perf_counter()
+            file_content = await asyncio.to_thread(file_content.read)
+            record_stage(timing, 'read', time.perf_counter() - started)
+        try:
+            summary, seconds, counts = await run_in_pool(
+                timed, summarize_file, file_content, filename, keywords, top_n, pdf_backends)
+        except LimitExceeded as e:
+            summary.add_results([{'error': f'Error processing {FILE_TYPE_LABELS[kind]} {filename}: {e}'}])
+            seconds, counts = {}, {}
+        for name, stage_time in seconds.items():
+            record_stage(timing, name, stage_time)
+        timing['counts'] = counts
+    record_file(timing, summary.errors)
+    return summary
+
+def decoded_size(content: str) -> int:
+    """Bytes a base64 string decodes to, without decoding it."""
+    return len(content) * 3 // 4 - content.count('=', max(len(content) - 2, 0))
+
+def oversized_file(filename: str, size: int) -> Optional[Dict[str, Any]]:
+    """The error entry for a file over MAX_FILE_MB, or None if it is within the limit."""
+    if MAX_FILE_MB > 0 and size > MAX_FILE_MB * 1024 * 1024:
+        return {'error': f'File too large: {filename} is {size} bytes, the limit is {MAX_FILE_MB} MB'}
+    return None
+
+async def admit(sizes: Sequence[int], endpoint: str) -> Reservation:
+    """Reserve the decoded bytes of a request's files in the admission budget, or raise 413/429."""
+    within_limit = [size for size in sizes if MAX_FILE_MB <= 0 or size <= MAX_FILE_MB * 1024 * 1024]
+    try:
+        return await admission.reserve(sum(within_limit))
+    except BudgetExceeded as e:
+        admission_rejected.inc((endpoint, str(e.status)))
+        headers = {'Retry-After': str(e.retry_after)} if e.retry_after is not None else None
+        raise HTTPException(status_code=e.status, detail=e.detail, headers=headers)
+
+async def process_encoded(file_data: FileData, timing: Dict[str, Any], keyword_set: Dict[str, Any],
+                          pdf_backends: Sequence[str] = PDF_BACKENDS,
+                          top_n: Optional[int] = None) -> Union[List[Dict[str, Any]], MatchSummary]:
+    """Decode and analyze one base64 file from an /analyze request, once a parse slot is free.
+
+    With top_n the file is summarized (see summarize_document) instead.
+    """
+    size = decoded_size(file_data.content)
+    oversized = oversized_file(file_data.filename, size)
+    if oversized is not None:
+        timing['bytes'] = size
+        return [oversized]
+    
+    async with admission.parse_slot():
+        started = time.perf_counter()
+        file_content = await asyncio.to_thread(base64.b64decode, file_data.content)
+        record_stage(timing, 'decode', time.perf_counter() - started)
+        if top_n is not None:
+            return await summarize_document(file_content, file_data.filename, len(file_content), timing, keyword_set,
+                                            top_n, pdf_backends)
+        return await analyze_document(file_content, file_data.filename, len(file_content), timing, keyword_set,
+                                      pdf_backends)
+
+def stream_file(file_content: bytes, filename: str, keywords: Sequence[str], batches, index: int,
+                pdf_backends: Sequence[str] = PDF_BACKENDS):
+    """Put (index, batch) on batches for every batch of matches, then (index, None); runs inside a worker."""
+    kind = file_kind(filename)
+    try:
+        for batch in iter_file(file_content, filename, keywords, pdf_backends):
+            if batch:
+                batches.put((index, batch))
     except Exception as e:
-        return [{'error': f'Error processing Excel {filename}: {str(e)}'}]
+        batches.put((index, [{'error': f'Error processing {FILE_TYPE_LABELS[kind]} {filename}: {str(e)}'}]))
+    finally:
+        batches.put((index, None))
 
-def process_word(file_content: bytes, filename: str) -> List[Dict[str, Any]]:
-    """Process Word document and extract keyword matches."""
+def get_stream_queue():
+    """Return a queue that worker processes (or threads, without a pool) can put batches on."""
+    global _manager
+    if get_executor() is None:
+        return queue.Queue()
+    if _manager is None:
+        _manager = multiprocessing.Manager()
+    return _manager.Queue()
+
+def next_batch(batches) -> Tuple[Optional[int], Optional[List[Dict[str, Any]]]]:
+    """Wait for the next (index, batch) on the stream queue; (None, None) when nothing came in time.
+
+    The wait is bounded so a stream whose workers were killed never keeps
+    its thread blocked for good.
+    """
+    try:
+        return batches.get(timeout=STREAM_POLL_SECONDS)
+    except queue.Empty:
+        return None, None
+
+async def stream_encoded(file_data: FileData, keyword_set: Dict[str, Any], index: int, batches,
+                         pdf_backends: Sequence[str] = PDF_BACKENDS) -> Optional[str]:
+    """Feed one base64 file's batches into the stream queue; returns its cache key on a miss."""
+    try:
+        oversized = oversized_file(file_data.filename, decoded_size(file_data.content))
+        if oversized is not None:
+            await asyncio.to_thread(batches.put, (index, [oversized]))
+        else:
+            async with admission.parse_slot():
+                file_content = await asyncio.to_thread(base64.b64decode, file_data.content)
+                kind = file_kind(file_data.filename)
+                if kind is None:
+                    await asyncio.to_thread(batches.put, (index, [{'error': f'Unsupported file type: {file_data.filename}'}]))
+                else:
+                    key, cached = await lookup_cached(file_content, file_data.filename, kind, keyword_set, pdf_backends)
+                    if cached is None:
+                        # The worker sends its own end marker
+                        await run_in_pool(stream_file, file_content, file_data.filename, keyword_set['keywords'],
+                                          batches, index, pdf_backends)
+                        return key
+                    await asyncio.to_thread(batches.put, (index, cached))
+    except Exception as e:
+        await asyncio.to_thread(batches.put, (index, [{'error': f'Error processing {file_data.filename}: {str(e)}'}]))
+    await asyncio.to_thread(batches.put, (index, None))
+    return None
+
+async def stream_results(files: List[FileData], keyword_set: Dict[str, Any], reservation: Reservation,
+                         pdf_backends: Sequence[str] = PDF_BACKENDS):
+    """Yield NDJSON lines: every match as soon as its batch is found, then one summary record.
+
+    The request's admission reservation is released when the stream ends.
+    """
+    started = time.perf_counter()
+    first_result_ms = None
+    total_matches = 0
+    keywords = set()
+    
+    batches = get_stream_queue()
+    tasks = [
+        asyncio.create_task(stream_encoded(file_data, keyword_set, index, batches, pdf_backends))
+        for index, file_data in enumerate(files)
+    ]
+    # Matches of each file are kept only until it finishes, so clean results can be cached, and
+    # dropped (None) as soon as they grow past what the result cache would keep of one file
+    max_entry_bytes = result_cache.max_entry_bytes()
+    collected: Dict[int, Optional[List[Dict[str, Any]]]] = {index: [] for index in range(len(files))}
+    collected_bytes = dict.fromkeys(range(len(files)), 0)
+    
     try:
-        doc = Document(io.BytesIO(file_content))
-        results = []
+        remaining = len(files)
+        while remaining:
+            index, batch = await asyncio.to_thread(next_batch, batches)
+            if index not in collected:
+                # Nothing yet, or late messages for a file that already finished
+                continue
+            if batch is None:
+                remaining -= 1
+                key = await tasks[index]
+                results = collected.pop(index)
+                if key is not None and results is not None and not any('error' in result for result in results):
+                    await asyncio.to_thread(result_cache.put, key, results)
+                continue
+            
+            if first_result_ms is None:
+                first_result_ms = round((time.perf_counter() - started) * 1000, 1)
+            lines = [json.dumps(result) + '\n' for result in batch]
+            if collected[index] is not None:
+                collected_bytes[index] += sum(len(line) for line in lines)
+                if collected_bytes[index] > max_entry_bytes:
+                    collected[index] = None
+                else:
+                    collected[index].extend(batch)
+            for result in batch:
+                if 'error' not in result:
+                    total_matches += 1
+                    keywords.add(result['keyword'])
+            yield ''.join(lines)
         
-        for para_num, paragraph in enumerate(doc.paragraphs, 1):
-            if paragraph.text.strip():
-                matches = extract_sentences_from_text(paragraph.text, KEYWORDS)
-                
-                for match in matches:
-                    results.append({
-                        'file_path': filename,
-                        'source_type': 'paragraph',
-                        'source_name': f'Paragraph {para_num}',
-                        'location': f'Paragraph {para_num}',
-                        'keyword': match['keyword'],
-                        'exact_sentence': match['sentence'],
-                        'partner': filename.split('.')[0]
-                    })
+        yield json.dumps({'summary': {
+            'total_matches': total_matches,
+            'files_processed': len(files),
+            'keywords_found': len(keywords),
+            'keyword_set': {'name': keyword_set['name'], 'version': keyword_set['version']},
+            'time_to_first_result_ms': first_result_ms,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }}) + '\n'
+    finally:
+        for task in tasks:
+            task.cancel()
+        # A cancelled worker never sends its end marker; wake the reader if it is still waiting
+        batches.put((None, None))
+        reservation.release()
+
+def get_unit_store() -> Optional[UnitStore]:
+    """Return the per-page/per-sheet match store, or None when UNIT_STORE_MB is 0."""
+    global _unit_store
+    if UNIT_STORE_MB <= 0:
+        return None
+    if _unit_store is None:
+        _unit_store = UnitStore(UNIT_STORE_DIR, UNIT_STORE_MB * 1024 * 1024)
+    return _unit_store
+
+def get_sentence_index() -> SentenceIndex:
+    global _sentence_index
+    if _sentence_index is None:
+        _sentence_index = SentenceIndex(INDEX_DIR)
+    return _sentence_index
+
+def get_keyword_store() -> KeywordSetStore:
+    global _keyword_store
+    if _keyword_store is None:
+        _keyword_store = KeywordSetStore(KEYWORD_SETS_DIR, KEYWORD_SET_CACHE)
+    return _keyword_store
+
+async def resolve_keyword_set(name: Optional[str], version: Optional[int]) -> Dict[str, Any]:
+    """Return the requested keyword set version (latest of 'default' when none is named), or 404."""
+    keyword_set = await asyncio.to_thread(get_keyword_store().resolve, name, version)
+    if keyword_set is None:
+        raise HTTPException(status_code=404, detail="Keyword set not found")
+    return keyword_set
+
+def resolve_pdf_backends(name: Optional[str]) -> Tuple[str, ...]:
+    """The configured PDF backend chain with the requested backend first, or 400 if it cannot be used."""
+    if name is None:
+        return PDF_BACKENDS
+    if not is_available(name):
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown PDF backend: {name}, available: {', '.join(available_backends())}")
+    return (name,) + tuple(backend for backend in PDF_BACKENDS if backend != name)
+
+def describe_keyword_set(keyword_set: Dict[str, Any]) -> Dict[str, Any]:
+    """A keyword set as returned by the /keyword-sets endpoints."""
+    return dict(keyword_set, keywords=list(keyword_set['keywords']))
+
+def get_job_store() -> JobStore:
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore(JOBS_DIR)
+    return _job_store
+
+def get_job_executor():
+    """Return the pool that runs background jobs, kept apart from interactive requests."""
+    global _job_executor
+    if JOB_WORKERS > 0 and _job_executor is None:
+        _job_executor = ProcessPoolExecutor(max_workers=JOB_WORKERS)
+    return _job_executor
+
+def process_job_file(jobs_dir: str, job_id: str, file_index: int, filename: str, keywords: Sequence[str]):
+    """Scan one stored job file, recording matches and progress batch by batch; runs inside a worker."""
+    store = JobStore(jobs_dir)
+    kind = file_kind(filename)
+    if kind is None:
+        store.start_file(job_id, file_index, None)
+        store.finish_file(job_id, file_index, f'Unsupported file type: {filename}')
+        return
+    
+    path = store.file_path(job_id, file_index)
+    try:
+        if kind == 'pdf':
+            store.start_file(job_id, file_index, 'page', count_pdf_pages(path))
+        else:
+            store.start_file(job_id, file_index, 'batch')
         
-        return results
+        with open(path, 'rb') as handle:
+            for batch in ITERATORS[kind](handle, filename, keywords):
+                store.add_results(job_id, file_index, batch)
+        store.finish_file(job_id, file_index)
     except Exception as e:
-        return [{'error': f'Error processing Word {filename}: {str(e)}'}]
+        store.finish_file(job_id, file_index, f'Error processing {FILE_TYPE_LABELS[kind]} {filename}: {str(e)}')
+
+async def run_job(job_id: str):
+    """Parse every unfinished file of a job on the job pool, then delete its stored files.
+
+    A job cancelled on the way, as on shutdown, stays running with its files
+    kept, so it is resumed at the next startup.
+    """
+    store = get_job_store()
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.to_thread(store.set_job_status, job_id, 'running')
+        pending = await asyncio.to_thread(store.pending_files, job_id)
+        keywords = tuple(await asyncio.to_thread(store.job_keywords, job_id))
+        await asyncio.gather(*[
+            loop.run_in_executor(get_job_executor(), process_job_file, store.directory, job_id, file_index, filename, keywords)
+            for file_index, filename in pending
+        ])
+        status, error = 'completed', None
+    except Exception as e:
+        status, error = 'failed', str(e)
+    await asyncio.to_thread(store.set_job_status, job_id, status, error)
+    await asyncio.to_thread(shutil.rmtree, os.path.join(store.directory, job_id), True)
+
+def start_job(job_id: str):
+    """Run a job in the background, holding a reference so the task is not collected."""
+    task = asyncio.create_task(run_job(job_id))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+
+def save_upload(upload: UploadFile, path: str):
+    with open(path, 'wb') as handle:
+        shutil.copyfileobj(upload.file, handle)
+
+def json_response(content: Dict[str, Any], started: float, file_timings: Optional[List[Dict[str, Any]]] = None,
+                  response_format: str = 'records') -> Response:
+    """Serialize a response body the way JSONResponse does, timing the serialization.
+
+    With response_format 'columnar' the results are converted by
+    columnar.encode_results() and the body is written by columnar.dumps();
+    the conversion counts as serialization time. A 'summary' body is
+    already built and is written as plain JSON. When file_timings is given,
+    a "timings" field with them plus serialize_ms and total_ms (since
+    `started`) is appended to the body.
+    """
+    serialize_started = time.perf_counter()
+    if response_format == 'columnar':
+        content = dict(content, format='columnar', results=columnar.encode_results(content['results']))
+        body = columnar.dumps(content)
+    else:
+        body = json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode('utf-8')
+    finished = time.perf_counter()
+    stage_seconds.observe(finished - serialize_started, ('serialize', 'response'))
+    if file_timings is not None:
+        timings = {
+            'total_ms': round((finished - started) * 1000, 3),
+            'serialize_ms': round((finished - serialize_started) * 1000, 3),
+            'files': file_timings
+        }
+        body = body[:-1] + b',"timings":' + json.dumps(timings, ensure_ascii=False, separators=(",", ":")).encode('utf-8') + b'}'
+    return Response(body, media_type="application/json")
+
+def summarize_results(all_results: List[Dict[str, Any]], files_processed: int, keyword_set: Dict[str, Any],
+                      file_timings: Sequence[Dict[str, Any]] = ()) -> Dict[str, Any]:
+    """Build the /analyze response from the combined per-file results.
+
+    "incremental" lists the reused and rescanned pages or sheets of every
+    PDF and workbook scanned against the unit store.
+    """
+    # Statistics in one pass over the results, skipping error entries
+    total_matches = 0
+    keywords = set()
+    for result in all_results:
+        if 'error' not in result:
+            total_matches += 1
+            keywords.add(result['keyword'])
+    
+    return {
+        'total_matches': total_matches,
+        'files_processed': files_processed,
+        'keywords_found': len(keywords),
+        'keyword_set': {'name': keyword_set['name'], 'version': keyword_set['version']},
+        'incremental': [timing['incremental'] for timing in file_timings if 'incremental' in timing],
+        'results': all_results
+    }
+
+def summary_response(filenames: Sequence[str], file_results: Sequence[Union[List[Dict[str, Any]], MatchSummary]],
+                     keyword_set: Dict[str, Any], top_n: int) -> Dict[str, Any]:
+    """Build the ?format=summary response by merging per-file summaries (or error entries) in upload order."""
+    summary = MatchSummary(keyword_set['keywords'], top_n)
+    for filename, file_result in zip(filenames, file_results):
+        summary.start_file(filename, filename.split('.')[0])
+        if isinstance(file_result, MatchSummary):
+            summary.merge(file_result)
+        else:
+            summary.add_results(file_result)
+    return {
+        'total_matches': summary.total_matches,
+        'files_processed': len(filenames),
+        'keywords_found': len(summary.by_keyword),
+        'keyword_set': {'name': keyword_set['name'], 'version': keyword_set['version']},
+        'format': 'summary',
+        **summary.to_dict()
+    }
 
 @app.get("/")
 async def root():
     return {"message": "EO Compliance Analysis API"}
 
+@app.get("/metrics")
+async def metrics():
+    """Stage latency histograms, byte/page/file counters, in-flight requests and admission budget use in the Prometheus text format."""
+    budget = admission.stats()
+    admission_bytes.set(('in_use',), budget['bytes_in_use'])
+    admission_bytes.set(('limit',), budget['max_bytes'])
+    admission_parses.set(('active',), budget['parses_active'])
+    admission_parses.set(('waiting',), budget['parses_waiting'])
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admission")
+async def admission_stats():
+    """Admission budget size and use: bytes reserved, requests waiting, parses running and queued, rejections."""
+    return dict(admission.stats(), max_file_bytes=MAX_FILE_MB * 1024 * 1024, max_wait_seconds=ADMISSION_WAIT_SECONDS)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Result cache hit/miss counts and tier sizes."""
+    return await asyncio.to_thread(result_cache.stats)
+
 @app.post("/analyze")
-async def analyze_files(request: AnalyzeRequest):
-    """Analyze uploaded files for compliance keywords."""
-    try:
-        if not request.files:
-            raise HTTPException(status_code=400, detail="No files provided")
-        
-        all_results = []
-        
-        for file_data in request.files:
-            filename = file_data.filename
-            file_content = base64.b64decode(file_data.content)
+async def analyze_files(request: AnalyzeRequest, timings: bool = Query(False),
+                        response_format: str = Query('records', alias='format', pattern='^(records|columnar|summary)$'),
+                        top: int = Query(5, ge=0, le=SUMMARY_TOP_MAX)):
+    """Analyze uploaded files for compliance keywords.
+
+    Files are scanned with the latest version of the 'default' keyword set
+    unless the request names keyword_set (and optionally keyword_set_version).
+
+    With ?timings=true the response also carries a "timings" block with the
+    per-file stage breakdown (decode, cache lookup, parse, extract, match)
+    plus serialization and total time.
+
+    With ?format=columnar "results" is column arrays with dictionary-encoded
+    strings instead of a list of dicts (see columnar.py).
+
+    With ?format=summary there is no "results": matches are counted by
+    keyword, partner and file as they are found and only the ?top= best
+    matches per keyword are kept (see match_summary.py).
+
+    pdf_backend names the PDF text extractor to try first (see pdf_backends.py);
+    the PDF_BACKENDS chain follows it as fallback.
+
+    The decoded size of the files is reserved in the admission budget first;
+    see admit().
+    """
+    started = time.perf_counter()
+    reservation = None
+    with requests_in_flight.track(('/analyze',)):
+        try:
+            if not request.files:
+                raise HTTPException(status_code=400, detail="No files provided")
             
-            # Process based on file extension
-            if filename.lower().endswith('.pdf'):
-                results = process_pdf(file_content, filename)
-            elif filename.lower().endswith('.xlsx') or filename.lower().endswith('.xls'):
-                results = process_excel(file_content, filename)
-            elif filename.lower().endswith('.docx'):
-                results = process_word(file_content, filename)
-            else:
-                results = [{'error': f'Unsupported file type: {filename}'}]
+            pdf_backends = resolve_pdf_backends(request.pdf_backend)
+            reservation = await admit([decoded_size(file_data.content) for file_data in request.files], '/analyze')
+            keyword_set = await resolve_keyword_set(request.keyword_set, request.keyword_set_version)
             
-            all_results.extend(results)
-        
-        # Filter out error results for statistics
-        valid_results = [r for r in all_results if 'error' not in r]
-        
-        # Create summary statistics
-        summary_stats = {
-            'total_matches': len(valid_results),
-            'files_processed': len(request.files),
-            'keywords_found': len(set(result.get('keyword', '') for result in valid_results if 'keyword' in result)),
-            'results': all_results
-        }
+            # Decode and parse every file concurrently; gather keeps upload order
+            file_timings = [new_file_timing(file_data.filename) for file_data in request.files]
+            top_n = top if response_format == 'summary' else None
+            file_results = await asyncio.gather(*[
+                process_encoded(file_data, timing, keyword_set, pdf_backends, top_n)
+                for file_data, timing in zip(request.files, file_timings)
+            ])
+            if top_n is not None:
+                summary = summary_response([file_data.filename for file_data in request.files], file_results,
+                                           keyword_set, top_n)
+            else:
+                all_results = [result for results in file_results for result in results]
+                summary = summarize_results(all_results, len(request.files), keyword_set, file_timings)
+            return json_response(summary, started, file_timings if timings else None, response_format)
         
-        return summary_stats
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        finally:
+            if reservation is not None:
+                reservation.release()
+            request_seconds.observe(time.perf_counter() - started, ('/analyze',))
+
+async def process_upload(upload: UploadFile, slots: asyncio.Semaphore, timing: Dict[str, Any],
+                         keyword_set: Dict[str, Any], pdf_backends: Sequence[str] = PDF_BACKENDS,
+                         top_n: Optional[int] = None) -> Union[List[Dict[str, Any]], MatchSummary]:
+    """Analyze (with top_n, summarize) one uploaded file, holding its bytes in memory only while a worker is free."""
+    oversized = oversized_file(upload.filename or '', upload.size or 0)
+    if oversized is not None:
+        timing['bytes'] = upload.size
+        await upload.close()
+        return [oversized]
     
+    async with slots, admission.parse_slot():
+        try:
+            if top_n is not None:
+                return await summarize_document(upload.file, upload.filename or '', upload.size or 0, timing,
+                                                keyword_set, top_n, pdf_backends)
+            return await analyze_document(upload.file, upload.filename or '', upload.size or 0, timing, keyword_set,
+                                          pdf_backends)
+        finally:
+            await upload.close()
+
+@app.post("/analyze/stream")
+async def analyze_files_stream(request: AnalyzeRequest):
+    """Analyze files like /analyze, streaming matches as newline-delimited JSON.
+
+    Each line is one match (or error) in the /analyze result schema, sent as
+    soon as the page, sheet chunk or paragraph chunk holding it is scanned.
+    The last line is {"summary": {...}} with the /analyze statistics plus
+    time_to_first_result_ms and elapsed_ms.
+    """
+    if not request.files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    pdf_backends = resolve_pdf_backends(request.pdf_backend)
+    reservation = await admit([decoded_size(file_data.content) for file_data in request.files], '/analyze/stream')
+    try:
+        keyword_set = await resolve_keyword_set(request.keyword_set, request.keyword_set_version)
     except HTTPException:
+        reservation.release()
         raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    # The background task covers a client that leaves before the stream starts. It is a
+    # coroutine so the release runs on the event loop: the budget is not thread-safe
+    async def release():
+        reservation.release()
+    return StreamingResponse(stream_results(request.files, keyword_set, reservation, pdf_backends),
+                             media_type="application/x-ndjson", background=BackgroundTask(release))
+
+@app.post("/analyze/upload")
+async def analyze_uploads(files: List[UploadFile] = File(...), timings: bool = Query(False),
+                          keyword_set: Optional[str] = Query(None), keyword_set_version: Optional[int] = Query(None),
+                          response_format: str = Query('records', alias='format', pattern='^(records|columnar|summary)$'),
+                          top: int = Query(5, ge=0, le=SUMMARY_TOP_MAX), pdf_backend: Optional[str] = Query(None)):
+    """Analyze files sent as multipart/form-data.
+
+    Uploads are spooled to disk by the multipart parser, so there is no base64
+    decode and a file is only read into memory when a worker picks it up.
+    Accepts ?timings=true, ?format=, ?top=, ?keyword_set=, ?keyword_set_version=
+    and ?pdf_backend= like /analyze.
+    """
+    started = time.perf_counter()
+    reservation = None
+    with requests_in_flight.track(('/analyze/upload',)):
+        try:
+            if not files:
+                raise HTTPException(status_code=400, detail="No files provided")
+            
+            pdf_backends = resolve_pdf_backends(pdf_backend)
+            reservation = await admit([upload.size or 0 for upload in files], '/analyze/upload')
+            selected_set = await resolve_keyword_set(keyword_set, keyword_set_version)
+            slots = asyncio.Semaphore(max(PARSE_WORKERS, 1))
+            file_timings = [new_file_timing(upload.filename or '') for upload in files]
+            top_n = top if response_format == 'summary' else None
+            file_results = await asyncio.gather(*[
+                process_upload(upload, slots, timing, selected_set, pdf_backends, top_n)
+                for upload, timing in zip(files, file_timings)
+            ])
+            if top_n is not None:
+                summary = summary_response([upload.filename or '' for upload in files], file_results, selected_set, top_n)
+            else:
+                all_results = [result for results in file_results for result in results]
+                summary = summarize_results(all_results, len(files), selected_set, file_timings)
+            return json_response(summary, started, file_timings if timings else None, response_format)
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        finally:
+            if reservation is not None:
+                reservation.release()
+            request_seconds.observe(time.perf_counter() - started, ('/analyze/upload',))
+
+async def index_upload(upload: UploadFile, slots: asyncio.Semaphore, index: SentenceIndex) -> Dict[str, Any]:
+    """Ingest one uploaded file into the sentence index unless the same bytes are already indexed."""
+    filename = upload.filename or ''
+    kind = file_kind(filename)
+    if kind is None:
+        await upload.close()
+        return {'file_path': filename, 'error': f'Unsupported file type: {filename}'}
+    oversized = oversized_file(filename, upload.size or 0)
+    if oversized is not None:
+        await upload.close()
+        return {'file_path': filename, **oversized}
+    
+    async with slots, admission.parse_slot():
+        try:
+            digest = await asyncio.to_thread(hash_content, upload.file)
+            if await asyncio.to_thread(index.is_current, filename, digest, parser_id(kind)):
+                return {'file_path': filename, 'status': 'unchanged'}
+            
+            file_content = upload.file
+            if get_executor() is not None:
+                file_content = await asyncio.to_thread(upload.file.read)
+            sentences = await run_in_pool(index_file, index, file_content, filename, digest)
+            return {'file_path': filename, 'status': 'indexed', 'sentences': sentences}
+        except Exception as e:
+            return {'file_path': filename, 'error': f'Error processing {FILE_TYPE_LABELS[kind]} {filename}: {str(e)}'}
+        finally:
+            await upload.close()
+
+@app.post("/index")
+async def index_documents(files: List[UploadFile] = File(...)):
+    """Split multipart-uploaded files into sentences and store them in the sentence index.
+
+    A file replaces the earlier version indexed under the same name; files
+    whose bytes are already indexed are reported as unchanged. GET /search
+    then runs any keyword list against every indexed document without
+    parsing them again.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    reservation = await admit([upload.size or 0 for upload in files], '/index')
+    try:
+        index = get_sentence_index()
+        slots = asyncio.Semaphore(max(PARSE_WORKERS, 1))
+        documents = await asyncio.gather(*[index_upload(upload, slots, index) for upload in files])
+        return {'documents': documents, 'index': await asyncio.to_thread(index.stats)}
+    finally:
+        reservation.release()
+
+@app.get("/index")
+async def index_stats():
+    """Number of indexed documents and sentences, and the size of the index file."""
+    return await asyncio.to_thread(get_sentence_index().stats)
+
+@app.delete("/index/{file_path:path}")
+async def remove_indexed_document(file_path: str):
+    if not await asyncio.to_thread(get_sentence_index().remove_document, file_path):
+        raise HTTPException(status_code=404, detail="Document not indexed")
+    return {'file_path': file_path, 'status': 'removed'}
+
+@app.get("/search")
+async def search_index(keyword: Optional[List[str]] = Query(None), keyword_set: Optional[str] = Query(None),
+                       keyword_set_version: Optional[int] = Query(None), file: Optional[List[str]] = Query(None),
+                       response_format: str = Query('records', alias='format', pattern='^(records|columnar)$')):
+    """Search every indexed document for a keyword list, returning matches in the /analyze schema.
+
+    Keywords come from ?keyword_set= (and ?keyword_set_version=), the latest
+    'default' set when neither is given, or from repeated ?keyword= terms.
+    Repeated ?file= limits the search to those indexed file names. Accepts
+    ?format= like /analyze.
+    """
+    started = time.perf_counter()
+    with requests_in_flight.track(('/search',)):
+        try:
+            if keyword:
+                if keyword_set is not None or keyword_set_version is not None:
+                    raise HTTPException(status_code=400, detail="Use either keyword or keyword_set, not both")
+                if any(not term.strip() for term in keyword):
+                    raise HTTPException(status_code=400, detail="Keywords cannot be empty")
+                selected_set = {'name': None, 'version': None, 'keywords': tuple(keyword)}
+            else:
+                selected_set = await resolve_keyword_set(keyword_set, keyword_set_version)
+            
+            results, documents = await asyncio.to_thread(get_sentence_index().search, selected_set['keywords'], file)
+            return json_response(summarize_results(results, documents, selected_set), started, None, response_format)
+        finally:
+            request_seconds.observe(time.perf_counter() - started, ('/search',))
+
+@app.get("/keyword-sets")
+async def list_keyword_sets():
+    """Every keyword set with its latest version number."""
+    return {'keyword_sets': await asyncio.to_thread(get_keyword_store().list_sets)}
+
+@app.post("/keyword-sets/{name}", status_code=201)
+async def create_keyword_set(name: str, request: KeywordSetRequest):
+    """Upload a keyword list as the next version of a named set.
+
+    The new version becomes the one used when requests name the set without
+    a version; uploading to 'default' changes what requests without a
+    keyword_set are scanned with. Earlier versions stay selectable.
+    """
+    error = validate_keyword_set(name, request.keywords)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    keyword_set = await asyncio.to_thread(get_keyword_store().create_version, name, request.keywords)
+    return describe_keyword_set(keyword_set)
+
+@app.get("/keyword-sets/{name}")
+async def get_keyword_set(name: str, version: Optional[int] = Query(None)):
+    """One version of a keyword set (the latest by default) and the versions available."""
+    keyword_set = await resolve_keyword_set(name, version)
+    versions = await asyncio.to_thread(get_keyword_store().versions, name)
+    return dict(describe_keyword_set(keyword_set), versions=versions)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(files: List[UploadFile] = File(...), keyword_set: Optional[str] = Query(None),
+                     keyword_set_version: Optional[int] = Query(None)):
+    """Queue multipart-uploaded files for background analysis and return the job id.
+
+    Files are stored on disk and parsed by a local worker pool, so large
+    batches finish without holding the request open. Poll GET /jobs/{job_id}
+    for progress and read matches from GET /jobs/{job_id}/results. The
+    keyword set is chosen with ?keyword_set= and ?keyword_set_version=.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    selected_set = await resolve_keyword_set(keyword_set, keyword_set_version)
+    store = get_job_store()
+    job_id = await asyncio.to_thread(store.create_job, [upload.filename or '' for upload in files], selected_set)
+    for file_index, upload in enumerate(files):
+        try:
+            await asyncio.to_thread(save_upload, upload, store.file_path(job_id, file_index))
+        finally:
+            await upload.close()
+    
+    start_job(job_id)
+    return {'job_id': job_id, 'status': 'queued'}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, per-file progress (pages for PDFs, result batches otherwise) and match statistics."""
+    job = await asyncio.to_thread(get_job_store().get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=JOB_RESULTS_PAGE_MAX)):
+    """One page of a job's results, in upload order, using the /analyze result schema."""
+    store = get_job_store()
+    if not await asyncio.to_thread(store.has_job, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    total, results = await asyncio.to_thread(store.get_results, job_id, offset, limit)
+    return {
+        'job_id': job_id,
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'results': results
+    }
 
 if __name__ == "__main__":
     import uvicorn
-    import os
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,87 @@
+import heapq
+from typing import List, Dict, Any, Iterable, Sequence, Tuple
+
+from keyword_matcher import get_matcher
+
+# (keywords in the sentence, -position of the match, match)
+RankedMatch = Tuple[int, int, Dict[str, Any]]
+
+
+class MatchSummary:
+    """Match counts by keyword, partner and file, plus the top matches per keyword.
+
+    Matches are folded in one at a time as they are produced and then
+    dropped, except for the top_n per keyword kept in a bounded min-heap, so
+    memory depends on the number of keywords, partners and files, never on
+    the number of matches. A match ranks higher the more distinct keywords
+    its sentence contains; ties go to the match that comes first, in the
+    order the full result list would have. Summaries of files scanned apart
+    (in workers) are combined with merge() in upload order.
+    """
+
+    def __init__(self, keywords: Sequence[str], top_n: int):
+        self.matcher = get_matcher(keywords)
+        self.top_n = top_n
+        self.total_matches = 0
+        self.by_keyword: Dict[str, int] = {}
+        self.by_partner: Dict[str, int] = {}
+        self.by_file: Dict[str, int] = {}
+        self.top: Dict[str, List[RankedMatch]] = {}
+        self.errors: List[Dict[str, Any]] = []
+
+    def start_file(self, file_path: str, partner: str):
+        """List a file, and its partner, even if none of its matches follow."""
+        self.by_file.setdefault(file_path, 0)
+        self.by_partner.setdefault(partner, 0)
+
+    def add_results(self, results: Iterable[Dict[str, Any]]):
+        """Fold in a batch of matches and error entries in the /analyze result schema."""
+        for result in results:
+            if 'error' in result:
+                self.errors.append(result)
+                continue
+            keyword = result['keyword']
+            self.by_keyword[keyword] = self.by_keyword.get(keyword, 0) + 1
+            self.by_partner[result['partner']] = self.by_partner.get(result['partner'], 0) + 1
+            self.by_file[result['file_path']] = self.by_file.get(result['file_path'], 0) + 1
+            if self.top_n > 0:
+                score = self.matcher.count_keywords(result['exact_sentence'])
+                self._keep(keyword, (score, -self.total_matches, result))
+            self.total_matches += 1
+
+    def _keep(self, keyword: str, ranked: RankedMatch):
+        heap = self.top.setdefault(keyword, [])
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, ranked)
+        elif ranked[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, ranked)
+
+    def merge(self, other: 'MatchSummary'):
+        """Fold in the summary of the files that come after the ones already added."""
+        offset = self.total_matches
+        for counts, other_counts in ((self.by_keyword, other.by_keyword), (self.by_partner, other.by_partner),
+                                     (self.by_file, other.by_file)):
+            for name, count in other_counts.items():
+                counts[name] = counts.get(name, 0) + count
+        for keyword, heap in other.top.items():
+            for score, position, result in heap:
+                self._keep(keyword, (score, position - offset, result))
+        self.errors.extend(other.errors)
+        self.total_matches += other.total_matches
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Counts, keywords by descending count, and each keyword's top matches with their keywords_in_sentence."""
+        by_keyword = dict(sorted(self.by_keyword.items(), key=lambda item: -item[1]))
+        return {
+            'by_keyword': by_keyword,
+            'by_partner': self.by_partner,
+            'by_file': self.by_file,
+            'top_sentences': {
+                keyword: [
+                    dict(result, keywords_in_sentence=score)
+                    for score, _, result in sorted(self.top[keyword], key=lambda ranked: ranked[:2], reverse=True)
+                ]
+                for keyword in by_keyword if keyword in self.top
+            },
+            'errors': self.errors
+        }
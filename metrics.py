@@ -0,0 +1,161 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond matching up to multi-minute parses
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Per-call accumulators; only set while a timed() call is running in this thread
+_stage_seconds: ContextVar[Optional[Dict[str, float]]] = ContextVar('stage_seconds', default=None)
+_stage_counts: ContextVar[Optional[Dict[str, int]]] = ContextVar('stage_counts', default=None)
+
+
+def add_stage_time(stage: str, seconds: float):
+    """Add time to a stage of the current timed() call; a no-op outside one."""
+    stages = _stage_seconds.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def add_count(name: str, amount: int = 1):
+    """Add to a counter (pages, rows...) of the current timed() call; a no-op outside one."""
+    counts = _stage_counts.get()
+    if counts is not None:
+        counts[name] = counts.get(name, 0) + amount
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as one stage of the current timed() call."""
+    if _stage_seconds.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage_time(name, time.perf_counter() - start)
+
+
+def timed(func, *args):
+    """Call func(*args) and return (result, stage seconds, counts) recorded during the call.
+
+    Module-level so it can be sent to a worker process together with func.
+    """
+    seconds_token = _stage_seconds.set({})
+    counts_token = _stage_counts.set({})
+    try:
+        result = func(*args)
+        return result, _stage_seconds.get(), _stage_counts.get()
+    finally:
+        _stage_seconds.reset(seconds_token)
+        _stage_counts.reset(counts_token)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, label_values: Tuple[str, ...] = (), amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, label_values: Tuple[str, ...] = (), amount: float = 1):
+        self.inc(label_values, -amount)
+
+    def set(self, label_values: Tuple[str, ...] = (), value: float = 0):
+        with self._lock:
+            self._values[label_values] = value
+
+    @contextmanager
+    def track(self, label_values: Tuple[str, ...] = ()) -> Iterator[None]:
+        """Raise the gauge for the duration of a block."""
+        self.inc(label_values)
+        try:
+            yield
+        finally:
+            self.dec(label_values)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, label_values: Tuple[str, ...] = ()):
+        with self._lock:
+            counts, total, count = self._values.get(label_values, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[label_values] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+                labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f'{self.name}_bucket{labels} {count}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labels, label_values)} {total}')
+                lines.append(f'{self.name}_count{_format_labels(self.labels, label_values)} {count}')
+        return lines
+
+
+class Registry:
+    """The set of metrics served on /metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,212 @@
+"""
+PDF text-extraction backends.
+
+Each backend opens a PDF (bytes, a path or a binary stream) and returns the
+text of one page at a time. The libraries are imported when a backend is
+first opened, so only PyPDF2 is required; pypdf, pdfminer.six and
+pypdfium2 are used when they are installed. open_document() chains
+backends: when one fails to open the file or to extract a page, the next
+one in the list takes over.
+"""
+
+import importlib.util
+import io
+from typing import List, Any, BinaryIO, Dict, Optional, Sequence, Union
+
+from metrics import add_count
+
+Source = Union[bytes, str, BinaryIO]
+
+
+def _rewind(source: Source) -> Source:
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if not isinstance(source, str):
+        source.seek(0)
+    return source
+
+
+class PyPDF2Backend:
+    """PyPDF2 3.x, the original extractor and the default."""
+
+    def __init__(self, source: Source):
+        from PyPDF2 import PdfReader
+
+        self.reader = PdfReader(_rewind(source))
+
+    def __len__(self) -> int:
+        return len(self.reader.pages)
+
+    def page_text(self, index: int) -> str:
+        return self.reader.pages[index].extract_text()
+
+    def close(self):
+        pass
+
+
+class PypdfBackend(PyPDF2Backend):
+    """pypdf, the maintained successor of PyPDF2, which copes with more malformed files."""
+
+    def __init__(self, source: Source):
+        from pypdf import PdfReader
+
+        self.reader = PdfReader(_rewind(source))
+
+
+class PdfminerBackend:
+    """pdfminer.six layout analysis; slow, but recovers reading order on complex layouts."""
+
+    def __init__(self, source: Source):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        source = _rewind(source)
+        self._handle = open(source, 'rb') if isinstance(source, str) else None
+        document = PDFDocument(PDFParser(self._handle or source))
+        self.pages = list(PDFPage.create_pages(document))
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def page_text(self, index: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+
+        output = io.StringIO()
+        resources = PDFResourceManager()
+        device = TextConverter(resources, output, laparams=LAParams())
+        try:
+            PDFPageInterpreter(resources, device).process_page(self.pages[index])
+        finally:
+            device.close()
+        # pdfminer ends every page with a form feed
+        return output.getvalue().rstrip('\x0c')
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+
+
+class PdfiumBackend:
+    """pypdfium2, bindings to the PDFium engine used by Chrome; the fastest of the four."""
+
+    def __init__(self, source: Source):
+        import pypdfium2
+
+        self.document = pypdfium2.PdfDocument(_rewind(source))
+
+    def __len__(self) -> int:
+        return len(self.document)
+
+    def page_text(self, index: int) -> str:
+        page = self.document[index]
+        text_page = page.get_textpage()
+        try:
+            return text_page.get_text_range()
+        finally:
+            text_page.close()
+            page.close()
+
+    def close(self):
+        self.document.close()
+
+
+BACKENDS = {
+    'pypdf2': PyPDF2Backend,
+    'pypdf': PypdfBackend,
+    'pdfminer': PdfminerBackend,
+    'pypdfium2': PdfiumBackend,
+}
+
+# Module each backend imports, to tell whether it is installed without importing it
+BACKEND_MODULES = {
+    'pypdf2': 'PyPDF2',
+    'pypdf': 'pypdf',
+    'pdfminer': 'pdfminer',
+    'pypdfium2': 'pypdfium2',
+}
+
+
+def is_available(name: str) -> bool:
+    return name in BACKENDS and importlib.util.find_spec(BACKEND_MODULES[name]) is not None
+
+
+def available_backends() -> List[str]:
+    return [name for name in BACKENDS if is_available(name)]
+
+
+class PdfDocument:
+    """A PDF opened with the first backend in a chain that can read it.
+
+    Page count comes from that backend. A page whose extraction raises is
+    retried with the later backends, each opened on first use; the first
+    backend's error is raised when none of them can extract it.
+    """
+
+    def __init__(self, source: Source, backends: Sequence[str]):
+        if not backends:
+            raise ValueError('No PDF backend to open the file with')
+        unknown = [name for name in backends if name not in BACKENDS]
+        if unknown:
+            raise ValueError(f"Unknown PDF backend: {', '.join(unknown)}")
+        self.source = source
+        self.backends = list(backends)
+        self._opened: Dict[str, Any] = {}
+        self._failed: Dict[str, Exception] = {}
+
+        for name in self.backends:
+            if self._open(name) is not None:
+                self.backend = name
+                self.page_count = len(self._opened[name])
+                if name != self.backends[0]:
+                    add_count('pdf_fallbacks')
+                return
+        raise self._failed[self.backends[0]]
+
+    def _open(self, name: str) -> Optional[Any]:
+        if name not in self._opened and name not in self._failed:
+            try:
+                self._opened[name] = BACKENDS[name](self.source)
+            except Exception as e:
+                self._failed[name] = e
+        return self._opened.get(name)
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def can_open(self, name: str) -> bool:
+        """Whether the named backend reads this file, opening it now if it is not open yet."""
+        return self._open(name) is not None
+
+    def opened(self, name: str) -> Any:
+        """The named backend on this file; raises its error if it cannot read the file."""
+        if not self.can_open(name):
+            raise self._failed[name]
+        return self._opened[name]
+
+    def page_text(self, index: int) -> str:
+        first_error = None
+        for name in self.backends[self.backends.index(self.backend):]:
+            backend = self._open(name)
+            if backend is None:
+                continue
+            try:
+                text = backend.page_text(index)
+            except Exception as e:
+                first_error = first_error or e
+                continue
+            if name != self.backend:
+                add_count('pdf_fallbacks')
+            return text
+        raise first_error
+
+    def close(self):
+        for backend in self._opened.values():
+            backend.close()
+        self._opened.clear()
+
+
+def open_document(source: Source, backends: Sequence[str]) -> PdfDocument:
+    return PdfDocument(source, backends)
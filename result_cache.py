@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence
+
+
+def keywords_fingerprint(keywords: Sequence[str]) -> str:
+    """Fingerprint a keyword list so cached results are tied to the list that produced them."""
+    return hashlib.sha256(json.dumps(list(keywords)).encode('utf-8')).hexdigest()[:16]
+
+
+def cache_key(digest: str, kind: str, fingerprint: str) -> str:
+    """Key a document's results by its content hash, parser and keyword fingerprint."""
+    return f'{digest}:{kind}:{fingerprint}'
+
+
+def rewrite_results(results: List[Dict[str, Any]], filename: str) -> List[Dict[str, Any]]:
+    """Point cached matches at the file name of the current upload."""
+    partner = filename.split('.')[0]
+    for result in results:
+        result['file_path'] = filename
+        result['partner'] = partner
+    return results
+
+
+class ResultCache:
+    """Two-tier cache of per-document match lists.
+
+    Entries are stored as JSON so their size is known exactly and a hit
+    always hands back fresh dicts. The memory tier is an LRU bounded by bytes;
+    the optional disk tier is a SQLite file in `directory`, also bounded by
+    bytes and evicted by last access. Disk hits are promoted to memory.
+    """
+
+    def __init__(self, max_memory_bytes: int, directory: Optional[str] = None, max_disk_bytes: int = 0):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self._db = None
+        if directory and max_disk_bytes > 0:
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(directory, 'results.sqlite3'), check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of the cached results for key, or None on a miss."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    value = row[0]
+                    self._db.execute('UPDATE results SET accessed = ? WHERE key = ?', (time.time(), key))
+                    self._db.commit()
+                    self._store_memory(key, value)
+
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return json.loads(value)
+
+    def max_entry_bytes(self) -> int:
+        """Size of the largest JSON entry some tier would keep; anything bigger is dropped by put()."""
+        return max(self.max_memory_bytes, self.max_disk_bytes if self._db is not None else 0)
+
+    def put(self, key: str, results: List[Dict[str, Any]]):
+        """Store the results for key in every enabled tier."""
+        value = json.dumps(results).encode('utf-8')
+
+        with self._lock:
+            self._store_memory(key, value)
+
+            if self._db is not None and len(value) <= self.max_disk_bytes:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                    (key, value, len(value), time.time())
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size of each tier."""
+        with self._lock:
+            stats = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+            }
+            if self._db is not None:
+                entries, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+                stats['disk_entries'] = entries
+                stats['disk_bytes'] = size
+        return stats
+
+    def _store_memory(self, key: str, value: bytes):
+        if len(value) > self.max_memory_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = value
+        self._memory_bytes += len(value)
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+
+        for key, size in self._db.execute('SELECT key, size FROM results ORDER BY accessed').fetchall():
+            self._db.execute('DELETE FROM results WHERE key = ?', (key,))
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
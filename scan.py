@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Scan a directory tree of partner documents offline and write every match to CSV or Parquet.
+
+Files are fanned out across a process pool and their matches are appended
+to the output as each file finishes, so results are kept even if the run
+is interrupted. A ledger next to the output (OUTPUT.ledger) records every
+file once its rows are written; --resume skips those files and drops any
+rows written after the last ledger entry. A file whose size or mtime has
+changed since it was recorded is scanned again, and its earlier rows stay
+in the output.
+
+Usage:
+    python scan.py ROOT --output results.csv [--workers N] [--resume]
+    python scan.py ROOT --output results.parquet [--keyword-set NAME [--keyword-set-version N]]
+
+Parquet output is a directory of part files (readable as one table with
+pyarrow.parquet.read_table or pandas.read_parquet) and needs pyarrow, the
+project's optional `parquet` extra: pip install '.[parquet]' (or
+uv sync --extra parquet).
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from keyword_sets import KeywordSetStore
+
+COLUMNS = ['file_path', 'source_type', 'source_name', 'location', 'keyword', 'exact_sentence', 'partner', 'error']
+# Matches buffered before a Parquet part file is written
+PARQUET_PART_ROWS = 50000
+
+
+def find_files(root: str) -> List[Tuple[str, int, float]]:
+    """(path relative to root, size, mtime) of every supported file, in a stable order."""
+    found = []
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if main.file_kind(filename) is None:
+                continue
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            found.append((os.path.relpath(path, root), stat.st_size, stat.st_mtime))
+    return found
+
+
+def scan_file(root: str, relative_path: str, keywords: Sequence[str]) -> List[Dict[str, Any]]:
+    """Matches of one file, with file_path set to its path under root; runs inside a worker."""
+    filename = os.path.basename(relative_path)
+    try:
+        with open(os.path.join(root, relative_path), 'rb') as handle:
+            results = main.process_file(handle, filename, keywords)
+    except OSError as e:
+        results = [{'error': f'Error reading {relative_path}: {str(e)}'}]
+    for result in results:
+        result['file_path'] = relative_path
+        if 'error' not in result:
+            result['partner'] = filename.split('.')[0]
+    return results
+
+
+class CsvOutput:
+    """Append rows to a CSV file; a checkpoint is the file size after a flush."""
+
+    def __init__(self, path: str, checkpoint: Optional[Dict[str, Any]]):
+        if checkpoint is not None and os.path.exists(path):
+            # Drop rows of files that were not recorded in the ledger
+            with open(path, 'r+b') as handle:
+                handle.truncate(checkpoint['offset'])
+        new_file = checkpoint is None or not os.path.exists(path)
+        self.handle = open(path, 'w' if new_file else 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.handle, COLUMNS, extrasaction='ignore')
+        if new_file:
+            self.writer.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Write one file's rows and return the checkpoint that covers them."""
+        self.writer.writerows(rows)
+        self.handle.flush()
+        return {'offset': os.fstat(self.handle.fileno()).st_size}
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        self.handle.close()
+        return None
+
+
+class ParquetOutput:
+    """Write rows as numbered part files in a directory; a checkpoint is the last part written.
+
+    Rows are buffered until PARQUET_PART_ROWS, so files are only recorded in
+    the ledger once the part holding their rows is on disk.
+    """
+
+    @staticmethod
+    def check_available():
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install '.[parquet]'")
+
+    def __init__(self, path: str, checkpoint: Optional[Dict[str, Any]]):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(column, pyarrow.string()) for column in COLUMNS])
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.part = checkpoint['part'] if checkpoint is not None else 0
+        for name in os.listdir(path):
+            if name.startswith('part-') and int(name[5:10]) > self.part:
+                os.unlink(os.path.join(path, name))
+        self.rows: List[Dict[str, Any]] = []
+
+    def flush(self) -> Dict[str, Any]:
+        if self.rows:
+            self.part += 1
+            table = self.pyarrow.Table.from_pylist(self.rows, schema=self.schema)
+            self.pyarrow.parquet.write_table(table, os.path.join(self.path, f'part-{self.part:05d}.parquet'))
+            self.rows = []
+        return {'part': self.part}
+
+    def write(self, rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        self.rows.extend(rows)
+        if len(self.rows) >= PARQUET_PART_ROWS:
+            return self.flush()
+        return None
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        return self.flush()
+
+
+class Ledger:
+    """JSON lines of finished files, each written once their rows are safely in the output."""
+
+    def __init__(self, path: str, resume: bool):
+        self.path = path
+        self.done: Dict[str, Tuple[int, float]] = {}
+        self.checkpoint: Optional[Dict[str, Any]] = None
+        if resume and os.path.exists(path):
+            self.load(path)
+        self.handle = open(path, 'a' if resume else 'w', encoding='utf-8')
+        self.pending: List[Dict[str, Any]] = []
+
+    def load(self, path: str):
+        """Read the files recorded up to the last checkpoint and cut off anything after it.
+
+        Entries are written just before the checkpoint that covers them, so
+        entries after the last complete checkpoint line (or a line cut short
+        by an interruption) are not trusted.
+        """
+        recorded = []
+        read_bytes = valid_bytes = 0
+        with open(path, 'rb') as handle:
+            for line in handle:
+                read_bytes += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                if 'checkpoint' in entry:
+                    for done in recorded:
+                        self.done[done['path']] = (done['size'], done['mtime'])
+                    recorded = []
+                    self.checkpoint = entry['checkpoint']
+                    valid_bytes = read_bytes
+                else:
+                    recorded.append(entry)
+        with open(path, 'r+b') as handle:
+            handle.truncate(valid_bytes)
+
+    def is_done(self, relative_path: str, size: int, mtime: float) -> bool:
+        return self.done.get(relative_path) == (size, mtime)
+
+    def add(self, entry: Dict[str, Any], checkpoint: Optional[Dict[str, Any]]):
+        """Queue a finished file; queued files are recorded together with the next checkpoint."""
+        self.pending.append(entry)
+        if checkpoint is not None:
+            self.commit(checkpoint)
+
+    def commit(self, checkpoint: Dict[str, Any]):
+        lines = [json.dumps(entry) + '\n' for entry in self.pending]
+        lines.append(json.dumps({'checkpoint': checkpoint}) + '\n')
+        self.handle.write(''.join(lines))
+        self.handle.flush()
+        self.pending = []
+
+    def close(self):
+        self.handle.close()
+
+
+class Progress:
+    """A single status line on stderr, redrawn at most twice a second."""
+
+    def __init__(self, total_files: int, total_bytes: int, enabled: bool):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.enabled = enabled
+        self.files = 0
+        self.bytes = 0
+        self.matches = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.drawn = 0.0
+
+    def update(self, size: int, matches: int, errors: int):
+        self.files += 1
+        self.bytes += size
+        self.matches += matches
+        self.errors += errors
+        if self.enabled and time.perf_counter() - self.drawn >= 0.5:
+            self.draw()
+
+    def draw(self, end: str = ''):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        rate = self.bytes / elapsed
+        remaining = (self.total_bytes - self.bytes) / rate if rate else 0
+        sys.stderr.write(
+            f'\r{self.files}/{self.total_files} files  {self.bytes / 1e6:.1f}/{self.total_bytes / 1e6:.1f} MB  '
+            f'{self.files / elapsed:.1f} files/s  {rate / 1e6:.2f} MB/s  '
+            f'{self.matches} matches  {self.errors} errors  ETA {remaining:.0f}s ' + end
+        )
+        sys.stderr.flush()
+        self.drawn = time.perf_counter()
+
+
+def iter_scanned(root: str, files: List[Tuple[str, int, float]], keywords: Sequence[str],
+                 workers: int) -> Iterator[Tuple[Tuple[str, int, float], List[Dict[str, Any]]]]:
+    """Yield (file, results) as files finish, keeping at most two files per worker in flight."""
+    if workers <= 0:
+        for file in files:
+            yield file, scan_file(root, file[0], keywords)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        queued = iter(files)
+        in_flight = {}
+        while True:
+            while len(in_flight) < workers * 2:
+                file = next(queued, None)
+                if file is None:
+                    break
+                in_flight[executor.submit(scan_file, root, file[0], keywords)] = file
+            if not in_flight:
+                return
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield in_flight.pop(future), future.result()
+
+
+def run_scan(root: str, output: str, keywords: Sequence[str], workers: int,
+             resume: bool = False, progress: bool = True) -> Dict[str, int]:
+    """Scan root into output and return file, match and error counts for this run."""
+    ledger_path = output.rstrip(os.sep) + '.ledger'
+    if os.path.exists(ledger_path) and not resume:
+        raise SystemExit(f'{ledger_path} exists; pass --resume to continue that run or remove it to start over')
+
+    output_type = ParquetOutput if output.endswith('.parquet') else CsvOutput
+    if output_type is ParquetOutput:
+        ParquetOutput.check_available()
+
+    ledger = Ledger(ledger_path, resume)
+    files = find_files(root)
+    todo = [file for file in files if not ledger.is_done(*file)]
+    writer = output_type(output, ledger.checkpoint)
+    status = Progress(len(todo), sum(size for _, size, _ in todo), progress)
+
+    try:
+        for (relative_path, size, mtime), results in iter_scanned(root, todo, keywords, workers):
+            errors = [result['error'] for result in results if 'error' in result]
+            checkpoint = writer.write(results)
+            ledger.add({'path': relative_path, 'size': size, 'mtime': mtime,
+                        'matches': len(results) - len(errors), 'error': errors[0] if errors else None}, checkpoint)
+            status.update(size, len(results) - len(errors), len(errors))
+        checkpoint = writer.close()
+        if ledger.pending:
+            ledger.commit(checkpoint)
+    finally:
+        ledger.close()
+        if progress:
+            status.draw('\n')
+
+    return {'files': status.files, 'skipped': len(files) - len(todo), 'matches': status.matches, 'errors': status.errors}
+
+
+def main_cli(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('root', help='directory to scan recursively')
+    parser.add_argument('--output', required=True, help='results file: .csv, or .parquet for a Parquet directory')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (0 scans in this process)')
+    parser.add_argument('--resume', action='store_true', help='continue an interrupted run from its ledger')
+    parser.add_argument('--keyword-set', help='keyword set from KEYWORD_SETS_DIR (default: the built-in list)')
+    parser.add_argument('--keyword-set-version', type=int)
+    parser.add_argument('--quiet', action='store_true', help='no progress line')
+    args = parser.parse_args(argv)
+
+    keywords = main.KEYWORDS
+    if args.keyword_set or args.keyword_set_version is not None:
+        keyword_set = KeywordSetStore(main.KEYWORD_SETS_DIR).resolve(args.keyword_set, args.keyword_set_version)
+        if keyword_set is None:
+            raise SystemExit('Keyword set not found')
+        keywords = keyword_set['keywords']
+
+    summary = run_scan(args.root, args.output, tuple(keywords), args.workers, args.resume, not args.quiet)
+    print(f"Scanned {summary['files']} files ({summary['skipped']} already done): "
+          f"{summary['matches']} matches, {summary['errors']} errors")
+
+
+if __name__ == "__main__":
+    main_cli()
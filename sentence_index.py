@@ -0,0 +1,166 @@
+import os
+import time
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from keyword_matcher import SENTENCE_SPLIT, get_matcher
+from sqlite_store import SQLiteStore
+
+# The trigram tokenizer (SQLite 3.34+) indexes every three-character
+# substring case-insensitively, so a keyword is found inside words the way
+# KeywordMatcher finds it ('mat' in 'format'), not only as a whole token
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    file_path TEXT NOT NULL UNIQUE,
+    partner TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    parser TEXT NOT NULL,
+    sentences INTEGER NOT NULL,
+    indexed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sentences (
+    id INTEGER PRIMARY KEY,
+    document INTEGER NOT NULL,
+    source_type TEXT NOT NULL,
+    source_name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sentences_document ON sentences (document);
+CREATE VIRTUAL TABLE IF NOT EXISTS sentence_text USING fts5(
+    text, content='sentences', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS sentences_insert AFTER INSERT ON sentences BEGIN
+    INSERT INTO sentence_text (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS sentences_delete AFTER DELETE ON sentences BEGIN
+    INSERT INTO sentence_text (sentence_text, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+'''
+
+# Shorter keywords have no trigram to look up and are matched with LIKE instead
+TRIGRAM = 3
+
+# (source_type, source_name, location, sentence offset in the unit text, sentence)
+SentenceRow = Tuple[str, str, str, int, str]
+
+
+def fts_query(keywords: Sequence[str]) -> str:
+    """An FTS5 query matching any of the keywords as a substring."""
+    return ' OR '.join('"' + keyword.replace('"', '""') + '"' for keyword in keywords)
+
+
+def like_pattern(keyword: str) -> str:
+    return '%' + keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+class SentenceIndex(SQLiteStore):
+    """Every sentence of the ingested documents, with its location, in SQLite FTS5.
+
+    Documents are split into sentences once, at ingestion; a search then
+    runs a keyword list against the whole corpus without parsing anything.
+    The full-text index only narrows the candidates: each candidate is
+    resolved by the same KeywordMatcher as /analyze, so matches come back
+    in the /analyze result schema with the same first-keyword-wins result
+    and offsets. Parsing workers open their own SentenceIndex on the same
+    directory (see SQLiteStore).
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory, 'sentences.sqlite3', SCHEMA)
+
+    def is_current(self, file_path: str, digest: str, parser: str) -> bool:
+        """Whether file_path is indexed from the same bytes by the same parser version."""
+        with self._connect() as db:
+            row = db.execute('SELECT digest, parser FROM documents WHERE file_path = ?', (file_path,)).fetchone()
+        return row == (digest, parser)
+
+    def add_document(self, file_path: str, digest: str, parser: str, rows: Sequence[SentenceRow]):
+        """Store the sentences of a document, replacing any earlier version of file_path."""
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            previous = db.execute('SELECT id FROM documents WHERE file_path = ?', (file_path,)).fetchone()
+            if previous is not None:
+                db.execute('DELETE FROM sentences WHERE document = ?', previous)
+                db.execute('DELETE FROM documents WHERE id = ?', previous)
+            document = db.execute(
+                'INSERT INTO documents (file_path, partner, digest, parser, sentences, indexed) VALUES (?, ?, ?, ?, ?, ?)',
+                (file_path, os.path.basename(file_path).split('.')[0], digest, parser, len(rows), time.time())
+            ).lastrowid
+            db.executemany(
+                'INSERT INTO sentences (document, source_type, source_name, location, start, text) VALUES (?, ?, ?, ?, ?, ?)',
+                [(document, *row) for row in rows]
+            )
+
+    def remove_document(self, file_path: str) -> bool:
+        with self._connect() as db:
+            previous = db.execute('SELECT id FROM documents WHERE file_path = ?', (file_path,)).fetchone()
+            if previous is None:
+                return False
+            db.execute('DELETE FROM sentences WHERE document = ?', previous)
+            db.execute('DELETE FROM documents WHERE id = ?', previous)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as db:
+            documents, sentences = db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(sentences), 0) FROM documents'
+            ).fetchone()
+        return {'documents': documents, 'sentences': sentences, 'bytes': os.path.getsize(self.db_path)}
+
+    def search(self, keywords: Sequence[str], file_paths: Optional[Sequence[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Matches of keywords across the index, in ingestion order, and the number of documents searched.
+
+        file_paths limits the search to those documents.
+        """
+        matcher = get_matcher(keywords)
+        # A keyword holding a sentence boundary can never match a sentence
+        searchable = [keyword for keyword in dict.fromkeys(keywords) if not SENTENCE_SPLIT.search(keyword)]
+        indexed = [keyword for keyword in searchable if len(keyword) >= TRIGRAM]
+        short = [keyword for keyword in searchable if len(keyword) < TRIGRAM]
+
+        queries, parameters = [], []
+        if indexed:
+            queries.append('SELECT rowid FROM sentence_text WHERE sentence_text MATCH ?')
+            parameters.append(fts_query(indexed))
+        if short:
+            queries.append('SELECT id FROM sentences WHERE ' + ' OR '.join(["text LIKE ? ESCAPE '\\'"] * len(short)))
+            parameters.extend(like_pattern(keyword) for keyword in short)
+
+        document_filter, document_parameters = '', []
+        if file_paths is not None:
+            document_filter = f"WHERE file_path IN ({', '.join('?' * len(file_paths))})"
+            document_parameters = list(file_paths)
+
+        results = []
+        with self._connect() as db:
+            documents = {
+                row[0]: row[1:] for row in
+                db.execute(f'SELECT id, file_path, partner FROM documents {document_filter}', document_parameters)
+            }
+            if not queries or not documents:
+                return results, len(documents)
+
+            rows = db.execute(
+                'SELECT document, source_type, source_name, location, start, text FROM sentences '
+                f"WHERE id IN ({' UNION '.join(queries)}) ORDER BY document, id", parameters
+            )
+            for document, source_type, source_name, location, start, text in rows:
+                match = matcher.match_sentence(text) if document in documents else None
+                if match is not None:
+                    file_path, partner = documents[document]
+                    results.append({
+                        'file_path': file_path,
+                        'source_type': source_type,
+                        'source_name': source_name,
+                        'location': location,
+                        'keyword': match.keyword,
+                        'exact_sentence': text,
+                        'partner': partner,
+                        'sentence_start': start,
+                        'sentence_end': start + len(text),
+                        'keyword_start': start + match.keyword_start,
+                        'keyword_end': start + match.keyword_end
+                    })
+        return results, len(documents)
@@ -0,0 +1,31 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SQLiteStore:
+    """Base of the stores kept in a SQLite file that several processes open at once.
+
+    The API and its parsing workers each open their own store on the same
+    directory, so every method uses a short-lived connection, and the
+    database runs in WAL mode so readers are not blocked by a writer.
+    """
+
+    def __init__(self, directory: str, filename: str, schema: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, filename)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(schema)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction on a fresh connection, committed and closed on exit."""
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for the admission budget shared by the analysis endpoints.
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from admission import AdmissionBudget, BudgetExceeded
+
+
+def test_reserve_waits_in_line_then_times_out():
+    async def scenario():
+        budget = AdmissionBudget(100, 0, max_wait=0.05)
+        held = await budget.reserve(80)
+
+        with pytest.raises(BudgetExceeded) as rejected:
+            await budget.reserve(30)
+        assert (rejected.value.status, rejected.value.retry_after) == (429, 1)
+        with pytest.raises(BudgetExceeded) as too_large:
+            await budget.reserve(101)
+        assert too_large.value.status == 413
+
+        # A waiter is admitted as soon as enough is released, ahead of later small requests
+        budget.max_wait = 5
+        waiting = asyncio.create_task(budget.reserve(60))
+        await asyncio.sleep(0)
+        small = asyncio.create_task(budget.reserve(10))
+        await asyncio.sleep(0)
+        assert budget.stats()['requests_waiting'] == 2
+        held.release()
+        held.release()
+        first = await waiting
+        second = await small
+        assert budget.stats()['bytes_in_use'] == 70
+        first.release()
+        second.release()
+        assert budget.stats() == {
+            'max_bytes': 100, 'bytes_in_use': 0, 'requests_waiting': 0,
+            'max_parses': 0, 'parses_active': 0, 'parses_waiting': 0, 'rejected': 2
+        }
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_line():
+    async def scenario():
+        budget = AdmissionBudget(10, 0, max_wait=5)
+        held = await budget.reserve(10)
+        waiting = asyncio.create_task(budget.reserve(10))
+        behind = asyncio.create_task(budget.reserve(1))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert budget.stats()['requests_waiting'] == 1
+        held.release()
+        (await behind).release()
+        assert budget.stats()['bytes_in_use'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_parse_slots_bound_concurrency():
+    async def scenario():
+        budget = AdmissionBudget(0, 2, max_wait=0)
+        running = []
+        peak = []
+
+        async def parse():
+            async with budget.parse_slot():
+                running.append(1)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        await asyncio.gather(*[parse() for _ in range(6)])
+        assert max(peak) == 2
+        assert budget.stats()['parses_active'] == 0
+        # With no byte budget every request is admitted at once
+        (await budget.reserve(10 ** 12)).release()
+
+    asyncio.run(scenario())
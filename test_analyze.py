@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the serverless handler in analyze.py.
+"""
+
+import base64
+import json
+import os
+import subprocess
+import sys
+import types
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import analyze
+from benchmarks.corpus import make_pdf
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def post(files):
+    body = json.dumps({'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name, content in files.items()
+    ]})
+    return analyze.handler(types.SimpleNamespace(method='POST', body=body))
+
+
+def test_handler_matches_and_reports_unsupported_files():
+    response = post({'report.pdf': make_pdf(['The plan promotes gender equity.']), 'notes.txt': b'gender'})
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['files_processed'] == 2
+    assert [(r.get('location'), r.get('keyword')) for r in body['results'][:1]] == [('Page 1', 'gender')]
+    assert body['results'][-1] == {'error': 'Unsupported file type: notes.txt'}
+
+
+def test_handler_keeps_its_space_padded_keywords():
+    """' trans ' and ' mat ' match as words only, so 'transport' and 'format' are not flagged."""
+    response = post({'report.pdf': make_pdf([
+        'Staff transport and the report format were reviewed', 'Outreach for trans clients began'
+    ])})
+    body = json.loads(response['body'])
+    assert [(r['location'], r['keyword']) for r in body['results']] == [('Page 2', ' trans ')]
+
+
+def test_parsers_are_imported_only_when_their_format_appears():
+    script = (
+        'import sys, types, json, base64\n'
+        'import analyze\n'
+        'from benchmarks.corpus import make_pdf\n'
+        'loaded = lambda: sorted(m for m in ("PyPDF2", "openpyxl", "docx", "pandas") if m in sys.modules)\n'
+        'before = loaded()\n'
+        'body = json.dumps({"files": [{"filename": "a.pdf", "content": base64.b64encode(make_pdf(["x"])).decode()}]})\n'
+        'analyze.handler(types.SimpleNamespace(method="POST", body=body))\n'
+        'print(json.dumps([before, loaded()]))\n'
+    )
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    assert json.loads(output) == [[], ['PyPDF2']]
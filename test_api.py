@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+"""
+Endpoint tests for the FastAPI app, run in-process through the test client.
+"""
+
+import asyncio
+import base64
+import io
+import json
+import threading
+import time
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+pytest.importorskip("httpx")
+
+from docx import Document
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+
+import main
+from benchmarks.corpus import make_pdf
+from main import app
+from admission import Reservation
+from keyword_sets import KeywordSetStore
+from result_cache import ResultCache
+from sentence_index import SentenceIndex
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch, tmp_path):
+    """Give every test an empty result cache, keyword set store and sentence index so earlier uploads cannot affect it.
+
+    The unit store is off unless a test turns it on, so repeated uploads are scanned in full.
+    """
+    monkeypatch.setattr(main, 'result_cache', ResultCache(16 * 1024 * 1024))
+    monkeypatch.setattr(main, '_keyword_store', KeywordSetStore(str(tmp_path / 'keyword-sets')))
+    monkeypatch.setattr(main, 'UNIT_STORE_MB', 0)
+    monkeypatch.setattr(main, '_unit_store', None)
+    monkeypatch.setattr(main, '_sentence_index', SentenceIndex(str(tmp_path / 'index')))
+
+
+def make_docx(paragraphs):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def make_xlsx(rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = 'Budget'
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+SAMPLE_FILES = {
+    'partner_a.docx': make_docx([
+        'The programme promotes diversity in hiring.',
+        'Nothing to report here at all.',
+        'Gender based violence services were expanded.',
+    ]),
+    'partner_b.xlsx': make_xlsx([
+        ['Category', 'Narrative'],
+        ['Nutrition', 'Food distribution for key populations'],
+        ['Training', 'Staff training on equity and inclusion'],
+    ]),
+}
+
+
+def analyze_json(files):
+    payload = {'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()}
+        for name, content in files.items()
+    ]}
+    response = client.post('/analyze', json=payload)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_upload_matches_base64_endpoint():
+    """The multipart endpoint returns the same response as the base64 JSON endpoint."""
+    expected = analyze_json(SAMPLE_FILES)
+    assert expected['total_matches'] == 4
+
+    response = client.post('/analyze/upload', files=[
+        ('files', (name, content, 'application/octet-stream')) for name, content in SAMPLE_FILES.items()
+    ])
+    assert response.status_code == 200
+    assert response.json() == expected
+
+
+def test_stream_matches_analyze(monkeypatch):
+    """The NDJSON stream carries the same matches as /analyze, then a summary record."""
+    expected = analyze_json(SAMPLE_FILES)
+    monkeypatch.setattr(main, 'result_cache', ResultCache(0))
+
+    payload = {'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()}
+        for name, content in list(SAMPLE_FILES.items()) + [('notes.txt', b'gender')]
+    ]}
+    with client.stream('POST', '/analyze/stream', json=payload) as response:
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'application/x-ndjson'
+        records = [json.loads(line) for line in response.iter_lines() if line]
+
+    summary = records.pop()['summary']
+    assert summary['total_matches'] == expected['total_matches']
+    assert summary['files_processed'] == 3
+    assert summary['keywords_found'] == expected['keywords_found']
+    assert summary['time_to_first_result_ms'] <= summary['elapsed_ms']
+
+    key = lambda r: json.dumps(r, sort_keys=True)
+    assert sorted(records, key=key) == sorted(expected['results'] + [{'error': 'Unsupported file type: notes.txt'}], key=key)
+
+
+def test_stream_stops_collecting_files_too_big_to_cache(monkeypatch):
+    """A file's matches are only held for the cache while they would fit in it."""
+    cache = ResultCache(400)
+    stored = []
+    monkeypatch.setattr(cache, 'put', lambda key, results: stored.append(results))
+    monkeypatch.setattr(main, 'result_cache', cache)
+    files = {
+        'small.docx': make_docx(['Gender norms were discussed.']),
+        'large.docx': make_docx([f'Food parcel round {number} was delivered.' for number in range(20)]),
+    }
+    payload = {'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name, content in files.items()
+    ]}
+    with client.stream('POST', '/analyze/stream', json=payload) as response:
+        records = [json.loads(line) for line in response.iter_lines() if line]
+    assert records[-1]['summary']['total_matches'] == 21
+    assert [[result['file_path'] for result in results] for results in stored] == [['small.docx']]
+
+
+def test_stream_reservation_is_released_on_the_event_loop(monkeypatch):
+    """The admission budget is not thread-safe, so even the response's background release runs on the loop."""
+    real_release = Reservation.release
+    on_loop = []
+
+    def release(self):
+        try:
+            on_loop.append(asyncio.get_running_loop() is not None)
+        except RuntimeError:
+            on_loop.append(False)
+        real_release(self)
+
+    monkeypatch.setattr(Reservation, 'release', release)
+    payload = {'files': [{'filename': 'notes.txt', 'content': base64.b64encode(b'gender').decode()}]}
+    with client.stream('POST', '/analyze/stream', json=payload) as response:
+        list(response.iter_lines())
+    assert on_loop and all(on_loop)
+
+
+def test_upload_unsupported_file():
+    response = client.post('/analyze/upload', files=[('files', ('notes.txt', b'gender', 'text/plain'))])
+    assert response.status_code == 200
+    assert response.json()['results'] == [{'error': 'Unsupported file type: notes.txt'}]
+
+
+def test_large_pdf_split_across_pool(monkeypatch):
+    """A PDF over the split threshold is parsed in page ranges with the same results."""
+    pdf = make_pdf([
+        f'Page {number} covers food security and diversity training' if number % 2 else f'Page {number} has no terms'
+        for number in range(1, 8)
+    ])
+    expected = analyze_json({'report.pdf': pdf})
+    assert [r['location'] for r in expected['results']] == ['Page 1', 'Page 3', 'Page 5', 'Page 7']
+
+    monkeypatch.setattr(main, 'result_cache', ResultCache(0))
+    monkeypatch.setattr(main, 'PARSE_WORKERS', 2)
+    monkeypatch.setattr(main, 'PDF_SPLIT_BYTES', 0)
+    monkeypatch.setattr(main, 'PDF_PAGES_PER_TASK', 2)
+    assert analyze_json({'report.pdf': pdf}) == expected
+
+    response = client.post('/analyze/upload', files=[('files', ('report.pdf', pdf, 'application/pdf'))])
+    assert response.json() == expected
+
+
+def test_cache_hit_rewrites_file_name():
+    """Re-uploading the same bytes under another name is served from the cache."""
+    content = SAMPLE_FILES['partner_b.xlsx']
+    first = analyze_json({'partner_b.xlsx': content})
+    second = analyze_json({'partner_c.xlsx': content})
+
+    assert client.get('/cache/stats').json()['hits'] == 1
+    assert second['total_matches'] == first['total_matches']
+    assert {(r['file_path'], r['partner']) for r in second['results']} == {('partner_c.xlsx', 'partner_c')}
+    assert [r['location'] for r in second['results']] == [r['location'] for r in first['results']]
+
+
+real_process_job_file = main.process_job_file
+
+
+def test_background_job(monkeypatch, tmp_path):
+    """A job reports per-file progress and pages through the same results as /analyze."""
+    monkeypatch.setattr(main, 'JOBS_DIR', str(tmp_path))
+    monkeypatch.setattr(main, '_job_store', None)
+    pdf = make_pdf(['Food parcels were delivered', 'No terms here', 'Diversity in hiring'])
+    files = dict(SAMPLE_FILES, **{'report.pdf': pdf, 'notes.txt': b'gender'})
+    expected = analyze_json(files)
+
+    with TestClient(app) as jobs_client:
+        response = jobs_client.post('/jobs', files=[
+            ('files', (name, content, 'application/octet-stream')) for name, content in files.items()
+        ])
+        assert response.status_code == 202
+        job_id = response.json()['job_id']
+
+        deadline = time.time() + 30
+        while (job := jobs_client.get(f'/jobs/{job_id}').json())['status'] != 'completed':
+            assert job['status'] in ('queued', 'running') and time.time() < deadline
+            time.sleep(0.05)
+
+        assert job['files_processed'] == 4
+        assert job['total_matches'] == expected['total_matches']
+        assert job['files'][2] == {
+            'filename': 'report.pdf', 'status': 'completed', 'unit': 'page', 'done': 3, 'total': 3, 'error': None
+        }
+        assert job['files'][3]['status'] == 'failed'
+
+        pages = [jobs_client.get(f'/jobs/{job_id}/results', params={'offset': offset, 'limit': 3}).json()
+                 for offset in range(0, 9, 3)]
+        assert pages[0]['total'] == len(expected['results'])
+        assert [result for page in pages for result in page['results']] == expected['results']
+
+        assert jobs_client.get('/jobs/missing').status_code == 404
+        assert not (tmp_path / job_id).exists()
+
+
+def test_interrupted_job_resumes_at_startup(monkeypatch, tmp_path):
+    """A job cancelled mid-run, as on shutdown, keeps its files and finishes when the app starts again."""
+    monkeypatch.setattr(main, 'JOBS_DIR', str(tmp_path))
+    monkeypatch.setattr(main, '_job_store', None)
+    monkeypatch.setattr(main, 'JOB_WORKERS', 0)
+    store = main.get_job_store()
+    job_id = store.create_job(list(SAMPLE_FILES), main.get_keyword_store().resolve(None, None))
+    for file_index, content in enumerate(SAMPLE_FILES.values()):
+        with open(store.file_path(job_id, file_index), 'wb') as handle:
+            handle.write(content)
+
+    release = threading.Event()
+    monkeypatch.setattr(main, 'process_job_file', lambda *args: release.wait(10))
+
+    async def interrupt():
+        task = asyncio.create_task(main.run_job(job_id))
+        while store.get_job(job_id)['status'] != 'running':
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        release.set()
+
+    asyncio.run(interrupt())
+    assert store.get_job(job_id)['status'] == 'running'
+    assert [filename for _, filename in store.pending_files(job_id)] == list(SAMPLE_FILES)
+    assert (tmp_path / job_id).is_dir()
+
+    monkeypatch.setattr(main, 'process_job_file', real_process_job_file)
+    with TestClient(app) as jobs_client:
+        deadline = time.time() + 30
+        while (job := jobs_client.get(f'/jobs/{job_id}').json())['status'] != 'completed':
+            assert job['status'] == 'running' and time.time() < deadline
+            time.sleep(0.05)
+    assert job['total_matches'] == 4
+    assert not (tmp_path / job_id).exists()
+
+
+def test_timings_and_metrics(monkeypatch):
+    """?timings=true adds a per-file stage breakdown and the stages show up on /metrics."""
+    pdf = make_pdf(['Food parcels were delivered', 'Diversity in hiring'])
+    files = dict(SAMPLE_FILES, **{'report.pdf': pdf})
+    expected = analyze_json(files)
+
+    # Only the workbook is served from the cache
+    monkeypatch.setattr(main, 'result_cache', ResultCache(16 * 1024 * 1024))
+    analyze_json({'partner_b.xlsx': SAMPLE_FILES['partner_b.xlsx']})
+
+    payload = {'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name, content in files.items()
+    ]}
+    body = client.post('/analyze', params={'timings': 'true'}, json=payload).json()
+    timings = body.pop('timings')
+    assert body == expected
+
+    assert [timing['filename'] for timing in timings['files']] == list(files)
+    assert timings['total_ms'] >= timings['serialize_ms']
+    word, excel, pdf_timing = timings['files']
+    assert not word['cached'] and excel['cached'] and not pdf_timing['cached']
+    assert word['counts'] == {'paragraphs': 3}
+    assert set(excel['stages_ms']) == {'decode', 'cache_lookup'}
+    assert pdf_timing['bytes'] == len(pdf) and pdf_timing['counts'] == {'pages': 2}
+    assert {'decode', 'cache_lookup', 'parse', 'extract', 'match'} <= set(pdf_timing['stages_ms'])
+
+    text = client.get('/metrics').text
+    assert 'compliance_stage_seconds_count{stage="match",format="pdf"}' in text
+    assert 'compliance_files_processed_total{format="excel",outcome="cached"}' in text
+    assert 'compliance_requests_in_flight{endpoint="/analyze"} 0' in text
+
+
+def test_pdf_backend_is_selectable_per_request():
+    """pdf_backend picks the extractor, keeps its results apart in the cache and rejects unknown names."""
+    pytest.importorskip('pypdf')
+    pdf = make_pdf(['Food parcels were delivered', 'No terms here', 'Diversity in hiring'])
+    expected = analyze_json({'report.pdf': pdf})
+    payload = {'files': [{'filename': 'report.pdf', 'content': base64.b64encode(pdf).decode()}], 'pdf_backend': 'pypdf'}
+    body = client.post('/analyze', params={'timings': 'true'}, json=payload).json()
+    assert not body['timings']['files'][0]['cached']
+    assert [(r['location'], r['keyword']) for r in body['results']] == [
+        (r['location'], r['keyword']) for r in expected['results']
+    ]
+
+    response = client.post('/analyze/upload', params={'pdf_backend': 'pypdf'},
+                           files=[('files', ('report.pdf', pdf, 'application/pdf'))])
+    assert response.json()['results'] == body['results']
+
+    response = client.post('/analyze', json=dict(payload, pdf_backend='ocr'))
+    assert response.status_code == 400
+    assert response.json()['detail'].startswith('Unknown PDF backend: ocr')
+
+
+def test_keyword_sets_are_versioned_and_selectable():
+    """Requests pick a keyword set and version; results and cache entries follow the set."""
+    default = analyze_json(SAMPLE_FILES)
+    assert default['keyword_set'] == {'name': 'default', 'version': 0}
+
+    response = client.post('/keyword-sets/nutrition', json={'keywords': ['food']})
+    assert response.status_code == 201
+    assert response.json()['version'] == 1
+    client.post('/keyword-sets/nutrition', json={'keywords': ['training', 'food']})
+
+    payload = {'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name, content in SAMPLE_FILES.items()
+    ], 'keyword_set': 'nutrition'}
+    latest = client.post('/analyze', json=payload).json()
+    assert latest['keyword_set'] == {'name': 'nutrition', 'version': 2}
+    assert [r['keyword'] for r in latest['results']] == ['food', 'training']
+
+    first = client.post('/analyze', json=dict(payload, keyword_set_version=1)).json()
+    assert [r['keyword'] for r in first['results']] == ['food']
+
+    upload = client.post('/analyze/upload', params={'keyword_set': 'nutrition', 'keyword_set_version': 1}, files=[
+        ('files', (name, content, 'application/octet-stream')) for name, content in SAMPLE_FILES.items()
+    ])
+    assert upload.json() == first
+
+    assert client.get('/keyword-sets/nutrition').json()['versions'] == [1, 2]
+    assert [s['name'] for s in client.get('/keyword-sets').json()['keyword_sets']] == ['default', 'nutrition']
+    assert client.post('/analyze', json=dict(payload, keyword_set='missing')).status_code == 404
+    assert client.post('/keyword-sets/bad name', json={'keywords': ['food']}).status_code == 400
+    assert client.post('/keyword-sets/empty', json={'keywords': ['  ']}).status_code == 400
+
+
+@pytest.mark.parametrize('split', [False, True])
+def test_revised_pdf_rescans_only_changed_pages(monkeypatch, tmp_path, split):
+    """A new version of a PDF reuses the matches of its unchanged pages."""
+    monkeypatch.setattr(main, 'UNIT_STORE_MB', 16)
+    monkeypatch.setattr(main, 'UNIT_STORE_DIR', str(tmp_path / 'units'))
+    if split:
+        monkeypatch.setattr(main, 'PARSE_WORKERS', 2)
+        monkeypatch.setattr(main, 'PDF_SPLIT_BYTES', 0)
+        monkeypatch.setattr(main, 'PDF_PAGES_PER_TASK', 2)
+    pages = [f'Page {number} covers food security and diversity training' for number in range(1, 7)]
+    first = analyze_json({'report.pdf': make_pdf(pages)})
+    assert first['incremental'] == [{'file_path': 'report.pdf', 'unit': 'page', 'units': 6,
+                                     'reused': [], 'rescanned': [1, 2, 3, 4, 5, 6]}]
+
+    revised = pages[:5]
+    revised[2] = 'Page 3 now covers gender equity only'
+    revised[4] = 'Page 5 has no terms'
+    body = client.post('/analyze?timings=true', json={'files': [
+        {'filename': 'report.pdf', 'content': base64.b64encode(make_pdf(revised)).decode()}
+    ]}).json()
+    assert body['incremental'] == [{'file_path': 'report.pdf', 'unit': 'page', 'units': 5,
+                                    'reused': [1, 2, 4], 'rescanned': [3, 5]}]
+    assert body['timings']['files'][0]['counts'] == {'pages': 2, 'pages_reused': 3}
+
+    monkeypatch.setattr(main, 'UNIT_STORE_MB', 0)
+    monkeypatch.setattr(main, 'result_cache', ResultCache(0))
+    full = analyze_json({'report.pdf': make_pdf(revised)})
+    assert body['results'] == full['results']
+    assert [r['keyword'] for r in body['results'] if r['location'] == 'Page 3'] == ['gender']
+
+
+def test_revised_workbook_rescans_only_changed_sheets(monkeypatch, tmp_path):
+    """Editing one sheet renumbers the shared strings but leaves other sheets reusable."""
+    monkeypatch.setattr(main, 'UNIT_STORE_MB', 16)
+    monkeypatch.setattr(main, 'UNIT_STORE_DIR', str(tmp_path / 'units'))
+
+    def workbook(budget_rows):
+        book = Workbook()
+        book.active.title = 'Budget'
+        for row in budget_rows:
+            book.active.append(row)
+        targets = book.create_sheet('Targets')
+        targets.append(['Reach key populations with outreach', 12])
+        targets.append(['Quarterly diversity training sessions', 4])
+        buffer = io.BytesIO()
+        book.save(buffer)
+        return buffer.getvalue()
+
+    analyze_json({'partner_b.xlsx': workbook([['Item'], ['Food for community workers', 500]])})
+    revised = workbook([['New gender assessment line'], ['Item'], ['Food for community workers', 500]])
+    upload = client.post('/analyze/upload', files=[('files', ('partner_b.xlsx', revised, 'application/octet-stream'))])
+    body = upload.json()
+    assert body['incremental'] == [{'file_path': 'partner_b.xlsx', 'unit': 'sheet', 'units': 2,
+                                    'reused': ['Targets'], 'rescanned': ['Budget']}]
+
+    monkeypatch.setattr(main, 'UNIT_STORE_MB', 0)
+    monkeypatch.setattr(main, 'result_cache', ResultCache(0))
+    assert body['results'] == analyze_json({'partner_b.xlsx': revised})['results']
+
+
+def test_columnar_format_decodes_to_records():
+    """?format=columnar carries the same results as column arrays."""
+    from columnar import decode_results
+
+    expected = analyze_json(SAMPLE_FILES)
+    payload = {'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name, content in SAMPLE_FILES.items()
+    ]}
+    body = client.post('/analyze?format=columnar&timings=true', json=payload).json()
+    assert body['format'] == 'columnar'
+    assert body['total_matches'] == expected['total_matches']
+    assert decode_results(body['results']) == expected['results']
+    assert len(body['timings']['files']) == len(SAMPLE_FILES)
+
+    upload = client.post('/analyze/upload?format=columnar', files=[
+        ('files', (name, content, 'application/octet-stream')) for name, content in SAMPLE_FILES.items()
+    ])
+    assert decode_results(upload.json()['results']) == expected['results']
+    assert client.post('/analyze?format=xml', json=payload).status_code == 422
+
+
+def test_search_index_matches_analyze_for_new_keywords():
+    """Indexed documents are searched with a keyword set created after ingestion, as /analyze would scan them."""
+    files = dict(SAMPLE_FILES, **{'report.pdf': make_pdf(['Gender equity review. Food aid. Format notes', 'No terms'])})
+    upload = [('files', (name, content, 'application/octet-stream')) for name, content in files.items()]
+    body = client.post('/index', files=upload + [('files', ('notes.txt', b'gender', 'text/plain'))]).json()
+    assert [document.get('status') for document in body['documents']] == ['indexed', 'indexed', 'indexed', None]
+    assert body['documents'][3]['error'] == 'Unsupported file type: notes.txt'
+    assert body['index']['documents'] == 3
+    assert [document['status'] for document in client.post('/index', files=upload).json()['documents']] == ['unchanged'] * 3
+
+    client.post('/keyword-sets/audit', json={'keywords': ['hiring', 'mat', 'food', 'equity']})
+    found = client.get('/search', params={'keyword_set': 'audit'}).json()
+    payload = {'keyword_set': 'audit', 'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name, content in files.items()
+    ]}
+    expected = client.post('/analyze', json=payload).json()
+    assert found['keyword_set'] == {'name': 'audit', 'version': 1}
+    assert found['files_processed'] == 3
+    assert found['results'] == expected['results']
+    assert {r['keyword'] for r in found['results']} == {'hiring', 'mat', 'food', 'equity'}
+
+    default = client.get('/search').json()
+    assert default['results'] == analyze_json(files)['results']
+
+
+def test_search_terms_file_filter_and_removal():
+    client.post('/index', files=[('files', (name, content, 'application/octet-stream')) for name, content in SAMPLE_FILES.items()])
+
+    found = client.get('/search', params=[('keyword', 'Hiring'), ('keyword', 'GBV'), ('keyword', 'gender')]).json()
+    assert [(r['file_path'], r['keyword']) for r in found['results']] == [
+        ('partner_a.docx', 'Hiring'), ('partner_a.docx', 'gender')]
+    result = found['results'][0]
+    assert result['exact_sentence'][result['keyword_start']:result['keyword_end']] == 'hiring'
+    assert found['keyword_set'] == {'name': None, 'version': None}
+
+    only_b = client.get('/search', params={'keyword': 'food', 'file': 'partner_b.xlsx'}).json()
+    assert [(r['file_path'], r['location']) for r in only_b['results']] == [('partner_b.xlsx', 'Row 2, Column 2')]
+    assert client.get('/search', params={'keyword': 'food', 'keyword_set': 'default'}).status_code == 400
+
+    assert client.delete('/index/partner_b.xlsx').json() == {'file_path': 'partner_b.xlsx', 'status': 'removed'}
+    assert client.delete('/index/partner_b.xlsx').status_code == 404
+    assert client.get('/search', params={'keyword': 'food'}).json()['results'] == []
+    assert client.get('/index').json()['documents'] == 1
+
+
+def test_admission_budget_rejects_with_retry_after(monkeypatch):
+    import asyncio
+    from admission import AdmissionBudget
+
+    content = SAMPLE_FILES['partner_a.docx']
+    budget = AdmissionBudget(2 * len(content), 2, max_wait=0)
+    monkeypatch.setattr(main, 'admission', budget)
+    held = asyncio.run(budget.reserve(len(content) + 1))
+
+    response = client.post('/analyze', json={'files': [
+        {'filename': 'partner_a.docx', 'content': base64.b64encode(content).decode()}
+    ]})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    upload = client.post('/analyze/upload', files=[('files', ('partner_a.docx', content, 'application/octet-stream'))])
+    assert upload.status_code == 429
+    assert client.get('/admission').json()['rejected'] == 2
+    assert 'compliance_admission_rejected_total{endpoint="/analyze",status="429"} 1' in client.get('/metrics').text
+
+    held.release()
+    assert analyze_json({'partner_a.docx': content})['total_matches'] == 2
+    too_large = client.post('/analyze', json={'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name in ('a.docx', 'b.docx', 'c.docx')
+    ]})
+    assert too_large.status_code == 413 and too_large.json()['detail'].startswith('Request needs')
+    stats = client.get('/admission').json()
+    assert (stats['bytes_in_use'], stats['parses_active'], stats['rejected']) == (0, 0, 3)
+
+
+def test_oversized_file_is_rejected_before_decoding(monkeypatch):
+    monkeypatch.setattr(main, 'MAX_FILE_MB', 1)
+    oversized = b'x' * (1024 * 1024 + 1)
+    encoded = base64.b64encode(oversized).decode()
+    assert main.decoded_size(encoded) == len(oversized)
+
+    def refuse(*args, **kwargs):
+        raise AssertionError('oversized file was decoded')
+    monkeypatch.setattr(main.base64, 'b64decode', refuse)
+    body = client.post('/analyze', json={'files': [{'filename': 'huge.pdf', 'content': encoded}]}).json()
+    assert body['results'] == [{'error': f'File too large: huge.pdf is {len(oversized)} bytes, the limit is 1 MB'}]
+
+    upload = client.post('/analyze/upload', files=[('files', ('huge.pdf', oversized, 'application/pdf'))]).json()
+    assert upload['results'] == body['results']
+
+
+real_process_file = main.process_file
+
+
+def stalling_process_file(file_content, filename, *args):
+    """process_file, except that stall.pdf never finishes."""
+    if filename == 'stall.pdf':
+        time.sleep(60)
+    return real_process_file(file_content, filename, *args)
+
+
+def test_file_over_time_limit_gets_an_error_entry(monkeypatch):
+    """A stalled file is killed at the parse time limit while the rest of the batch completes."""
+    monkeypatch.setattr(main, 'process_file', stalling_process_file)
+    # Workers are forked on first use, so they see the patched process_file
+    pool = main.IsolatedPool(1, 0.5, 0)
+    monkeypatch.setattr(main, '_executor', pool)
+    try:
+        files = dict(SAMPLE_FILES, **{'stall.pdf': make_pdf(['Food parcels were delivered'])})
+        started = time.perf_counter()
+        body = analyze_json(files)
+        assert time.perf_counter() - started < 10
+        assert body['results'][-1] == {'error': 'Error processing PDF stall.pdf: exceeded the 0.5 s time limit'}
+        assert body['total_matches'] == 4
+        assert 'compliance_parse_limits_exceeded_total{limit="time"} 1' in client.get('/metrics').text
+    finally:
+        pool.shutdown()
+
+
+real_stream_file = main.stream_file
+
+
+def stalling_stream_file(file_content, filename, *args):
+    """stream_file, except that stall.pdf never finishes."""
+    if filename == 'stall.pdf':
+        time.sleep(60)
+    return real_stream_file(file_content, filename, *args)
+
+
+def test_aborted_streams_do_not_hold_threads(monkeypatch):
+    """A client leaving mid-parse kills its worker without leaving a thread waiting on the batch queue."""
+    monkeypatch.setattr(main, 'stream_file', stalling_stream_file)
+    monkeypatch.setattr(main, 'admission', main.AdmissionBudget(0, 4, 10))
+    pool = main.IsolatedPool(1, 0, 0)
+    monkeypatch.setattr(main, '_executor', pool)
+    files = [main.FileData(filename='stall.pdf', content=base64.b64encode(make_pdf(['Gender norms'])).decode())]
+    keyword_set = main.get_keyword_store().resolve(None, None)
+
+    async def worker_busy(reading):
+        while len(pool._workers) == len(pool._idle):
+            assert not reading.done()
+            await asyncio.sleep(0.05)
+        await asyncio.sleep(0.2)
+
+    async def scenario():
+        for _ in range(3):
+            stream = main.stream_results(files, keyword_set, await main.admission.reserve(0))
+            reading = asyncio.create_task(stream.__anext__())
+            await asyncio.wait_for(worker_busy(reading), 5)
+            reading.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await reading
+        return await asyncio.wait_for(asyncio.to_thread(sum, [1, 2]), 5)
+
+    # As many threads as streams aborted, so that every thread left waiting on the queue counts
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(3))
+    try:
+        assert loop.run_until_complete(scenario()) == 3
+    finally:
+        loop.close()
+        pool.shutdown()
+
+
+real_process_pdf_pages = main.process_pdf_pages
+
+
+def stalling_process_pdf_pages(path, filename, first_page, *args):
+    """process_pdf_pages, except that the first range fails at once and the others take a while."""
+    if first_page == 1:
+        raise RuntimeError('range failed')
+    time.sleep(5)
+    return real_process_pdf_pages(path, filename, first_page, *args)
+
+
+def test_failed_pdf_range_cancels_the_other_ranges(monkeypatch):
+    """When one range of a split PDF fails, the others stop too instead of reading a deleted file."""
+    monkeypatch.setattr(main, 'process_pdf_pages', stalling_process_pdf_pages)
+    monkeypatch.setattr(main, 'PDF_PAGES_PER_TASK', 1)
+    pool = main.IsolatedPool(3, 30, 0)
+    monkeypatch.setattr(main, '_executor', pool)
+    pdf = make_pdf(['Gender norms', 'Food parcels', 'Diversity in hiring'])
+
+    async def scenario():
+        results, _, _, _ = await main.process_pdf_split(pdf, 'report.pdf', main.KEYWORDS)
+        # Checked before asyncio.run() cancels whatever is left
+        return results, len(pool._workers) - len(pool._idle)
+
+    try:
+        started = time.perf_counter()
+        results, busy = asyncio.run(scenario())
+        assert results == [{'error': 'Error processing PDF report.pdf: range failed'}]
+        assert busy == 0
+        assert time.perf_counter() - started < 4
+    finally:
+        pool.shutdown()
+
+
+def test_summary_format_counts_without_results(monkeypatch):
+    """?format=summary returns the counts a dashboard would derive from the records response, and no results."""
+    pdf = make_pdf(['Gender norms were discussed', 'Food parcels were delivered', 'Diversity and gender in hiring'])
+    files = dict(SAMPLE_FILES, **{'report.pdf': pdf, 'notes.txt': b'gender'})
+    records = analyze_json(files)
+    payload = {'files': [
+        {'filename': name, 'content': base64.b64encode(content).decode()} for name, content in files.items()
+    ]}
+    # Only the workbook is served from the cache; the other files are summarized in the workers
+    monkeypatch.setattr(main, 'result_cache', ResultCache(16 * 1024 * 1024))
+    analyze_json({'partner_b.xlsx': SAMPLE_FILES['partner_b.xlsx']})
+    body = client.post('/analyze', params={'format': 'summary', 'top': 1}, json=payload).json()
+
+    matches = [result for result in records['results'] if 'error' not in result]
+    assert 'results' not in body and body['format'] == 'summary'
+    assert (body['total_matches'], body['keywords_found'], body['files_processed']) == (
+        records['total_matches'], records['keywords_found'], records['files_processed']
+    )
+    for field, counts in (('keyword', body['by_keyword']), ('partner', body['by_partner']),
+                          ('file_path', body['by_file'])):
+        expected = {}
+        for result in matches:
+            expected[result[field]] = expected.get(result[field], 0) + 1
+        assert {name: count for name, count in counts.items() if count} == expected
+    assert body['by_file']['notes.txt'] == 0
+    assert body['errors'] == [result for result in records['results'] if 'error' in result]
+    # 'Diversity and gender in hiring' holds two keywords, so it outranks the earlier gender matches
+    assert [(r['location'], r['exact_sentence'], r['keywords_in_sentence']) for r in body['top_sentences']['gender']] == [
+        ('Page 3', 'Diversity and gender in hiring', 2)
+    ]
+    assert all(len(top) == 1 for top in body['top_sentences'].values())
+
+    upload = client.post('/analyze/upload', params={'format': 'summary', 'top': 1},
+                         files=[('files', (name, content, 'application/octet-stream')) for name, content in files.items()])
+    assert upload.json() == body
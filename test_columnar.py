@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar result encoding.
+"""
+
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from columnar import decode_results, dumps, encode_results, split_template
+
+
+def match(filename, source_type, source_name, location, keyword='food'):
+    return {
+        'file_path': filename,
+        'source_type': source_type,
+        'source_name': source_name,
+        'location': location,
+        'keyword': keyword,
+        'exact_sentence': f'A sentence about {keyword}',
+        'partner': filename.split('.')[0],
+        'sentence_start': 0,
+        'sentence_end': 17 + len(keyword),
+        'keyword_start': 17,
+        'keyword_end': 17 + len(keyword)
+    }
+
+
+def test_split_template_keeps_text_that_does_not_round_trip():
+    assert split_template('Table 3, Row 2, Cell 4') == ('Table {}, Row {}, Cell {}', [3, 2, 4])
+    assert split_template('Q{1} 007') == ('Q{{{}}} 007', [1])
+    assert split_template('Cell 12345678901234567') == ('Cell 12345678901234567', [])
+
+
+def test_round_trip_and_dictionary_encoding():
+    results = [
+        match('report.pdf', 'page', 'Page 1', 'Page 1'),
+        match('report.pdf', 'page', 'Page 1', 'Page 1', 'race'),
+        {'error': 'Error processing PDF broken.pdf: EOF marker not found'},
+        match('budget.xlsx', 'worksheet', 'Sheet1', 'Row 12, Column 3'),
+        match('plan.docx', 'table', 'Table 2', 'Table 2, Row 1, Cell {4}'),
+    ]
+    encoded = json.loads(dumps(encode_results(results)))
+
+    assert encoded['count'] == 4
+    assert encoded['file_path'] == {'values': ['report.pdf', 'budget.xlsx', 'plan.docx'], 'indices': [0, 0, 1, 2]}
+    assert encoded['location']['templates'] == ['Page {}', 'Row {}, Column {}', 'Table {}, Row {}, Cell {{{}}}']
+    assert encoded['location']['numbers'] == [1, 1, 12, 3, 2, 1, 4]
+    assert encoded['errors'] == ['Error processing PDF broken.pdf: EOF marker not found']
+    assert decode_results(encoded) == [result for result in results if 'error' not in result]
+
+
+def test_locations_with_leading_zeros_round_trip():
+    results = [match('a.xlsx', 'worksheet', 'Q1', 'Row 007, Column 2'), match('a.xlsx', 'worksheet', 'Q1', 'Row 8, Column 2')]
+    encoded = encode_results(results)
+    assert encoded['location']['templates'] == ['Row 007, Column {}', 'Row {}, Column {}']
+    assert decode_results(encoded) == results
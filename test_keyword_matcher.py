@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Checks that the compiled keyword matcher returns the same matches as the original nested loop.
+"""
+
+import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+import analyze
+from keyword_matcher import KeywordMatcher, get_matcher
+
+
+def legacy_extract(text, keywords, min_length=0):
+    """The nested keyword loop that extract_sentences_from_text used to run."""
+    matches = []
+    for sentence in re.split(r'[.!?]+', text):
+        sentence = sentence.strip()
+        if len(sentence) < min_length:
+            continue
+        for keyword in keywords:
+            if keyword.lower() in sentence.lower():
+                matches.append({'keyword': keyword, 'sentence': sentence, 'exact_sentence': sentence})
+                break
+    return matches
+
+
+SAMPLE_TEXT = (
+    "Transgender women are a key population. The DEI initiative is important! "
+    "We focus on dei programs in our company. Mathematics and food security? "
+    "The programme supports key pops and FSW outreach. Gender-based violence (GBV) services. "
+    "Nothing to see here. Short. The team works on important projects. "
+    "Trans-gender identity and non-binary pronouns were discussed... Race and prejudice. "
+    "Hormone therapy for transmen and transwomen. A  gbv  case was recorded"
+)
+
+
+def test_matches_legacy_loop():
+    """Both keyword lists give identical results to the legacy loop."""
+    for keywords, min_length in ((main.KEYWORDS, 10), (analyze.KEYWORDS, 0)):
+        expected = legacy_extract(SAMPLE_TEXT, keywords, min_length)
+        actual = get_matcher(keywords).extract_sentences(SAMPLE_TEXT, min_length=min_length)
+        assert actual == expected
+
+
+def test_length_changing_lowercase():
+    """Text whose lowercase form changes length still matches like the legacy loop."""
+    text = "İstanbul partners reported on gender. Diversity training for İzmir staff"
+    assert get_matcher(main.KEYWORDS).extract_sentences(text) == legacy_extract(text, main.KEYWORDS)
+
+
+def test_first_listed_keyword_wins():
+    """A keyword earlier in the list wins even if a later one appears first in the sentence."""
+    matcher = KeywordMatcher(['gender', 'transgender', 'trans'])
+    assert matcher.first_keyword('Transgender people') == 'gender'
+    assert KeywordMatcher(['trans', 'transgender']).first_keyword('Transgender people') == 'trans'
+    assert matcher.first_keyword('Nothing relevant') is None
+
+
+def test_matcher_is_cached():
+    assert get_matcher(main.KEYWORDS) is get_matcher(list(main.KEYWORDS))
+
+
+if __name__ == "__main__":
+    test_matches_legacy_loop()
+    test_length_changing_lowercase()
+    test_first_listed_keyword_wins()
+    test_matcher_is_cached()
+    print("✓ PASS")
+
+
+def test_spans_point_into_the_text():
+    """Sentence and keyword offsets slice the original text back out, in both code paths."""
+    for text in (SAMPLE_TEXT, "İstanbul partners reported on GENDER. Diversity training for İzmir staff"):
+        expected = legacy_extract(text, main.KEYWORDS)
+        matches = list(get_matcher(main.KEYWORDS).iter_matches(text))
+        assert [text[match.start:match.end] for match in matches] == [match['sentence'] for match in expected]
+        for match in matches:
+            assert text[match.keyword_start:match.keyword_end].lower() == match.keyword.lower()
+            assert match.start <= match.keyword_start < match.keyword_end <= match.end
+
+
+def test_spans_of_repeated_roots():
+    """Several hits in one sentence give one match; the keyword span is the first listed keyword's hit."""
+    text = "  Food and more food!  Transgender and trans people. "
+    matches = list(KeywordMatcher(['trans', 'food']).iter_matches(text))
+    assert [(m.keyword, m.start, m.end, m.keyword_start, m.keyword_end) for m in matches] == [
+        ('food', 2, 20, 2, 6),
+        ('trans', 23, 51, 23, 28),
+    ]
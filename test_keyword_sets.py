@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned keyword set store.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from keyword_matcher import get_matcher
+from keyword_sets import DEFAULT_KEYWORDS, KeywordSetStore, validate_keyword_set
+
+
+def test_default_set_is_built_in_until_replaced(tmp_path):
+    store = KeywordSetStore(str(tmp_path))
+    assert store.resolve()['keywords'] == tuple(DEFAULT_KEYWORDS)
+    assert store.resolve()['version'] == 0
+
+    store.create_version('default', ['food'])
+    assert store.resolve()['keywords'] == ('food',)
+    assert store.resolve('default', 0)['keywords'] == tuple(DEFAULT_KEYWORDS)
+    assert store.versions('default') == [0, 1]
+
+
+def test_versions_survive_restart_and_lru_eviction(tmp_path):
+    store = KeywordSetStore(str(tmp_path), cache_size=1)
+    store.create_version('grants', ['gender'])
+    store.create_version('grants', ['gender', 'equity'])
+    assert store.resolve('grants', 1)['keywords'] == ('gender',)
+    assert store.resolve('grants')['version'] == 2
+    assert len(store._cache) == 1
+
+    reopened = KeywordSetStore(str(tmp_path))
+    resolved = reopened.resolve('grants')
+    assert resolved['keywords'] == ('gender', 'equity')
+    assert resolved['fingerprint'] != reopened.resolve('grants', 1)['fingerprint']
+    # Resolving compiles the matcher, so requests only look it up
+    assert get_matcher(resolved['keywords']).keywords == ('gender', 'equity')
+    assert reopened.resolve('grants', 3) is None
+    assert reopened.resolve('unknown') is None
+
+
+def test_validation():
+    assert validate_keyword_set('grants', ['gender']) is None
+    assert validate_keyword_set('../etc', ['gender'])
+    assert validate_keyword_set('grants', [])
+    assert validate_keyword_set('grants', ['gender', ''])
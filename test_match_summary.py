@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the aggregation-only match summary.
+"""
+
+import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from match_summary import MatchSummary
+
+KEYWORDS = ['gender', 'equity', 'food', 'diversity']
+
+
+def match(file_path, keyword, sentence, location='Page 1'):
+    return {
+        'file_path': file_path,
+        'location': location,
+        'keyword': keyword,
+        'exact_sentence': sentence,
+        'partner': file_path.split('.')[0],
+    }
+
+
+def test_counts_and_top_sentences():
+    summary = MatchSummary(KEYWORDS, top_n=2)
+    summary.start_file('empty.pdf', 'empty')
+    summary.add_results([
+        match('a.pdf', 'gender', 'Gender training held'),
+        match('a.pdf', 'gender', 'Gender and equity and food', 'Page 2'),
+        {'error': 'Error processing PDF b.pdf: broken'},
+        match('b.docx', 'food', 'Food parcels'),
+        match('b.docx', 'gender', 'Gender and diversity', 'Page 3'),
+        match('b.docx', 'gender', 'Gender audit', 'Page 4'),
+    ])
+    body = summary.to_dict()
+    assert summary.total_matches == 5
+    assert body['by_keyword'] == {'gender': 4, 'food': 1}
+    assert list(body['by_keyword']) == ['gender', 'food']
+    assert body['by_partner'] == {'empty': 0, 'a': 2, 'b': 3}
+    assert body['by_file'] == {'empty.pdf': 0, 'a.pdf': 2, 'b.docx': 3}
+    assert body['errors'] == [{'error': 'Error processing PDF b.pdf: broken'}]
+    # Most keywords first; of the one-keyword sentences only two fit, and the earlier one wins the tie
+    assert [(r['exact_sentence'], r['keywords_in_sentence']) for r in body['top_sentences']['gender']] == [
+        ('Gender and equity and food', 3), ('Gender and diversity', 2)
+    ]
+    assert MatchSummary(KEYWORDS, top_n=0).to_dict()['top_sentences'] == {}
+
+
+def test_merged_file_summaries_equal_one_summary_of_all_matches():
+    rng = random.Random(0)
+    files = []
+    for number in range(6):
+        file_path = f'partner_{number}.pdf'
+        files.append([
+            match(file_path, rng.choice(KEYWORDS), ' '.join(rng.sample(KEYWORDS, rng.randint(1, 4))), f'Page {page}')
+            for page in range(rng.randint(0, 30))
+        ])
+
+    whole = MatchSummary(KEYWORDS, top_n=3)
+    for results in files:
+        whole.add_results(results)
+
+    merged = MatchSummary(KEYWORDS, top_n=3)
+    for results in files:
+        part = MatchSummary(KEYWORDS, top_n=3)
+        part.add_results(results)
+        merged.merge(part)
+
+    assert merged.total_matches == whole.total_matches
+    assert merged.to_dict() == whole.to_dict()
+    assert all(len(heap) <= 3 for heap in merged.top.values())
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for stage timing and the Prometheus text rendering.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import Counter, Gauge, Histogram, Registry, add_count, stage, timed
+
+
+def scan(pages):
+    for _ in range(pages):
+        with stage('extract'):
+            add_count('pages')
+    return 'done'
+
+
+def test_timed_collects_stages_and_counts():
+    result, seconds, counts = timed(scan, 3)
+    assert result == 'done'
+    assert set(seconds) == {'extract'}
+    assert counts == {'pages': 3}
+
+    # Outside timed() the helpers record nothing
+    assert scan(1) == 'done'
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    latency = registry.register(Histogram('latency_seconds', 'Latency', ['format'], buckets=(0.1, 1)))
+    files = registry.register(Counter('files_total', 'Files', ['format']))
+    busy = registry.register(Gauge('busy', 'Busy'))
+
+    latency.observe(0.5, ('pdf',))
+    latency.observe(2, ('pdf',))
+    files.inc(('pdf',), 2)
+    with busy.track():
+        assert 'busy 1' in registry.render()
+
+    lines = registry.render().splitlines()
+    assert '# TYPE latency_seconds histogram' in lines
+    assert 'latency_seconds_bucket{format="pdf",le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{format="pdf",le="1"} 1' in lines
+    assert 'latency_seconds_bucket{format="pdf",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{format="pdf"} 2' in lines
+    assert 'files_total{format="pdf"} 2' in lines
+    assert 'busy 0' in lines
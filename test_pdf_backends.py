@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the PDF text-extraction backends and their fallback chain.
+"""
+
+import asyncio
+import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import main
+import pdf_backends
+from benchmarks.corpus import make_pdf
+from metrics import timed
+from unit_store import UnitStore
+from worker_pool import IsolatedPool
+
+PAGES = ['Food parcels were delivered to the clinic', 'No terms here', 'Diversity in hiring was reviewed']
+
+
+def normalize(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+@pytest.mark.parametrize('name', list(pdf_backends.BACKENDS))
+def test_backend_extracts_every_page(name):
+    pytest.importorskip(pdf_backends.BACKEND_MODULES[name])
+    document = pdf_backends.open_document(make_pdf(PAGES), [name])
+    try:
+        assert document.backend == name
+        assert [normalize(document.page_text(index)) for index in range(len(document))] == PAGES
+    finally:
+        document.close()
+
+
+class BrokenBackend:
+    """Opens any file and fails on every page."""
+
+    def __init__(self, source):
+        pass
+
+    def __len__(self):
+        return len(PAGES)
+
+    def page_text(self, index):
+        raise ValueError('cannot decode page')
+
+    def close(self):
+        pass
+
+
+class UnreadableBackend:
+    def __init__(self, source):
+        raise ValueError('not a PDF I can read')
+
+
+def test_failed_pages_fall_back_to_the_next_backend(monkeypatch):
+    monkeypatch.setitem(pdf_backends.BACKENDS, 'broken', BrokenBackend)
+    results, _, counts = timed(main.process_pdf, make_pdf(PAGES), 'partner.pdf', main.KEYWORDS, ('broken', 'pypdf2'))
+    assert [(r['location'], r['keyword']) for r in results] == [('Page 1', 'food'), ('Page 3', 'diversity')]
+    assert counts['pdf_fallbacks'] == len(PAGES)
+
+
+def test_unreadable_file_opens_with_the_next_backend(monkeypatch):
+    monkeypatch.setitem(pdf_backends.BACKENDS, 'unreadable', UnreadableBackend)
+    document = pdf_backends.open_document(make_pdf(PAGES), ['unreadable', 'pypdf2'])
+    assert document.backend == 'pypdf2' and len(document) == len(PAGES)
+
+
+def test_error_of_the_first_backend_is_reported(monkeypatch):
+    monkeypatch.setitem(pdf_backends.BACKENDS, 'unreadable', UnreadableBackend)
+    results = main.process_pdf(b'not a pdf', 'broken.pdf', main.KEYWORDS, ('unreadable', 'pypdf2'))
+    assert results == [{'error': 'Error processing PDF broken.pdf: not a PDF I can read'}]
+
+
+def test_backend_chain_is_checked():
+    assert main.parse_pdf_backends(' pypdf2 , ') == ('pypdf2',)
+    with pytest.raises(ValueError, match='lists no PDF backend'):
+        main.parse_pdf_backends(' ')
+    with pytest.raises(ValueError, match='Unknown PDF backend in PDF_BACKENDS: pdfium, available: .*pypdf2'):
+        main.parse_pdf_backends('pypdf2,pdfium')
+    assert main.process_pdf(make_pdf(PAGES), 'a.pdf', main.KEYWORDS, ()) == [
+        {'error': 'Error processing PDF a.pdf: No PDF backend to open the file with'}
+    ]
+    assert main.process_pdf(make_pdf(PAGES), 'a.pdf', main.KEYWORDS, ('pdfium',)) == [
+        {'error': 'Error processing PDF a.pdf: Unknown PDF backend: pdfium'}
+    ]
+
+
+def test_split_pdf_pypdf2_cannot_open_is_read_by_the_next_backend(monkeypatch, tmp_path):
+    """Without PyPDF2 there are no page fingerprints, so the ranges are scanned in full and not stored."""
+    monkeypatch.setitem(pdf_backends.BACKENDS, 'pypdf2', UnreadableBackend)
+    monkeypatch.setitem(pdf_backends.BACKENDS, 'fallback', pdf_backends.PyPDF2Backend)
+    monkeypatch.setattr(main, 'PDF_PAGES_PER_TASK', 2)
+    # Workers are forked on first use, so they see the patched backends
+    pool = IsolatedPool(2, 0, 0)
+    monkeypatch.setattr(main, '_executor', pool)
+    units = UnitStore(str(tmp_path), 16 * 1024 * 1024)
+    try:
+        results, _, _, report = asyncio.run(main.process_pdf_split(
+            make_pdf(PAGES), 'partner.pdf', main.KEYWORDS, units, 'partner', ('pypdf2', 'fallback')
+        ))
+    finally:
+        pool.shutdown()
+    assert [(r['location'], r['keyword']) for r in results] == [('Page 1', 'food'), ('Page 3', 'diversity')]
+    assert report is None
+
+
+def test_backend_chain_is_part_of_the_cache_key():
+    assert main.parser_id('pdf', main.DEFAULT_PDF_BACKENDS) == f"pdf.v{main.PARSER_VERSIONS['pdf']}"
+    assert main.parser_id('pdf', ('pypdfium2', 'pypdf2')) == f"pdf.v{main.PARSER_VERSIONS['pdf']}.pypdfium2+pypdf2"
+    assert main.parser_id('word', ('pypdfium2',)) == f"word.v{main.PARSER_VERSIONS['word']}"
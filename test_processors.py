@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-format processors in main.py.
+"""
+
+import io
+import sys
+import os
+import zipfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from docx import Document
+from openpyxl import Workbook
+
+import main
+from benchmarks.corpus import generate_docx, make_pdf
+
+
+def make_sparse_workbook():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = 'Narrative'
+    sheet['C5'] = 'Food vouchers for key populations'
+    sheet['A9'] = 'Food vouchers for key populations'
+    sheet['F2'] = 42
+    other = workbook.create_sheet('Notes')
+    other['B3'] = 'Gender norms were discussed at length'
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_excel_locations_with_gaps():
+    """Read-only streaming keeps row and column numbers for sparse sheets."""
+    results = main.process_excel(make_sparse_workbook(), 'partner.xlsx')
+    assert [(r['source_name'], r['location'], r['keyword']) for r in results] == [
+        ('Narrative', 'Row 5, Column 3', 'key populations'),
+        ('Narrative', 'Row 9, Column 1', 'key populations'),
+        ('Notes', 'Row 3, Column 2', 'gender'),
+    ]
+    # Memoized matches still produce independent result dicts
+    assert results[0] is not results[1]
+
+
+def test_excel_error_entry():
+    assert main.process_excel(b'not a workbook', 'broken.xlsx')[0]['error'].startswith('Error processing Excel broken.xlsx')
+
+
+FOOTNOTES = (
+    '<w:footnotes xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>'
+    '<w:footnote w:id="1"><w:p><w:r><w:t>Budget line covers food for outreach staff</w:t></w:r></w:p></w:footnote>'
+    '</w:footnotes>'
+)
+
+
+def make_rich_docx():
+    doc = Document()
+    doc.add_paragraph('Overview of the gender programme.')
+    doc.add_paragraph('')
+    table = doc.add_table(rows=2, cols=4)
+    table.cell(1, 3).text = 'Vouchers for key populations'
+    doc.add_paragraph('Closing note on diversity training.')
+    doc.sections[0].header.paragraphs[0].text = 'Draft: equity review pending'
+    doc.sections[0].footer.paragraphs[0].text = 'No terms in this footer'
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer, 'a') as package:
+        package.writestr('word/footnotes.xml', FOOTNOTES)
+    return buffer.getvalue()
+
+
+def test_word_covers_tables_headers_and_footnotes():
+    results = main.process_word(make_rich_docx(), 'partner.docx')
+    assert [(r['source_type'], r['source_name'], r['location'], r['keyword']) for r in results] == [
+        ('paragraph', 'Paragraph 1', 'Paragraph 1', 'gender'),
+        ('table', 'Table 1', 'Table 1, Row 2, Cell 4', 'key populations'),
+        ('paragraph', 'Paragraph 3', 'Paragraph 3', 'diversity'),
+        ('header', 'Header 1', 'Header 1, Paragraph 1', 'equity'),
+        ('footnote', 'Footnote 1', 'Footnote 1', 'food'),
+    ]
+
+
+def test_word_body_matches_python_docx():
+    """Body paragraphs keep the text and numbering of python-docx's Document.paragraphs."""
+    content = generate_docx(200, keyword_density=0.3)
+    expected = [
+        (f'Paragraph {number}', match['keyword'], match['sentence'])
+        for number, paragraph in enumerate(Document(io.BytesIO(content)).paragraphs, 1)
+        for match in main.extract_sentences_from_text(paragraph.text, main.KEYWORDS)
+    ]
+    results = main.process_word(content, 'narrative.docx')
+    assert [(r['location'], r['keyword'], r['exact_sentence']) for r in results] == expected
+
+
+def make_docx_with_content_control():
+    """A cover-page content control holding two paragraphs, then ordinary body paragraphs."""
+    from docx.oxml.parser import parse_xml
+
+    doc = Document()
+    doc.add_paragraph('Nothing to report here.')
+    doc.add_paragraph('Gender norms were discussed.')
+    doc.element.body.insert(0, parse_xml(
+        '<w:sdt xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:sdtContent>'
+        '<w:p><w:r><w:t>Annual report</w:t></w:r></w:p>'
+        '<w:p><w:r><w:t>Our diversity commitments</w:t></w:r></w:p>'
+        '</w:sdtContent></w:sdt>'
+    ))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def test_word_content_controls_keep_python_docx_paragraph_numbers():
+    content = make_docx_with_content_control()
+    numbered = [paragraph.text for paragraph in Document(io.BytesIO(content)).paragraphs]
+    assert numbered.index('Gender norms were discussed.') == 1
+    results = main.process_word(content, 'partner.docx')
+    assert [(r['source_type'], r['source_name'], r['location'], r['keyword']) for r in results] == [
+        ('content_control', 'Content control 1', 'Content control 1, Paragraph 2', 'diversity'),
+        ('paragraph', 'Paragraph 2', 'Paragraph 2', 'gender'),
+    ]
+
+
+def test_word_spans_slice_the_paragraph_text():
+    results = main.process_word(make_rich_docx(), 'partner.docx')
+    footnote = results[-1]
+    assert (footnote['sentence_start'], footnote['sentence_end']) == (0, len(footnote['exact_sentence']))
+    for result in results:
+        sentence = result['exact_sentence']
+        start = result['keyword_start'] - result['sentence_start']
+        end = result['keyword_end'] - result['sentence_start']
+        assert len(sentence) == result['sentence_end'] - result['sentence_start']
+        assert sentence[start:end].lower() == result['keyword'].lower()
+
+
+def test_word_error_entry():
+    assert main.process_word(b'not a document', 'broken.docx')[0]['error'].startswith('Error processing Word broken.docx')
+
+
+def make_pdf_with_indirect_encoding():
+    """A one-page PDF whose font encoding points at its /Differences array by reference."""
+    from PyPDF2 import PdfReader, PdfWriter
+    from PyPDF2.generic import ArrayObject, DictionaryObject, NameObject, NumberObject
+
+    writer = PdfWriter()
+    page = writer.add_page(PdfReader(io.BytesIO(make_pdf(['Food parcels were delivered']))).pages[0])
+    font = page['/Resources']['/Font']['/F1']
+    differences = writer._add_object(ArrayObject([NumberObject(39), NameObject('/quoteright')]))
+    font[NameObject('/Encoding')] = DictionaryObject({NameObject('/Differences'): differences})
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_pdf_page_fingerprint_is_stable_across_uploads():
+    from PyPDF2 import PdfReader
+
+    content = make_pdf_with_indirect_encoding()
+    first, second = (PdfReader(io.BytesIO(content)).pages[0] for _ in range(2))
+    assert main.pdf_page_fingerprint(first) == main.pdf_page_fingerprint(second)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the two-tier document result cache.
+"""
+
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from result_cache import ResultCache, cache_key, keywords_fingerprint, rewrite_results
+
+MATCHES = [{'file_path': 'a.pdf', 'partner': 'a', 'location': 'Page 1', 'keyword': 'food', 'exact_sentence': 'Food aid'}]
+ENTRY_SIZE = len(json.dumps(MATCHES).encode('utf-8'))
+
+
+def test_memory_tier_is_lru_by_bytes():
+    cache = ResultCache(ENTRY_SIZE * 2)
+    cache.put('one', MATCHES)
+    cache.put('two', MATCHES)
+    assert cache.get('one') == MATCHES  # 'two' is now least recently used
+    cache.put('three', MATCHES)
+
+    assert cache.get('two') is None
+    assert cache.get('three') == MATCHES
+    assert cache.stats()['memory_bytes'] == ENTRY_SIZE * 2
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_disk_tier_survives_restart_and_evicts(tmp_path):
+    cache = ResultCache(0, str(tmp_path), ENTRY_SIZE * 2)
+    for key in ('one', 'two', 'three'):
+        cache.put(key, MATCHES)
+
+    reopened = ResultCache(ENTRY_SIZE * 4, str(tmp_path), ENTRY_SIZE * 2)
+    assert reopened.get('one') is None
+    assert reopened.get('three') == MATCHES
+    assert reopened.stats()['disk_entries'] == 2
+    assert reopened.stats()['memory_entries'] == 1
+
+
+def test_hits_are_copies_with_rewritten_names():
+    cache = ResultCache(1024)
+    cache.put('key', MATCHES)
+    results = rewrite_results(cache.get('key'), 'b.v2.pdf')
+
+    assert results[0]['file_path'] == 'b.v2.pdf' and results[0]['partner'] == 'b'
+    assert cache.get('key') == MATCHES
+
+
+def test_key_changes_with_keywords():
+    assert cache_key('abc', 'pdf', keywords_fingerprint(['food'])) != cache_key('abc', 'pdf', keywords_fingerprint(['race']))
+    assert cache_key('abc', 'pdf', 'f') != cache_key('abc', 'excel', 'f')
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline batch scanner.
+"""
+
+import csv
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import main
+from benchmarks.corpus import generate_docx, make_pdf
+from scan import run_scan
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as handle:
+        return list(csv.DictReader(handle))
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'partners'
+    (root / 'q1').mkdir(parents=True)
+    (root / 'q1' / 'report.pdf').write_bytes(make_pdf(['Food parcels were delivered', 'Diversity in hiring']))
+    (root / 'narrative.docx').write_bytes(generate_docx(20, keyword_density=0.5))
+    (root / 'broken.xlsx').write_bytes(b'not a workbook')
+    (root / 'notes.txt').write_text('gender')
+    return root
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_scan_writes_csv(tree, tmp_path, workers):
+    output = tmp_path / 'results.csv'
+    summary = run_scan(str(tree), str(output), tuple(main.KEYWORDS), workers, progress=False)
+    assert summary['files'] == 3 and summary['errors'] == 1
+
+    rows = read_rows(output)
+    pdf_rows = [row for row in rows if row['file_path'] == os.path.join('q1', 'report.pdf')]
+    assert [(row['location'], row['keyword'], row['partner']) for row in pdf_rows] == [
+        ('Page 1', 'food', 'report'), ('Page 2', 'diversity', 'report')
+    ]
+    expected_docx = main.process_word((tree / 'narrative.docx').read_bytes(), 'narrative.docx')
+    assert len([row for row in rows if row['file_path'] == 'narrative.docx']) == len(expected_docx)
+    assert [row['error'] for row in rows if row['error']][0].startswith('Error processing Excel broken.xlsx')
+
+
+def test_resume_skips_recorded_files_and_drops_unrecorded_rows(tree, tmp_path):
+    output = tmp_path / 'results.csv'
+    run_scan(str(tree), str(output), tuple(main.KEYWORDS), 0, progress=False)
+    complete = read_rows(output)
+
+    # Simulate an interruption: the last file's rows were written but never recorded
+    ledger = tmp_path / 'results.csv.ledger'
+    lines = ledger.read_text().splitlines()
+    ledger.write_text('\n'.join(lines[:-2]) + '\n{"path": "q1/rep')
+    with pytest.raises(SystemExit):
+        run_scan(str(tree), str(output), tuple(main.KEYWORDS), 0, progress=False)
+
+    summary = run_scan(str(tree), str(output), tuple(main.KEYWORDS), 0, resume=True, progress=False)
+    assert summary['files'] == 1 and summary['skipped'] == 2
+    assert read_rows(output) == complete
+    assert [json.loads(line).get('path') for line in ledger.read_text().splitlines()].count(None) == 3
+
+
+def test_scan_writes_parquet_parts(tree, tmp_path, monkeypatch):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    import scan
+    monkeypatch.setattr(scan, 'PARQUET_PART_ROWS', 5)
+
+    output = tmp_path / 'results.parquet'
+    summary = run_scan(str(tree), str(output), tuple(main.KEYWORDS), 0, progress=False)
+    assert len(list(output.iterdir())) > 1
+    frame = parquet.read_table(output).to_pydict()
+    assert len(frame['file_path']) == summary['matches'] + summary['errors']
+    assert set(frame['file_path']) == {os.path.join('q1', 'report.pdf'), 'narrative.docx', 'broken.xlsx'}
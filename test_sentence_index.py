@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite sentence index behind /search.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sentence_index import SentenceIndex
+
+ROWS = [
+    ('page', 'Page 1', 'Page 1', 0, 'The TG outreach reached 100% of sites'),
+    ('page', 'Page 1', 'Page 1', 40, 'Format of the quarterly report'),
+    ('page', 'Page 2', 'Page 2', 5, 'Budget line key_pops was renamed'),
+]
+
+
+def test_search_resolves_candidates_like_the_matcher(tmp_path):
+    index = SentenceIndex(str(tmp_path))
+    index.add_document('report.pdf', 'digest', 'pdf.v2', ROWS)
+
+    results, documents = index.search(['tg', 'mat', 'nothing'])
+    assert documents == 1
+    assert [(r['keyword'], r['sentence_start'], r['keyword_start'], r['keyword_end']) for r in results] == [
+        ('tg', 0, 4, 6), ('mat', 40, 43, 46)]
+    assert results[0]['partner'] == 'report'
+
+    # LIKE wildcards in short keywords are literal, and boundary characters never match
+    assert [r['keyword'] for r in index.search(['0%', '_p', 'sites.'])[0]] == ['0%', '_p']
+    assert index.search(['e_'])[0] == []
+
+
+def test_reindexing_replaces_a_document(tmp_path):
+    index = SentenceIndex(str(tmp_path))
+    index.add_document('report.pdf', 'first', 'pdf.v2', ROWS)
+    assert index.is_current('report.pdf', 'first', 'pdf.v2')
+    assert not index.is_current('report.pdf', 'first', 'pdf.v3')
+
+    index.add_document('report.pdf', 'second', 'pdf.v2', ROWS[:1])
+    assert index.search(['report'])[0] == []
+    assert index.stats()['sentences'] == 1
+    assert index.search(['outreach'], file_paths=['other.pdf']) == ([], 0)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the worker pool that kills parse tasks going over their limits.
+"""
+
+import asyncio
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from worker_pool import IsolatedPool, LimitExceeded, resident_bytes
+
+
+def slow_square(value, seconds):
+    time.sleep(seconds)
+    return value * value
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def hold_memory(size, seconds):
+    data = b'x' * size
+    time.sleep(seconds)
+    return len(data)
+
+
+def test_results_and_errors_come_back():
+    async def scenario():
+        pool = IsolatedPool(2, 5, 0)
+        try:
+            assert await pool.run(slow_square, 7, 0) == 49
+            with pytest.raises(ValueError, match='bad page'):
+                await pool.run(fail, 'bad page')
+            # Both tasks ran on the same worker
+            assert len(pool._workers) == 1
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_slow_task_is_killed_while_others_finish():
+    async def scenario():
+        pool = IsolatedPool(2, 0.5, 0)
+        try:
+            started = time.perf_counter()
+            slow, fast = await asyncio.gather(
+                pool.run(slow_square, 2, 30), pool.run(slow_square, 3, 0.1), return_exceptions=True
+            )
+            assert time.perf_counter() - started < 5
+            assert isinstance(slow, LimitExceeded) and slow.limit == 'time'
+            assert str(slow) == 'exceeded the 0.5 s time limit'
+            assert fast == 9
+            # The killed worker is replaced on the next task
+            assert await pool.run(slow_square, 4, 0) == 16
+            assert all(worker.process.is_alive() for worker in pool._workers)
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.skipif(resident_bytes(os.getpid()) is None, reason='memory is read from /proc')
+def test_task_over_memory_limit_is_killed():
+    async def scenario():
+        pool = IsolatedPool(1, 30, 50 * 1024 * 1024)
+        try:
+            with pytest.raises(LimitExceeded, match='50 MB memory limit') as exceeded:
+                await pool.run(hold_memory, 200 * 1024 * 1024, 30)
+            assert exceeded.value.limit == 'memory'
+            assert await pool.run(hold_memory, 1024, 0) == 1024
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
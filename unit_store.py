@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import time
+from typing import List, Dict, Any, Sequence, Tuple
+
+from sqlite_store import SQLiteStore
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS units (
+    document TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    results BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (document, unit)
+);
+CREATE INDEX IF NOT EXISTS units_accessed ON units (accessed);
+'''
+
+
+def document_key(filename: str, parser: str, keywords_fingerprint: str) -> str:
+    """Identify a document across revisions: same file name, parser and keyword list."""
+    return f'{parser}:{keywords_fingerprint}:{filename}'
+
+
+class UnitStore(SQLiteStore):
+    """Fingerprints and matches of each page or sheet of the documents analyzed so far.
+
+    When a revision of a document arrives, units whose fingerprint is
+    unchanged reuse their stored matches instead of being scanned again.
+    Parsing workers open their own UnitStore on the same directory (see
+    SQLiteStore). The table is bounded by
+    `max_bytes` of stored matches, evicting the least recently used units.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        super().__init__(directory, 'units.sqlite3', SCHEMA)
+        self.max_bytes = max_bytes
+
+    def get_many(self, document: str, fingerprints: Dict[str, str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Stored matches of the units (unit -> fingerprint) whose fingerprint is unchanged."""
+        if not fingerprints:
+            return {}
+        units = list(fingerprints)
+        found = {}
+        with self._connect() as db:
+            # Stay well under SQLite's limit on bound parameters
+            for start in range(0, len(units), 500):
+                chunk = units[start:start + 500]
+                rows = db.execute(
+                    f"SELECT unit, fingerprint, results FROM units WHERE document = ? "
+                    f"AND unit IN ({', '.join('?' * len(chunk))})", [document, *chunk]
+                ).fetchall()
+                for unit, fingerprint, results in rows:
+                    if fingerprints[unit] == fingerprint:
+                        found[unit] = json.loads(results)
+            db.executemany(
+                'UPDATE units SET accessed = ? WHERE document = ? AND unit = ?',
+                [(time.time(), document, unit) for unit in found]
+            )
+        return found
+
+    def put(self, document: str, units: Sequence[Tuple[str, str, List[Dict[str, Any]]]]):
+        """Store (unit, fingerprint, matches) for units of a document, replacing earlier versions."""
+        now = time.time()
+        rows = []
+        for unit, fingerprint, results in units:
+            value = json.dumps(results).encode('utf-8')
+            rows.append((document, unit, fingerprint, value, len(value), now))
+
+        with self._connect() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO units (document, unit, fingerprint, results, size, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            self._evict(db)
+
+    def prune(self, document: str, keep: Sequence[str]):
+        """Drop units a document no longer has, such as pages removed in a revision."""
+        keep = set(keep)
+        with self._connect() as db:
+            stored = [row[0] for row in db.execute('SELECT unit FROM units WHERE document = ?', (document,))]
+            db.executemany(
+                'DELETE FROM units WHERE document = ? AND unit = ?',
+                [(document, unit) for unit in stored if unit not in keep]
+            )
+
+    def _evict(self, db: sqlite3.Connection):
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM units').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for document, unit, size in db.execute('SELECT document, unit, size FROM units ORDER BY accessed').fetchall():
+            db.execute('DELETE FROM units WHERE document = ? AND unit = ?', (document, unit))
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,162 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import Any, Callable, Optional, Set, Tuple
+
+from admission import CapacityPool
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class LimitExceeded(Exception):
+    """A task whose worker was killed for going over its time or memory limit; limit is 'time' or 'memory'."""
+
+    def __init__(self, limit: str, detail: str):
+        super().__init__(detail)
+        self.limit = limit
+
+
+def resident_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process, or None where /proc is not available."""
+    try:
+        with open(f'/proc/{pid}/statm') as handle:
+            return int(handle.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def serve(conn):
+    """Worker loop: run (func, args) tasks received on conn, replying (True, result) or (False, exception)."""
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if task is None:
+            return
+        func, args = task
+        try:
+            reply = (True, func(*args))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send((False, RuntimeError(f'{type(e).__name__}: {e}')))
+
+
+class Worker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        # Daemonic, so a server that exits without shutdown() does not wait on idle workers
+        self.process = context.Process(target=serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def stop(self):
+        """Let an idle worker exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class IsolatedPool:
+    """Worker processes that each run one task at a time and are killed when it goes over its limits.
+
+    ProcessPoolExecutor cannot stop a task once it runs, and killing one of
+    its workers breaks the whole pool. Here every worker has its own pipe:
+    while a task runs the event loop waits for the reply and, every
+    poll_interval seconds, checks the task's wall time and how much the
+    worker's resident memory grew since the task was sent. A worker over
+    max_seconds or max_memory bytes is killed, the task raises
+    LimitExceeded, and a fresh worker takes its place on the next task;
+    tasks on the other workers carry on. A limit of 0 is off. Memory is read
+    from /proc, so it is only enforced on Linux. Workers are started on
+    first use; a task that is cancelled kills its worker too.
+    """
+
+    def __init__(self, workers: int, max_seconds: float, max_memory: int, poll_interval: float = 0.05):
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.poll_interval = poll_interval
+        self.context = multiprocessing.get_context()
+        self.slots = CapacityPool(workers)
+        self._idle = []
+        self._workers: Set[Worker] = set()
+
+    async def run(self, func: Callable, *args) -> Any:
+        """func(*args) in a worker process; raises what it raised, or LimitExceeded."""
+        await self.slots.acquire(1, None)
+        worker = self._idle.pop() if self._idle else self._start()
+        try:
+            ok, value = await self._run_on(worker, func, args)
+        except BaseException:
+            # Killed, crashed or cancelled: the worker may still be busy or hold a broken pipe
+            self._workers.discard(worker)
+            worker.kill()
+            raise
+        else:
+            self._idle.append(worker)
+        finally:
+            self.slots.release(1)
+        if not ok:
+            raise value
+        return value
+
+    def _start(self) -> Worker:
+        worker = Worker(self.context)
+        self._workers.add(worker)
+        return worker
+
+    async def _run_on(self, worker: Worker, func: Callable, args) -> Tuple[bool, Any]:
+        loop = asyncio.get_running_loop()
+        baseline = resident_bytes(worker.process.pid)
+        await asyncio.to_thread(worker.conn.send, (func, args))
+        started = time.monotonic()
+
+        replied = loop.create_future()
+        fd = worker.conn.fileno()
+        loop.add_reader(fd, lambda: replied.done() or replied.set_result(None))
+        try:
+            while True:
+                await asyncio.wait([replied], timeout=self.poll_interval)
+                if replied.done():
+                    break
+                self._check(worker, started, baseline)
+        finally:
+            loop.remove_reader(fd)
+
+        try:
+            return await asyncio.to_thread(worker.conn.recv)
+        except EOFError:
+            worker.process.join(1)
+            raise RuntimeError(f'Worker process exited with code {worker.process.exitcode}')
+
+    def _check(self, worker: Worker, started: float, baseline: Optional[int]):
+        if self.max_seconds > 0 and time.monotonic() - started > self.max_seconds:
+            raise LimitExceeded('time', f'exceeded the {self.max_seconds:g} s time limit')
+        if self.max_memory > 0 and baseline is not None:
+            resident = resident_bytes(worker.process.pid)
+            if resident is not None and resident - baseline > self.max_memory:
+                raise LimitExceeded('memory', f'exceeded the {self.max_memory / (1024 * 1024):g} MB memory limit')
+
+    def shutdown(self):
+        """Stop every worker; tasks still running are killed."""
+        for worker in self._workers:
+            if worker in self._idle:
+                worker.stop()
+            else:
+                worker.kill()
+        self._workers.clear()
+        self._idle.clear()